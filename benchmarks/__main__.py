@@ -0,0 +1,71 @@
+"""
+Performance regression benchmarks for mkkey.
+
+Usage:
+    python -m benchmarks run [-o OUTPUT] [-k FILTER] [--scale SCALE]
+    python -m benchmarks compare BASELINE CURRENT [--threshold RATIO]
+    python -m benchmarks list
+"""
+
+import argparse
+import json
+import sys
+
+from .cases import all_cases
+from .runner import compare, run
+
+
+def _print_result(name: str, res: dict):
+    print(
+        f"{name:<40} {res['keys_per_sec']:>12.2f} keys/s"
+        f"  p50={res['p50_ns'] / 1000:>10.1f}us"
+        f"  p99={res['p99_ns'] / 1000:>10.1f}us"
+        f"  peak={res['peak_memory_bytes'] / 1024:>8.1f}KiB",
+        file=sys.stderr,
+    )
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_run = sub.add_parser("run", help="Run benchmarks and write the results as JSON.")
+    p_run.add_argument("-o", "--output", type=str, default="", help="Output file (default: stdout).")
+    p_run.add_argument("-k", "--filter", type=str, default="", help="Run only cases whose name contains this.")
+    p_run.add_argument("--scale", type=float, default=1.0, help="Scale the number of iterations.")
+
+    p_cmp = sub.add_parser("compare", help="Compare two results and report regressions.")
+    p_cmp.add_argument("baseline", type=str)
+    p_cmp.add_argument("current", type=str)
+    p_cmp.add_argument("--threshold", type=float, default=0.1, help="Allowed slowdown ratio (default: 0.1).")
+
+    sub.add_parser("list", help="List benchmark cases.")
+
+    args = parser.parse_args()
+
+    if args.command == "list":
+        for case in all_cases():
+            print(case.name)
+        return 0
+
+    if args.command == "run":
+        cases = [c for c in all_cases() if args.filter in c.name]
+        res = json.dumps(run(cases, args.scale, _print_result), indent=4)
+        if args.output:
+            with open(args.output, "w") as f:
+                f.write(res + "\n")
+        else:
+            print(res)
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.current) as f:
+        current = json.load(f)
+    regressions = compare(baseline, current, args.threshold)
+    print(json.dumps({"threshold": args.threshold, "regressions": regressions}, indent=4))
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,133 @@
+import contextlib
+import functools
+import os
+from typing import Any, Iterator, List, TextIO, Tuple
+
+import click
+
+from mkkey.cli import _show_result, cli
+from mkkey.jwk import KeyFactory, KeySpec, generate_jwk
+from mkkey.paserk import generate_local_paserk, generate_public_paserk
+from mkkey.utils import to_base64url_uint
+
+from .runner import Case
+
+
+def _jwk_cases() -> List[Case]:
+    cases = [
+        Case("jwk.rsa-2048", lambda: generate_jwk("RSA", alg="RS256", rsa_key_size=2048), 20),
+        Case("jwk.rsa-3072", lambda: generate_jwk("RSA", alg="RS256", rsa_key_size=3072), 10),
+        Case("jwk.rsa-4096", lambda: generate_jwk("RSA", alg="RS256", rsa_key_size=4096), 5),
+        Case("jwk.rsa-2048.kid-sha256", lambda: generate_jwk("RSA", alg="RS256", kid_type="sha256"), 20),
+    ]
+    for crv in ["P-256", "P-384", "P-521", "secp256k1"]:
+        cases.append(Case(f"jwk.ec-{crv}", functools.partial(generate_jwk, "EC", crv), 500))
+    for crv in ["Ed25519", "Ed448"]:
+        cases.append(Case(f"jwk.okp-{crv}", functools.partial(generate_jwk, "OKP", crv), 500))
+    cases.append(Case("jwk.ec-P-256.kid-sha256", lambda: generate_jwk("EC", "P-256", kid_type="sha256"), 500))
+    ec_factory = KeyFactory(KeySpec("EC", "P-256"))
+    cases.append(Case("jwk.factory.ec-P-256", ec_factory.generate, 500))
+    okp_factory = KeyFactory(KeySpec("OKP", "Ed25519"))
+    cases.append(Case("jwk.factory.okp-Ed25519", okp_factory.generate, 500))
+    return cases
+
+
+@contextlib.contextmanager
+def _new_keys(spec: KeySpec, n: int) -> Iterator[Tuple[KeyFactory, List[Any]]]:
+    factory = KeyFactory(spec)
+    yield factory, [factory.new_private_key() for _ in range(n)]
+
+
+def _serialize(keys: Tuple[KeyFactory, List[Any]]) -> object:
+    return keys[0].serialize(keys[1][0])
+
+
+def _serialize_all(keys: Tuple[KeyFactory, List[Any]]) -> object:
+    return [keys[0].serialize(k) for k in keys[1]]
+
+
+def _serialize_records(keys: Tuple[KeyFactory, List[Any]]) -> object:
+    return [keys[0].serialize_record(k) for k in keys[1]]
+
+
+def _serialization_cases() -> List[Case]:
+    # Serialization only, excluding key generation.
+    cases = []
+    for name, spec in [
+        ("rsa-2048", KeySpec("RSA", alg="RS256")),
+        ("rsa-4096", KeySpec("RSA", alg="RS256", rsa_key_size=4096)),
+        ("ec-P-256", KeySpec("EC", "P-256")),
+        ("ec-P-521", KeySpec("EC", "P-521")),
+        ("okp-Ed25519", KeySpec("OKP", "Ed25519")),
+    ]:
+        cases.append(Case(f"jwk.serialize.{name}", _serialize, 2000, functools.partial(_new_keys, spec, 1)))
+        kid_spec = KeySpec(**dict(spec.__dict__, kid_type="sha256"))
+        cases.append(Case(f"jwk.serialize.{name}.kid-sha256", _serialize, 2000, functools.partial(_new_keys, kid_spec, 1)))
+    # Holding many serialized keys in memory (see peak_memory_bytes).
+    spec = KeySpec("EC", "P-256", kid_type="sha256")
+    cases.append(Case("jwk.hold-1000.pairs.ec-P-256", _serialize_all, 20, functools.partial(_new_keys, spec, 1000)))
+    cases.append(Case("jwk.hold-1000.records.ec-P-256", _serialize_records, 20, functools.partial(_new_keys, spec, 1000)))
+    n = 2**4095 + 12345
+    cases.append(Case("utils.to_base64url_uint.4096", lambda: to_base64url_uint(n), 20000))
+    return cases
+
+
+def _paserk_cases() -> List[Case]:
+    cases = []
+    for v in [1, 2, 3, 4]:
+        n = 20 if v == 1 else 300
+        cases.append(Case(f"paserk.v{v}.public", functools.partial(generate_public_paserk, v, False, "", ""), n))
+        cases.append(Case(f"paserk.v{v}.public.kid", functools.partial(generate_public_paserk, v, True, "", ""), n))
+        cases.append(
+            Case(
+                f"paserk.v{v}.public.wrapping-key",
+                functools.partial(generate_public_paserk, v, False, "", "mysecret"),
+                n,
+            )
+        )
+        cases.append(Case(f"paserk.v{v}.local", functools.partial(generate_local_paserk, v, "", False), 1000))
+        cases.append(Case(f"paserk.v{v}.local.kid", functools.partial(generate_local_paserk, v, "", True), 1000))
+        cases.append(
+            Case(
+                f"paserk.v{v}.local.wrapping-key",
+                functools.partial(generate_local_paserk, v, "", False, wrapping_key="mysecret"),
+                1000,
+            )
+        )
+        # Password-based wrapping runs a deliberately expensive KDF.
+        cases.append(
+            Case(
+                f"paserk.v{v}.local.password",
+                functools.partial(generate_local_paserk, v, "", False, password="mysecret"),
+                5,
+            )
+        )
+    return cases
+
+
+@contextlib.contextmanager
+def _cli_output(compact: bool, n: int) -> Iterator[Tuple[click.Context, TextIO, Any]]:
+    ctx = click.Context(cli)
+    ctx.meta["mkkey.compact"] = compact
+    res = [generate_jwk("EC", "P-256", kid_type="sha256") for _ in range(n)]
+    with open(os.devnull, "w") as null:
+        yield ctx, null, res[0] if n == 1 else res
+
+
+def _show_in(output: Tuple[click.Context, TextIO, Any]):
+    ctx, out, res = output
+    with ctx.scope(cleanup=False), contextlib.redirect_stdout(out):
+        _show_result(res)
+
+
+def _cli_cases() -> List[Case]:
+    # Printing results (serialization and terminal I/O) into a pipe in each output mode.
+    cases = []
+    for mode, compact in [("pretty", False), ("compact", True)]:
+        cases.append(Case(f"cli.show-result.{mode}.ec-P-256", _show_in, 2000, functools.partial(_cli_output, compact, 1)))
+        cases.append(Case(f"cli.show-result-1000.{mode}.ec-P-256", _show_in, 20, functools.partial(_cli_output, compact, 1000)))
+    return cases
+
+
+def all_cases() -> List[Case]:
+    return _jwk_cases() + _serialization_cases() + _paserk_cases() + _cli_cases()
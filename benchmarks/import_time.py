@@ -0,0 +1,48 @@
+"""
+Measures the cold-start import time of the mkkey CLI with ``python -X importtime``.
+
+Usage:
+    python benchmarks/import_time.py [--runs N] [--budget-ms MS] [--module MODULE]
+
+Exits with status 1 if the median cumulative import time exceeds the budget.
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+
+
+def measure(module: str) -> int:
+    """
+    Returns the cumulative import time of ``module`` in microseconds.
+    """
+    res = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    for line in reversed(res.stderr.splitlines()):
+        fields = [f.strip() for f in line.split("|")]
+        if len(fields) == 3 and fields[2] == module:
+            return int(fields[1])
+    raise RuntimeError(f"Failed to measure import time of {module}.")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--budget-ms", type=float, default=100.0)
+    parser.add_argument("--module", type=str, default="mkkey.cli")
+    args = parser.parse_args()
+
+    measure(args.module)  # warm up the filesystem and bytecode caches.
+    samples = [measure(args.module) / 1000 for _ in range(args.runs)]
+    median = statistics.median(samples)
+    print(f"{args.module}: median={median:.1f}ms min={min(samples):.1f}ms max={max(samples):.1f}ms budget={args.budget_ms}ms")
+    return 0 if median <= args.budget_ms else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
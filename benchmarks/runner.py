@@ -0,0 +1,123 @@
+import functools
+import gc
+import math
+import platform
+import statistics
+import time
+import tracemalloc
+from contextlib import nullcontext
+from importlib.metadata import PackageNotFoundError, version
+from typing import Any, Callable, ContextManager, Dict, List, NamedTuple, Optional
+
+
+class Case(NamedTuple):
+    name: str
+    # Called with the value of setup, if any.
+    func: Callable[..., object]
+    iterations: int = 100
+    # Prepares the input of func (e.g., keys to serialize) only when the case
+    # is measured, so that listing and filtering the cases stay cheap.
+    setup: Optional[Callable[[], ContextManager[Any]]] = None
+
+
+def _percentile(samples: List[int], p: float) -> int:
+    # Nearest-rank percentile.
+    ordered = sorted(samples)
+    return ordered[max(0, math.ceil(p / 100 * len(ordered)) - 1)]
+
+
+def measure(case: Case, scale: float = 1.0, warmup: int = 3) -> dict:
+    """
+    Runs a benchmark case and returns its throughput, latency percentiles (ns)
+    and peak memory usage (bytes) measured by tracemalloc.
+    """
+    with case.setup() if case.setup is not None else nullcontext() as value:
+        func = case.func if case.setup is None else functools.partial(case.func, value)
+        return _measure(func, max(1, int(case.iterations * scale)), warmup)
+
+
+def _measure(func: Callable[[], object], iterations: int, warmup: int) -> dict:
+    for _ in range(warmup):
+        func()
+
+    samples: List[int] = []
+    gc.collect()
+    gc.disable()
+    try:
+        for _ in range(iterations):
+            start = time.perf_counter_ns()
+            func()
+            samples.append(time.perf_counter_ns() - start)
+    finally:
+        gc.enable()
+
+    # Memory is measured in a separate pass since tracemalloc slows everything down.
+    tracemalloc.start()
+    try:
+        for _ in range(min(iterations, 10)):
+            func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "iterations": iterations,
+        "keys_per_sec": round(1e9 * len(samples) / sum(samples), 2),
+        "mean_ns": int(statistics.mean(samples)),
+        "p50_ns": _percentile(samples, 50),
+        "p90_ns": _percentile(samples, 90),
+        "p99_ns": _percentile(samples, 99),
+        "peak_memory_bytes": peak,
+    }
+
+
+def environment() -> dict:
+    env: Dict[str, Optional[str]] = {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+    }
+    for pkg in ["mkkey", "cryptography", "pyseto", "pycryptodomex", "argon2-cffi"]:
+        try:
+            env[pkg] = version(pkg)
+        except PackageNotFoundError:
+            env[pkg] = None
+    return env
+
+
+def run(cases: List[Case], scale: float = 1.0, progress: Callable[[str, dict], None] = lambda n, r: None) -> dict:
+    results: Dict[str, dict] = {}
+    for case in cases:
+        results[case.name] = measure(case, scale)
+        progress(case.name, results[case.name])
+    return {"environment": environment(), "results": results}
+
+
+def compare(baseline: dict, current: dict, threshold: float = 0.1) -> List[dict]:
+    """
+    Returns the regressions of ``current`` against ``baseline``.
+
+    A case regresses when its median latency or its peak memory usage grows by
+    more than ``threshold`` (a ratio, e.g., 0.1 for 10%).
+    """
+    regressions = []
+    for name, cur in current["results"].items():
+        base = baseline["results"].get(name)
+        if base is None:
+            continue
+        for metric in ["p50_ns", "peak_memory_bytes"]:
+            if not base[metric]:
+                continue
+            ratio = round(cur[metric] / base[metric] - 1, 6)
+            if ratio > threshold:
+                regressions.append(
+                    {
+                        "case": name,
+                        "metric": metric,
+                        "baseline": base[metric],
+                        "current": cur[metric],
+                        "change": round(ratio, 4),
+                    }
+                )
+    return regressions
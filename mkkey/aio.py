@@ -0,0 +1,112 @@
+import asyncio
+from concurrent.futures import Executor
+from functools import partial
+from typing import Any, Callable, Optional
+
+from .jwk import generate_jwk
+from .paserk import generate_local_paserk, generate_public_paserk
+
+
+async def _run(
+    func: Callable[..., Any],
+    executor: Optional[Executor],
+    timeout: Optional[float],
+    limiter: Optional[asyncio.Semaphore],
+) -> Any:
+    if limiter is None:
+        return await asyncio.wait_for(asyncio.get_running_loop().run_in_executor(executor, func), timeout)
+    async with limiter:
+        return await asyncio.wait_for(asyncio.get_running_loop().run_in_executor(executor, func), timeout)
+
+
+async def agenerate_jwk(
+    *args,
+    executor: Optional[Executor] = None,
+    timeout: Optional[float] = None,
+    limiter: Optional[asyncio.Semaphore] = None,
+    **kwargs,
+) -> dict:
+    """
+    Async version of :func:`mkkey.jwk.generate_jwk`.
+
+    The key generation runs on ``executor`` (the event loop's default executor
+    if omitted) so that the event loop is not blocked. Pass a
+    ``ProcessPoolExecutor`` to keep CPU-bound key generation off the loop's
+    process entirely. ``timeout`` raises ``asyncio.TimeoutError`` and
+    ``limiter`` bounds the number of concurrent generations.
+    """
+    return await _run(partial(generate_jwk, *args, **kwargs), executor, timeout, limiter)
+
+
+async def agenerate_public_paserk(
+    *args,
+    executor: Optional[Executor] = None,
+    timeout: Optional[float] = None,
+    limiter: Optional[asyncio.Semaphore] = None,
+    **kwargs,
+) -> dict:
+    """
+    Async version of :func:`mkkey.paserk.generate_public_paserk`. See :func:`agenerate_jwk`.
+    """
+    return await _run(partial(generate_public_paserk, *args, **kwargs), executor, timeout, limiter)
+
+
+async def agenerate_local_paserk(
+    *args,
+    executor: Optional[Executor] = None,
+    timeout: Optional[float] = None,
+    limiter: Optional[asyncio.Semaphore] = None,
+    **kwargs,
+) -> dict:
+    """
+    Async version of :func:`mkkey.paserk.generate_local_paserk`. See :func:`agenerate_jwk`.
+    """
+    return await _run(partial(generate_local_paserk, *args, **kwargs), executor, timeout, limiter)
+
+
+class AsyncKeyGenerator:
+    """
+    Generates keys on an executor with bounded concurrency and a default timeout.
+
+    ``max_concurrency`` of 0 means unbounded. If the awaiting task is cancelled
+    or times out, the result is discarded; a generation which has already
+    started on the executor runs to completion in the background.
+    """
+
+    def __init__(self, executor: Optional[Executor] = None, max_concurrency: int = 0, timeout: Optional[float] = None):
+        if max_concurrency < 0:
+            raise ValueError("max_concurrency must be 0 or a positive integer.")
+        self._executor = executor
+        self._max_concurrency = max_concurrency
+        self._timeout = timeout
+        self._limiter: Optional[asyncio.Semaphore] = None
+
+    def _get_limiter(self) -> Optional[asyncio.Semaphore]:
+        # Created lazily so that it is bound to the running event loop.
+        if self._max_concurrency and self._limiter is None:
+            self._limiter = asyncio.Semaphore(self._max_concurrency)
+        return self._limiter
+
+    async def generate_jwk(self, *args, timeout: Optional[float] = None, **kwargs) -> dict:
+        return await _run(
+            partial(generate_jwk, *args, **kwargs),
+            self._executor,
+            timeout if timeout is not None else self._timeout,
+            self._get_limiter(),
+        )
+
+    async def generate_public_paserk(self, *args, timeout: Optional[float] = None, **kwargs) -> dict:
+        return await _run(
+            partial(generate_public_paserk, *args, **kwargs),
+            self._executor,
+            timeout if timeout is not None else self._timeout,
+            self._get_limiter(),
+        )
+
+    async def generate_local_paserk(self, *args, timeout: Optional[float] = None, **kwargs) -> dict:
+        return await _run(
+            partial(generate_local_paserk, *args, **kwargs),
+            self._executor,
+            timeout if timeout is not None else self._timeout,
+            self._get_limiter(),
+        )
@@ -0,0 +1,99 @@
+import os
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from itertools import islice
+from typing import Any, Callable, Deque, Iterable, Iterator, Tuple
+
+_MAX_CHUNKSIZE = 64
+
+
+def _invoke(job: Tuple[Callable[..., Any], dict, int]) -> list:
+    func, kwargs, n = job
+    return [func(**kwargs) for _ in range(n)]
+
+
+def _invoke_each(job: Tuple[Callable[..., Any], dict, list]) -> list:
+    func, kwargs, items = job
+    return [func(item, **kwargs) for item in items]
+
+
+def _resolve_workers(workers: int) -> int:
+    if workers < 0:
+        raise ValueError("workers must be 0 or a positive integer.")
+    if workers == 0:
+        return os.cpu_count() or 1
+    return workers
+
+
+def generate_batch(func: Callable[..., Any], count: int, workers: int = 1, **kwargs) -> Iterator[Any]:
+    """
+    Calls ``func(**kwargs)`` ``count`` times and yields the results in order.
+
+    When ``workers`` is greater than 1, the calls are distributed across a
+    process pool so that CPU-bound key generation (e.g., RSA) scales with the
+    number of cores. ``0`` means the number of CPUs. ``func`` must be a
+    module-level function so that it can be pickled.
+
+    Only a bounded number of chunks are in flight at a time, so results can be
+    consumed as they are produced with flat memory usage regardless of ``count``.
+    """
+    if count < 1:
+        raise ValueError("count must be a positive integer.")
+    workers = min(_resolve_workers(workers), count)
+    if workers == 1:
+        for _ in range(count):
+            yield func(**kwargs)
+        return
+
+    chunksize = max(1, min(count // (workers * 4), _MAX_CHUNKSIZE))
+    remaining = count
+    pending: Deque[Future] = deque()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        while remaining or pending:
+            while remaining and len(pending) < workers * 2:
+                n = min(chunksize, remaining)
+                pending.append(executor.submit(_invoke, (func, kwargs, n)))
+                remaining -= n
+            yield from pending.popleft().result()
+
+
+def map_batch(func: Callable[..., Any], items: Iterable[Any], workers: int = 1, chunksize: int = 16, **kwargs) -> Iterator[Any]:
+    """
+    Calls ``func(item, **kwargs)`` for each of ``items`` and yields the results in order.
+
+    The same as :func:`generate_batch` except that ``items`` is consumed lazily,
+    so an unbounded stream of items can be processed with flat memory usage.
+    """
+    workers = _resolve_workers(workers)
+    if workers == 1:
+        for item in items:
+            yield func(item, **kwargs)
+        return
+
+    it = iter(items)
+    pending: Deque[Future] = deque()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        while True:
+            while len(pending) < workers * 2:
+                chunk = list(islice(it, chunksize))
+                if not chunk:
+                    break
+                pending.append(executor.submit(_invoke_each, (func, kwargs, chunk)))
+            if not pending:
+                return
+            yield from pending.popleft().result()
+
+
+def merge_jwks(results: Iterable[dict]) -> dict:
+    """
+    Merges the results of ``generate_jwk`` into a single public/secret JWKS pair.
+    """
+    public: list = []
+    secret: list = []
+    for res in results:
+        for k, keys in (("public", public), ("secret", secret)):
+            if "jwks" in res[k]:
+                keys.extend(res[k]["jwks"]["keys"])
+            else:
+                keys.append(res[k]["jwk"])
+    return {"public": {"jwks": {"keys": public}}, "secret": {"jwks": {"keys": secret}}}
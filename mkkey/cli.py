@@ -1,15 +1,69 @@
 import json
+import os
+import sys
+from typing import TYPE_CHECKING, Any, Iterator, Optional, Union
 
 import click
 from click_help_colors import HelpColorsGroup
 
-from .completion import InstallCompletionError, install
-from .jwk import generate_jwk
-from .paserk import generate_local_paserk, generate_public_paserk
+from .kdf import MAX_ITERATION, MAX_MEMORY_COST, MAX_PARALLELISM, MAX_TIME_COST
 
+# NOTE: The modules for key generation (and so cryptography and pyseto) are
+# imported in the command handlers so that --help, --version and shell
+# completion do not pay for them.
+if TYPE_CHECKING:
+    from .pool import KeyPool
 
-def _show_result(res: dict):
-    click.secho(json.dumps(res, indent=4), fg="cyan")
+
+def _compact() -> bool:
+    # --compact/--pretty, or compact if stdout is not a terminal.
+    ctx = click.get_current_context(silent=True)
+    compact = ctx.meta.get("mkkey.compact") if ctx is not None else None
+    return not sys.stdout.isatty() if compact is None else compact
+
+
+def _show_result(res: Union[dict, list]):
+    from .timing import timed
+
+    if _compact():
+        from .output import dumps
+
+        timed("cli.echo", click.echo)(timed("cli.json", dumps)(res))
+        return
+    timed("cli.echo", click.secho)(timed("cli.json", json.dumps)(res, indent=4), fg="cyan")
+    return
+
+
+def _show_results(results: Iterator[dict], count: int, output_format: str):
+    from .output import NDJSONWriter
+    from .timing import timed
+
+    if output_format == "ndjson":
+        write = timed("cli.json", NDJSONWriter(sys.stdout).write)
+        for res in results:
+            write(res)
+        return
+    if count == 1:
+        _show_result(next(results))
+        return
+    _show_result(list(results))
+    return
+
+
+def _write_out_dir(results: Iterator[dict], out_dir: str, jwks: bool):
+    from .output import KeyDirectoryWriter
+    from .timing import timed
+
+    with KeyDirectoryWriter(out_dir, jwks) as writer:
+        write = timed("cli.write", writer.write)
+        for res in results:
+            write(res["public"]["jwk"], res["secret"]["jwk"])
+    _show_result({"out_dir": out_dir, "keys": writer.count})
+    return
+
+
+def _show_profile(report: dict):
+    click.echo(json.dumps({"profile": report}), err=True)
     return
 
 
@@ -18,6 +72,31 @@ def _show_error(err: Exception):
     return
 
 
+def _open_pool(path: str) -> Optional["KeyPool"]:
+    from .pool import KeyPool
+
+    if not path:
+        return None
+    password = os.environ.get("MKKEY_POOL_PASSWORD", "")
+    if not password:
+        raise ValueError("MKKEY_POOL_PASSWORD must be set to use a key pool.")
+    return KeyPool(path, password)
+
+
+def _derive_private_keys(path: str, count: int, crv: str) -> Iterator[Any]:
+    from .derive import derive_private_key, derive_private_keys, derive_seed
+
+    master = os.environ.get("MKKEY_MASTER_SECRET", "")
+    if not master:
+        raise ValueError("MKKEY_MASTER_SECRET must be set to derive keys.")
+    # An explicit --count (even 1) always derives the children, so that a key
+    # does not change when only the count changes.
+    ctx = click.get_current_context(silent=True)
+    if ctx is None or ctx.get_parameter_source("count") in (None, click.core.ParameterSource.DEFAULT):
+        return iter([derive_private_key(derive_seed(master, path), crv)])
+    return derive_private_keys(crv, master, path, 0, count)
+
+
 def _jwk(
     kty: str,
     crv: str = "",
@@ -29,36 +108,132 @@ def _jwk(
     kid_size: int = 0,
     output_format: str = "json",
     rsa_key_size: int = 2048,
+    count: int = 1,
+    workers: int = 1,
+    pool: str = "",
+    derive: Optional[str] = None,
+    emit: str = "",
+    out_dir: str = "",
 ):
+    from .batch import generate_batch, merge_jwks
+    from .export import export_key, generate_key
+    from .jwk import KeyFactory, KeySpec, generate_jwk
+
+    if kid and count > 1:
+        # The keys would share the kid, so that verifiers could not tell them apart.
+        raise click.UsageError("--kid cannot be used with --count > 1, use --kid-type instead.")
     try:
-        _show_result(
-            generate_jwk(
-                kty,
-                crv=crv,
-                alg=alg,
-                use=use,
-                key_ops=key_ops,
-                kid=kid,
-                kid_type=kid_type,
-                kid_size=kid_size,
-                output_format=output_format,
-            )
+        formats = emit.split(",") if emit else []
+        if formats and output_format == "jwks":
+            raise ValueError("--emit cannot be used with -o jwks.")
+        if formats and out_dir:
+            raise ValueError("--emit cannot be used with --out-dir.")
+        params: dict = dict(
+            kty=kty,
+            crv=crv,
+            alg=alg,
+            use=use,
+            key_ops=key_ops,
+            kid=kid,
+            kid_type=kid_type,
+            kid_size=kid_size,
+            rsa_key_size=rsa_key_size,
         )
+        fmt = "json" if output_format == "ndjson" or out_dir else output_format
+        results: Iterator[dict]
+        if derive is not None:
+            if pool:
+                raise ValueError("--derive cannot be used with --pool.")
+            factory = KeyFactory(KeySpec(output_format=fmt, **params))
+            keys = _derive_private_keys(derive, count, crv)
+            if formats:
+                results = (export_key(factory, k, formats) for k in keys)
+            else:
+                results = (factory.serialize(k).to_dict(fmt) for k in keys)
+        elif formats:
+            results = generate_batch(generate_key, count, workers, emit=formats, pool=_open_pool(pool), **params)
+        else:
+            results = generate_batch(generate_jwk, count, workers, output_format=fmt, pool=_open_pool(pool), **params)
+
+        if out_dir:
+            _write_out_dir(results, out_dir, output_format == "jwks")
+        elif output_format == "jwks" and count > 1:
+            _show_result(merge_jwks(results))
+        else:
+            _show_results(results, count, output_format)
     except Exception as err:
         _show_error(err)
     return
 
 
-def _paserk_public(version: int, kid: bool, password: str, wrapping_key: str, rsa_key_size: int = 2048):
+def _paserk_public(
+    version: int,
+    kid: bool,
+    password: str,
+    wrapping_key: str,
+    rsa_key_size: int = 2048,
+    pool: str = "",
+    output_format: str = "json",
+    count: int = 1,
+    workers: int = 1,
+    **kdf,
+):
+    from .paserk import generate_public_paserk, generate_public_paserks
+
     try:
-        _show_result(generate_public_paserk(version, kid, password, wrapping_key, rsa_key_size=rsa_key_size))
+        if count == 1 and output_format == "json":
+            _show_result(
+                generate_public_paserk(
+                    version,
+                    kid,
+                    password,
+                    wrapping_key,
+                    rsa_key_size=rsa_key_size,
+                    pool=_open_pool(pool),
+                    **kdf,
+                )
+            )
+            return
+        results = generate_public_paserks(
+            version,
+            count,
+            kid,
+            password,
+            wrapping_key,
+            workers,
+            rsa_key_size=rsa_key_size,
+            pool=_open_pool(pool),
+            **kdf,
+        )
+        _show_results(results, count, output_format)
     except Exception as err:
         _show_error(err)
 
 
-def _paserk_local(version: int, key_material: str, kid: bool, password: str, wrapping_key: str = ""):
+def _paserk_local(
+    version: int,
+    key_material: str,
+    kid: bool,
+    password: str,
+    wrapping_key: str = "",
+    output_format: str = "json",
+    count: int = 1,
+    workers: int = 1,
+    **kdf,
+):
+    from .paserk import generate_local_paserk, generate_local_paserks
+
     try:
-        _show_result(generate_local_paserk(version, key_material, kid, password, wrapping_key))
+        if count == 1 and output_format == "json":
+            _show_result(generate_local_paserk(version, key_material, kid, password, wrapping_key, **kdf))
+            return
+        if key_material:
+            if count > 1:
+                raise ValueError("key_material cannot be used with --count.")
+            results = iter([generate_local_paserk(version, key_material, kid, password, wrapping_key, **kdf)])
+        else:
+            results = generate_local_paserks(version, count, kid, password, wrapping_key, workers, **kdf)
+        _show_results(results, count, output_format)
     except Exception as err:
         _show_error(err)
 
@@ -91,8 +266,10 @@ def install_callback(ctx, attr, value):
     if not value or ctx.resilient_parsing:
         return value
 
+    from .completion import InstallCompletionError, install
+
     try:
-        shell, path = install()
+        shell, path = install(ctx.find_root().command)
     except InstallCompletionError as err:
         click.secho(
             f"ERROR: {err.shell} is not supported. bash, zsh, and fish are only supported.",
@@ -118,10 +295,28 @@ def install_callback(ctx, attr, value):
     expose_value=False,
     help="Install completion for the current shell.",
 )
-def cli():
+@click.option(
+    "--profile",
+    is_flag=True,
+    envvar="MKKEY_PROFILE",
+    help="Print per-phase timings (nanoseconds) and call counts as JSON on stderr.",
+)
+@click.option(
+    "--compact/--pretty",
+    default=None,
+    envvar="MKKEY_COMPACT",
+    help="Print results as compact JSON without colours, or pretty-printed. [default: compact if stdout is not a terminal]",
+)
+@click.pass_context
+def cli(ctx, profile: bool, compact: Optional[bool]):
     """
     A Generic Application-Layer Key Generator supporting JWK and PASERK.
     """
+    ctx.meta["mkkey.compact"] = compact
+    if profile:
+        from .timing import profiling
+
+        ctx.with_resource(profiling(_show_profile))
 
 
 @cli.group("jwk")
@@ -159,7 +354,7 @@ def jwk():
 )
 @click.option(
     "--kid-type",
-    type=click.Choice(["none", "sha256"]),
+    type=click.Choice(["none", "sha256", "thumbprint-sha256", "thumbprint-sha384", "thumbprint-sha512"]),
     default="none",
     required=False,
     help="Set auto key id generation method when '--kid' is not used.",
@@ -174,10 +369,10 @@ def jwk():
 @click.option(
     "-o",
     "--output_format",
-    type=click.Choice(["json", "jwks"]),
+    type=click.Choice(["json", "jwks", "ndjson"]),
     default="json",
     required=False,
-    help="Set output format.",
+    help="Set output format ('ndjson' streams one key per line).",
 )
 @click.option(
     "--key-size",
@@ -187,6 +382,43 @@ def jwk():
     required=False,
     help="Set the length of modulus in bits for RSA key (MUST be >=512).",
 )
+@click.option(
+    "--count",
+    type=click.IntRange(min=1),
+    default=1,
+    show_default=True,
+    required=False,
+    help="Set the number of keys to generate.",
+)
+@click.option(
+    "--workers",
+    type=click.IntRange(min=0),
+    default=1,
+    show_default=True,
+    required=False,
+    help="Set the number of worker processes for batch generation (0 means the number of CPUs).",
+)
+@click.option(
+    "--pool",
+    type=str,
+    default="",
+    required=False,
+    help="Take the private key from the key pool in this directory (MKKEY_POOL_PASSWORD is required).",
+)
+@click.option(
+    "--emit",
+    type=str,
+    default="",
+    required=False,
+    help="Export the key into these comma-separated formats (jwk, pem, der and paserk) instead of the JWK only.",
+)
+@click.option(
+    "--out-dir",
+    type=str,
+    default="",
+    required=False,
+    help="Write the public and secret JWKs into this directory instead of stdout (a file per key, or a JWKS each with '-o jwks').",
+)
 def jwk_rsa(
     alg: str,
     use: str = "",
@@ -196,9 +428,30 @@ def jwk_rsa(
     kid_size: int = 0,
     output_format: str = "json",
     key_size: int = 2048,
+    count: int = 1,
+    workers: int = 1,
+    pool: str = "",
+    emit: str = "",
+    out_dir: str = "",
 ):
     """Generate RSA JWK."""
-    _jwk("RSA", "", alg, use, key_ops, kid, kid_type, kid_size, output_format, key_size)
+    _jwk(
+        "RSA",
+        "",
+        alg,
+        use,
+        key_ops,
+        kid,
+        kid_type,
+        kid_size,
+        output_format,
+        key_size,
+        count,
+        workers,
+        pool,
+        emit=emit,
+        out_dir=out_dir,
+    )
     return
 
 
@@ -238,7 +491,7 @@ def jwk_rsa(
 )
 @click.option(
     "--kid-type",
-    type=click.Choice(["none", "sha256"]),
+    type=click.Choice(["none", "sha256", "thumbprint-sha256", "thumbprint-sha384", "thumbprint-sha512"]),
     default="none",
     required=False,
     help="Set auto key id generation method when '--kid' is not used.",
@@ -253,10 +506,54 @@ def jwk_rsa(
 @click.option(
     "-o",
     "--output_format",
-    type=click.Choice(["json", "jwks"]),
+    type=click.Choice(["json", "jwks", "ndjson"]),
     default="json",
     required=False,
-    help="Set output format.",
+    help="Set output format ('ndjson' streams one key per line).",
+)
+@click.option(
+    "--count",
+    type=click.IntRange(min=1),
+    default=1,
+    show_default=True,
+    required=False,
+    help="Set the number of keys to generate.",
+)
+@click.option(
+    "--workers",
+    type=click.IntRange(min=0),
+    default=1,
+    show_default=True,
+    required=False,
+    help="Set the number of worker processes for batch generation (0 means the number of CPUs).",
+)
+@click.option(
+    "--pool",
+    type=str,
+    default="",
+    required=False,
+    help="Take the private key from the key pool in this directory (MKKEY_POOL_PASSWORD is required).",
+)
+@click.option(
+    "--derive",
+    type=str,
+    default=None,
+    required=False,
+    help="Derive the private key at this path (e.g., tenant/purpose/epoch) from MKKEY_MASTER_SECRET. With --count, derive the children PATH/0, PATH/1, ...",
+)
+@click.option(
+    "--emit",
+    type=str,
+    default="",
+    required=False,
+    help="Export the key into these comma-separated formats (jwk, pem, der and paserk) instead of the JWK only.",
+)
+@click.option(
+    "--out-dir",
+    type=str,
+    default="",
+    required=False,
+    help="Write the public and secret JWKs into this directory instead of stdout (a file per key, or a JWKS each with '-o jwks').",
 )
 def jwk_ec(
     crv: str,
@@ -267,9 +564,15 @@ def jwk_ec(
     kid_type: str = "none",
     kid_size: int = 0,
     output_format: str = "json",
+    count: int = 1,
+    workers: int = 1,
+    pool: str = "",
+    derive: Optional[str] = None,
+    emit: str = "",
+    out_dir: str = "",
 ):
     """Generate EC JWK."""
-    _jwk("EC", crv, alg, use, key_ops, kid, kid_type, kid_size, output_format, 0)
+    _jwk("EC", crv, alg, use, key_ops, kid, kid_type, kid_size, output_format, 0, count, workers, pool, derive, emit, out_dir)
     return
 
 
@@ -309,7 +612,7 @@ def jwk_ec(
 )
 @click.option(
     "--kid-type",
-    type=click.Choice(["none", "sha256"]),
+    type=click.Choice(["none", "sha256", "thumbprint-sha256", "thumbprint-sha384", "thumbprint-sha512"]),
     default="none",
     required=False,
     help="Set auto key id generation method when '--kid' is not used.",
@@ -324,10 +627,54 @@ def jwk_ec(
 @click.option(
     "-o",
     "--output_format",
-    type=click.Choice(["json", "jwks"]),
+    type=click.Choice(["json", "jwks", "ndjson"]),
     default="json",
     required=False,
-    help="Set output format.",
+    help="Set output format ('ndjson' streams one key per line).",
+)
+@click.option(
+    "--count",
+    type=click.IntRange(min=1),
+    default=1,
+    show_default=True,
+    required=False,
+    help="Set the number of keys to generate.",
+)
+@click.option(
+    "--workers",
+    type=click.IntRange(min=0),
+    default=1,
+    show_default=True,
+    required=False,
+    help="Set the number of worker processes for batch generation (0 means the number of CPUs).",
+)
+@click.option(
+    "--pool",
+    type=str,
+    default="",
+    required=False,
+    help="Take the private key from the key pool in this directory (MKKEY_POOL_PASSWORD is required).",
+)
+@click.option(
+    "--derive",
+    type=str,
+    default=None,
+    required=False,
+    help="Derive the private key at this path (e.g., tenant/purpose/epoch) from MKKEY_MASTER_SECRET. With --count, derive the children PATH/0, PATH/1, ...",
+)
+@click.option(
+    "--emit",
+    type=str,
+    default="",
+    required=False,
+    help="Export the key into these comma-separated formats (jwk, pem, der and paserk) instead of the JWK only.",
+)
+@click.option(
+    "--out-dir",
+    type=str,
+    default="",
+    required=False,
+    help="Write the public and secret JWKs into this directory instead of stdout (a file per key, or a JWKS each with '-o jwks').",
 )
 def jwk_okp(
     crv: str,
@@ -338,9 +685,57 @@ def jwk_okp(
     kid_type: str = "none",
     kid_size: int = 0,
     output_format: str = "json",
+    count: int = 1,
+    workers: int = 1,
+    pool: str = "",
+    derive: Optional[str] = None,
+    emit: str = "",
+    out_dir: str = "",
 ):
     """Generate OKP JWK."""
-    _jwk("OKP", crv, alg, use, key_ops, kid, kid_type, kid_size, output_format, 0)
+    _jwk("OKP", crv, alg, use, key_ops, kid, kid_type, kid_size, output_format, 0, count, workers, pool, derive, emit, out_dir)
+    return
+
+
+@jwk.command("thumbprint")
+@click.argument(
+    "sources",
+    type=str,
+    nargs=-1,
+    required=True,
+)
+@click.option(
+    "--digest",
+    type=str,
+    default="sha256",
+    show_default=True,
+    required=False,
+    help="Set comma-separated digests (sha256, sha384 and sha512).",
+)
+@click.option(
+    "--workers",
+    type=click.IntRange(min=0),
+    default=1,
+    show_default=True,
+    required=False,
+    help="Set the number of worker processes (0 means the number of CPUs).",
+)
+def jwk_thumbprint(sources: tuple, digest: str, workers: int):
+    """Compute RFC 7638 thumbprints of the JWKs in JWK/JWKS files, directories, globs or stdin ('-'). Exits with 1 if any fails."""
+    from .fingerprint import thumbprint_all
+    from .output import NDJSONWriter
+
+    try:
+        writer = NDJSONWriter(sys.stdout)
+        failed = 0
+        for res in thumbprint_all(sources, sys.stdin.buffer, digest.split(","), workers):
+            failed += "error" in res
+            writer.write(res)
+    except Exception as err:
+        _show_error(err)
+        return
+    if failed:
+        exit(1)
     return
 
 
@@ -375,9 +770,87 @@ def v4():
     required=False,
     help="Set another symmetric key for key wrapping.",
 )
-def paserk_v4_public(kid: bool, password: str, wrapping_key: str):
+@click.option(
+    "--pool",
+    type=str,
+    default="",
+    required=False,
+    help="Take the private key from the key pool in this directory (MKKEY_POOL_PASSWORD is required).",
+)
+@click.option(
+    "--memory-cost",
+    type=click.IntRange(min=8, max=MAX_MEMORY_COST),
+    default=15 * 1024,
+    show_default=True,
+    required=False,
+    help="Set Argon2 memory cost (KiB) for password-based key wrapping.",
+)
+@click.option(
+    "--time-cost",
+    type=click.IntRange(min=1, max=MAX_TIME_COST),
+    default=2,
+    show_default=True,
+    required=False,
+    help="Set Argon2 time cost for password-based key wrapping.",
+)
+@click.option(
+    "--parallelism",
+    type=click.IntRange(min=1, max=MAX_PARALLELISM),
+    default=1,
+    show_default=True,
+    required=False,
+    help="Set Argon2 parallelism for password-based key wrapping.",
+)
+@click.option(
+    "-o",
+    "--output_format",
+    type=click.Choice(["json", "ndjson"]),
+    default="json",
+    required=False,
+    help="Set output format ('ndjson' streams one key per line).",
+)
+@click.option(
+    "--count",
+    type=click.IntRange(min=1),
+    default=1,
+    show_default=True,
+    required=False,
+    help="Set the number of keys to generate.",
+)
+@click.option(
+    "--workers",
+    type=click.IntRange(min=0),
+    default=1,
+    show_default=True,
+    required=False,
+    help="Set the number of worker processes for batch generation (0 means the number of CPUs).",
+)
+def paserk_v4_public(
+    kid: bool,
+    password: str,
+    wrapping_key: str,
+    pool: str,
+    memory_cost: int,
+    time_cost: int,
+    parallelism: int,
+    output_format: str,
+    count: int,
+    workers: int,
+):
     """Generate v4.public PASERK for Asymmetric-key digital signatures."""
-    _paserk_public(4, kid, password, wrapping_key)
+    _paserk_public(
+        4,
+        kid,
+        password,
+        wrapping_key,
+        pool=pool,
+        memory_cost=memory_cost,
+        time_cost=time_cost,
+        parallelism=parallelism,
+        output_format=output_format,
+        count=count,
+        workers=workers,
+    )
     return
 
 
@@ -408,9 +881,80 @@ def paserk_v4_public(kid: bool, password: str, wrapping_key: str):
     required=False,
     help="Set another symmetric key for key wrapping.",
 )
-def paserk_v4_local(key_material: str, kid: bool, password: str, wrapping_key: str):
+@click.option(
+    "--memory-cost",
+    type=click.IntRange(min=8, max=MAX_MEMORY_COST),
+    default=15 * 1024,
+    show_default=True,
+    required=False,
+    help="Set Argon2 memory cost (KiB) for password-based key wrapping.",
+)
+@click.option(
+    "--time-cost",
+    type=click.IntRange(min=1, max=MAX_TIME_COST),
+    default=2,
+    show_default=True,
+    required=False,
+    help="Set Argon2 time cost for password-based key wrapping.",
+)
+@click.option(
+    "--parallelism",
+    type=click.IntRange(min=1, max=MAX_PARALLELISM),
+    default=1,
+    show_default=True,
+    required=False,
+    help="Set Argon2 parallelism for password-based key wrapping.",
+)
+@click.option(
+    "-o",
+    "--output_format",
+    type=click.Choice(["json", "ndjson"]),
+    default="json",
+    required=False,
+    help="Set output format ('ndjson' streams one key per line).",
+)
+@click.option(
+    "--count",
+    type=click.IntRange(min=1),
+    default=1,
+    show_default=True,
+    required=False,
+    help="Set the number of keys to generate.",
+)
+@click.option(
+    "--workers",
+    type=click.IntRange(min=0),
+    default=1,
+    show_default=True,
+    required=False,
+    help="Set the number of worker processes for batch generation (0 means the number of CPUs).",
+)
+def paserk_v4_local(
+    key_material: str,
+    kid: bool,
+    password: str,
+    wrapping_key: str,
+    memory_cost: int,
+    time_cost: int,
+    parallelism: int,
+    output_format: str,
+    count: int,
+    workers: int,
+):
     """Generate v4.local PASERK for Symmetric-key encryption (AEAD)."""
-    _paserk_local(4, key_material, kid, password)
+    _paserk_local(
+        4,
+        key_material,
+        kid,
+        password,
+        wrapping_key,
+        memory_cost=memory_cost,
+        time_cost=time_cost,
+        parallelism=parallelism,
+        output_format=output_format,
+        count=count,
+        workers=workers,
+    )
     return
 
 
@@ -440,9 +984,60 @@ def v3():
     required=False,
     help="Set another symmetric key for key wrapping.",
 )
-def paserk_v3_public(kid: bool, password: str, wrapping_key: str):
+@click.option(
+    "--pool",
+    type=str,
+    default="",
+    required=False,
+    help="Take the private key from the key pool in this directory (MKKEY_POOL_PASSWORD is required).",
+)
+@click.option(
+    "--iteration",
+    type=click.IntRange(min=1, max=MAX_ITERATION),
+    default=100000,
+    show_default=True,
+    required=False,
+    help="Set PBKDF2 iteration count for password-based key wrapping.",
+)
+@click.option(
+    "-o",
+    "--output_format",
+    type=click.Choice(["json", "ndjson"]),
+    default="json",
+    required=False,
+    help="Set output format ('ndjson' streams one key per line).",
+)
+@click.option(
+    "--count",
+    type=click.IntRange(min=1),
+    default=1,
+    show_default=True,
+    required=False,
+    help="Set the number of keys to generate.",
+)
+@click.option(
+    "--workers",
+    type=click.IntRange(min=0),
+    default=1,
+    show_default=True,
+    required=False,
+    help="Set the number of worker processes for batch generation (0 means the number of CPUs).",
+)
+def paserk_v3_public(
+    kid: bool, password: str, wrapping_key: str, pool: str, iteration: int, output_format: str, count: int, workers: int
+):
     """Generate v3.public PASERK for Asymmetric-key digital signatures."""
-    _paserk_public(3, kid, password, wrapping_key)
+    _paserk_public(
+        3,
+        kid,
+        password,
+        wrapping_key,
+        pool=pool,
+        iteration=iteration,
+        output_format=output_format,
+        count=count,
+        workers=workers,
+    )
     return
 
 
@@ -473,9 +1068,53 @@ def paserk_v3_public(kid: bool, password: str, wrapping_key: str):
     required=False,
     help="Set another symmetric key for key wrapping.",
 )
-def paserk_v3_local(key_material: str, kid: bool, password: str, wrapping_key: str):
+@click.option(
+    "--iteration",
+    type=click.IntRange(min=1, max=MAX_ITERATION),
+    default=100000,
+    show_default=True,
+    required=False,
+    help="Set PBKDF2 iteration count for password-based key wrapping.",
+)
+@click.option(
+    "-o",
+    "--output_format",
+    type=click.Choice(["json", "ndjson"]),
+    default="json",
+    required=False,
+    help="Set output format ('ndjson' streams one key per line).",
+)
+@click.option(
+    "--count",
+    type=click.IntRange(min=1),
+    default=1,
+    show_default=True,
+    required=False,
+    help="Set the number of keys to generate.",
+)
+@click.option(
+    "--workers",
+    type=click.IntRange(min=0),
+    default=1,
+    show_default=True,
+    required=False,
+    help="Set the number of worker processes for batch generation (0 means the number of CPUs).",
+)
+def paserk_v3_local(
+    key_material: str, kid: bool, password: str, wrapping_key: str, iteration: int, output_format: str, count: int, workers: int
+):
     """Generate v3.local PASERK for Symmetric-key encryption (AEAD)."""
-    _paserk_local(3, key_material, kid, password, wrapping_key)
+    _paserk_local(
+        3,
+        key_material,
+        kid,
+        password,
+        wrapping_key,
+        iteration=iteration,
+        output_format=output_format,
+        count=count,
+        workers=workers,
+    )
     return
 
 
@@ -505,28 +1144,106 @@ def v2():
     required=False,
     help="Set another symmetric key for key wrapping.",
 )
-def paserk_v2_public(kid: bool, password: str, wrapping_key: str):
-    """Generate v2.public PASERK for Asymmetric-key digital signatures."""
-    _paserk_public(2, kid, password, wrapping_key)
-    return
-
-
-@v2.command("local")
-@click.argument(
-    "key_material",
+@click.option(
+    "--pool",
     type=str,
     default="",
     required=False,
+    help="Take the private key from the key pool in this directory (MKKEY_POOL_PASSWORD is required).",
 )
 @click.option(
-    "--kid/--no-kid",
-    default=False,
+    "--memory-cost",
+    type=click.IntRange(min=8, max=MAX_MEMORY_COST),
+    default=15 * 1024,
+    show_default=True,
     required=False,
-    help="Set PASERK ID ('kid') or not.",
+    help="Set Argon2 memory cost (KiB) for password-based key wrapping.",
 )
 @click.option(
-    "--password",
-    type=str,
+    "--time-cost",
+    type=click.IntRange(min=1, max=MAX_TIME_COST),
+    default=2,
+    show_default=True,
+    required=False,
+    help="Set Argon2 time cost for password-based key wrapping.",
+)
+@click.option(
+    "--parallelism",
+    type=click.IntRange(min=1, max=MAX_PARALLELISM),
+    default=1,
+    show_default=True,
+    required=False,
+    help="Set Argon2 parallelism for password-based key wrapping.",
+)
+@click.option(
+    "-o",
+    "--output_format",
+    type=click.Choice(["json", "ndjson"]),
+    default="json",
+    required=False,
+    help="Set output format ('ndjson' streams one key per line).",
+)
+@click.option(
+    "--count",
+    type=click.IntRange(min=1),
+    default=1,
+    show_default=True,
+    required=False,
+    help="Set the number of keys to generate.",
+)
+@click.option(
+    "--workers",
+    type=click.IntRange(min=0),
+    default=1,
+    show_default=True,
+    required=False,
+    help="Set the number of worker processes for batch generation (0 means the number of CPUs).",
+)
+def paserk_v2_public(
+    kid: bool,
+    password: str,
+    wrapping_key: str,
+    pool: str,
+    memory_cost: int,
+    time_cost: int,
+    parallelism: int,
+    output_format: str,
+    count: int,
+    workers: int,
+):
+    """Generate v2.public PASERK for Asymmetric-key digital signatures."""
+    _paserk_public(
+        2,
+        kid,
+        password,
+        wrapping_key,
+        pool=pool,
+        memory_cost=memory_cost,
+        time_cost=time_cost,
+        parallelism=parallelism,
+        output_format=output_format,
+        count=count,
+        workers=workers,
+    )
+    return
+
+
+@v2.command("local")
+@click.argument(
+    "key_material",
+    type=str,
+    default="",
+    required=False,
+)
+@click.option(
+    "--kid/--no-kid",
+    default=False,
+    required=False,
+    help="Set PASERK ID ('kid') or not.",
+)
+@click.option(
+    "--password",
+    type=str,
     default="",
     required=False,
     help="Set password for key wrapping.",
@@ -538,9 +1255,80 @@ def paserk_v2_public(kid: bool, password: str, wrapping_key: str):
     required=False,
     help="Set another symmetric key for key wrapping.",
 )
-def paserk_v2_local(key_material: str, kid: bool, password: str, wrapping_key: str):
+@click.option(
+    "--memory-cost",
+    type=click.IntRange(min=8, max=MAX_MEMORY_COST),
+    default=15 * 1024,
+    show_default=True,
+    required=False,
+    help="Set Argon2 memory cost (KiB) for password-based key wrapping.",
+)
+@click.option(
+    "--time-cost",
+    type=click.IntRange(min=1, max=MAX_TIME_COST),
+    default=2,
+    show_default=True,
+    required=False,
+    help="Set Argon2 time cost for password-based key wrapping.",
+)
+@click.option(
+    "--parallelism",
+    type=click.IntRange(min=1, max=MAX_PARALLELISM),
+    default=1,
+    show_default=True,
+    required=False,
+    help="Set Argon2 parallelism for password-based key wrapping.",
+)
+@click.option(
+    "-o",
+    "--output_format",
+    type=click.Choice(["json", "ndjson"]),
+    default="json",
+    required=False,
+    help="Set output format ('ndjson' streams one key per line).",
+)
+@click.option(
+    "--count",
+    type=click.IntRange(min=1),
+    default=1,
+    show_default=True,
+    required=False,
+    help="Set the number of keys to generate.",
+)
+@click.option(
+    "--workers",
+    type=click.IntRange(min=0),
+    default=1,
+    show_default=True,
+    required=False,
+    help="Set the number of worker processes for batch generation (0 means the number of CPUs).",
+)
+def paserk_v2_local(
+    key_material: str,
+    kid: bool,
+    password: str,
+    wrapping_key: str,
+    memory_cost: int,
+    time_cost: int,
+    parallelism: int,
+    output_format: str,
+    count: int,
+    workers: int,
+):
     """Generate v2.local PASERK for Symmetric-key encryption (AEAD)."""
-    _paserk_local(2, key_material, kid, password, wrapping_key)
+    _paserk_local(
+        2,
+        key_material,
+        kid,
+        password,
+        wrapping_key,
+        memory_cost=memory_cost,
+        time_cost=time_cost,
+        parallelism=parallelism,
+        output_format=output_format,
+        count=count,
+        workers=workers,
+    )
     return
 
 
@@ -578,9 +1366,69 @@ def v1():
     required=False,
     help="Set the length of modulus in bits for RSA key (MUST be >=512).",
 )
-def paserk_v1_public(kid: bool, password: str, wrapping_key: str, key_size: int):
+@click.option(
+    "--pool",
+    type=str,
+    default="",
+    required=False,
+    help="Take the private key from the key pool in this directory (MKKEY_POOL_PASSWORD is required).",
+)
+@click.option(
+    "--iteration",
+    type=click.IntRange(min=1, max=MAX_ITERATION),
+    default=100000,
+    show_default=True,
+    required=False,
+    help="Set PBKDF2 iteration count for password-based key wrapping.",
+)
+@click.option(
+    "-o",
+    "--output_format",
+    type=click.Choice(["json", "ndjson"]),
+    default="json",
+    required=False,
+    help="Set output format ('ndjson' streams one key per line).",
+)
+@click.option(
+    "--count",
+    type=click.IntRange(min=1),
+    default=1,
+    show_default=True,
+    required=False,
+    help="Set the number of keys to generate.",
+)
+@click.option(
+    "--workers",
+    type=click.IntRange(min=0),
+    default=1,
+    show_default=True,
+    required=False,
+    help="Set the number of worker processes for batch generation (0 means the number of CPUs).",
+)
+def paserk_v1_public(
+    kid: bool,
+    password: str,
+    wrapping_key: str,
+    key_size: int,
+    pool: str,
+    iteration: int,
+    output_format: str,
+    count: int,
+    workers: int,
+):
     """Generate v1.public PASERK for Asymmetric-key digital signatures."""
-    _paserk_public(1, kid, password, wrapping_key, rsa_key_size=key_size)
+    _paserk_public(
+        1,
+        kid,
+        password,
+        wrapping_key,
+        rsa_key_size=key_size,
+        pool=pool,
+        iteration=iteration,
+        output_format=output_format,
+        count=count,
+        workers=workers,
+    )
     return
 
 
@@ -611,7 +1459,681 @@ def paserk_v1_public(kid: bool, password: str, wrapping_key: str, key_size: int)
     required=False,
     help="Set another symmetric key for key wrapping.",
 )
-def paserk_v1_local(key_material: str, kid: bool, password: str, wrapping_key: str):
+@click.option(
+    "--iteration",
+    type=click.IntRange(min=1, max=MAX_ITERATION),
+    default=100000,
+    show_default=True,
+    required=False,
+    help="Set PBKDF2 iteration count for password-based key wrapping.",
+)
+@click.option(
+    "-o",
+    "--output_format",
+    type=click.Choice(["json", "ndjson"]),
+    default="json",
+    required=False,
+    help="Set output format ('ndjson' streams one key per line).",
+)
+@click.option(
+    "--count",
+    type=click.IntRange(min=1),
+    default=1,
+    show_default=True,
+    required=False,
+    help="Set the number of keys to generate.",
+)
+@click.option(
+    "--workers",
+    type=click.IntRange(min=0),
+    default=1,
+    show_default=True,
+    required=False,
+    help="Set the number of worker processes for batch generation (0 means the number of CPUs).",
+)
+def paserk_v1_local(
+    key_material: str, kid: bool, password: str, wrapping_key: str, iteration: int, output_format: str, count: int, workers: int
+):
     """Generate v1.local PASERK for Symmetric-key encryption (AEAD)."""
-    _paserk_local(1, key_material, kid, password, wrapping_key)
+    _paserk_local(
+        1,
+        key_material,
+        kid,
+        password,
+        wrapping_key,
+        iteration=iteration,
+        output_format=output_format,
+        count=count,
+        workers=workers,
+    )
+    return
+
+
+@paserk.command("calibrate")
+@click.argument(
+    "version",
+    type=click.Choice(["v1", "v2", "v3", "v4"]),
+    required=True,
+)
+@click.option(
+    "--target-ms",
+    type=click.FloatRange(min=0, min_open=True),
+    default=500.0,
+    show_default=True,
+    required=False,
+    help="Set the target latency (ms) of a single password-based key wrapping.",
+)
+@click.option(
+    "--parallelism",
+    type=click.IntRange(min=1, max=MAX_PARALLELISM),
+    default=1,
+    show_default=True,
+    required=False,
+    help="Set Argon2 parallelism (v2/v4 only).",
+)
+def paserk_calibrate(version: str, target_ms: float, parallelism: int):
+    """Calibrate the cost parameters of password-based key wrapping on this host."""
+    from .paserk import calibrate_kdf
+
+    try:
+        _show_result(calibrate_kdf(int(version[1:]), target_ms, parallelism))
+    except Exception as err:
+        _show_error(err)
+    return
+
+
+@cli.group("pool")
+def pool():
+    """Manage a pool of pre-generated private keys."""
+
+
+@pool.command("fill")
+@click.argument(
+    "path",
+    type=str,
+    required=True,
+)
+@click.option(
+    "--kind",
+    type=str,
+    default="rsa-2048",
+    show_default=True,
+    required=True,
+    help="Set key kind (rsa-<key_size>, p-256, p-384, p-521, secp256k1, ed25519 or ed448).",
+)
+@click.option(
+    "--size",
+    type=click.IntRange(min=1),
+    default=100,
+    show_default=True,
+    required=False,
+    help="Set the number of keys to keep in the pool.",
+)
+@click.option(
+    "--low-watermark",
+    type=click.IntRange(min=0),
+    default=None,
+    required=False,
+    help="Refill the pool in the background when the number of keys drops below this value.",
+)
+@click.option(
+    "--workers",
+    type=click.IntRange(min=0),
+    default=1,
+    show_default=True,
+    required=False,
+    help="Set the number of worker processes for key generation (0 means the number of CPUs).",
+)
+@click.option(
+    "--password",
+    type=str,
+    envvar="MKKEY_POOL_PASSWORD",
+    required=True,
+    help="Set password for encrypting the pooled keys at rest.",
+)
+def pool_fill(path: str, kind: str, size: int, low_watermark: Optional[int], workers: int, password: str):
+    """Fill a key pool up to the specified size."""
+    from .pool import KeyPool
+
+    try:
+        p = KeyPool(path, password)
+        added = p.fill(kind, size, workers, low_watermark)
+        _show_result({"kind": kind, "added": added, "count": p.count(kind)})
+    except Exception as err:
+        _show_error(err)
+    return
+
+
+@pool.command("take")
+@click.argument(
+    "path",
+    type=str,
+    required=True,
+)
+@click.option(
+    "--kind",
+    type=str,
+    default="rsa-2048",
+    show_default=True,
+    required=True,
+    help="Set key kind (rsa-<key_size>, p-256, p-384, p-521, secp256k1, ed25519 or ed448).",
+)
+@click.option(
+    "--password",
+    type=str,
+    envvar="MKKEY_POOL_PASSWORD",
+    required=True,
+    help="Set password for decrypting the pooled keys.",
+)
+def pool_take(path: str, kind: str, password: str):
+    """Take a private key (PKCS8 PEM) from a key pool."""
+    from cryptography.hazmat.primitives import serialization
+
+    from .pool import KeyPool
+
+    try:
+        k = KeyPool(path, password).take(kind)
+        pem = k.private_bytes(
+            serialization.Encoding.PEM,
+            serialization.PrivateFormat.PKCS8,
+            serialization.NoEncryption(),
+        )
+        _show_result({"kind": kind, "secret": {"pem": pem.decode("ascii")}})
+    except Exception as err:
+        _show_error(err)
+    return
+
+
+@cli.command("convert")
+@click.argument(
+    "sources",
+    type=str,
+    nargs=-1,
+    required=True,
+)
+@click.option(
+    "--emit",
+    type=str,
+    default="jwk",
+    show_default=True,
+    required=False,
+    help="Convert the keys into these comma-separated formats (jwk, pem, der and paserk).",
+)
+@click.option(
+    "--alg",
+    type=str,
+    default="",
+    required=False,
+    help="Set algorithm ('alg') for the keys without one.",
+)
+@click.option(
+    "--use",
+    type=click.Choice(["", "sig", "enc"]),
+    default="",
+    required=False,
+    help="Set public key use ('use') for the keys without one.",
+)
+@click.option(
+    "--kid-type",
+    type=click.Choice(["none", "sha256", "thumbprint-sha256", "thumbprint-sha384", "thumbprint-sha512"]),
+    default="none",
+    required=False,
+    help="Set auto key id generation method for the JWKs without a kid.",
+)
+@click.option(
+    "--kid-size",
+    type=int,
+    default=0,
+    required=False,
+    help="Set auto-generated key id size for truncation.",
+)
+@click.option(
+    "-o",
+    "--output_format",
+    type=click.Choice(["ndjson", "jwks"]),
+    default="ndjson",
+    show_default=True,
+    required=False,
+    help="Set output format ('jwks' puts the public JWKs into a single JWKS).",
+)
+@click.option(
+    "--secret/--public",
+    default=False,
+    required=False,
+    help="Put the secret JWKs into the JWKS instead of the public ones (with '-o jwks').",
+)
+@click.option(
+    "--workers",
+    type=click.IntRange(min=0),
+    default=1,
+    show_default=True,
+    required=False,
+    help="Set the number of worker processes for conversion (0 means the number of CPUs).",
+)
+def convert(
+    sources: tuple, emit: str, alg: str, use: str, kid_type: str, kid_size: int, output_format: str, secret: bool, workers: int
+):
+    """Convert private keys (PEM, DER, JWK or JWKS) in files, directories, globs or stdin ('-'). Exits with 1 if any fails."""
+    from .convert import convert as convert_keys
+    from .export import EMIT_FORMATS
+    from .output import JWKSWriter, NDJSONWriter
+
+    try:
+        formats = emit.split(",")
+        for f in formats:
+            if f not in EMIT_FORMATS:
+                raise ValueError(f"Invalid emit format: {f}.")
+        if output_format == "jwks" and formats != ["jwk"]:
+            raise ValueError("--emit cannot be used with -o jwks.")
+        records = convert_keys(
+            sources, sys.stdin.buffer, workers, emit=formats, alg=alg, use=use, kid_type=kid_type, kid_size=kid_size
+        )
+        failed = 0
+        if output_format == "ndjson":
+            writer = NDJSONWriter(sys.stdout)
+            for res in records:
+                failed += "error" in res
+                writer.write(res)
+        else:
+            with JWKSWriter(sys.stdout) as jwks:
+                for res in records:
+                    if "error" in res:
+                        failed += 1
+                        click.secho(f"Failed to convert {res['source']}: {res['error']}", err=True, fg="red")
+                        continue
+                    jwks.write(res["secret" if secret else "public"]["jwk"])
+    except Exception as err:
+        _show_error(err)
+        return
+    if failed:
+        exit(1)
+    return
+
+
+@cli.command("verify")
+@click.argument(
+    "sources",
+    type=str,
+    nargs=-1,
+    required=True,
+)
+@click.option(
+    "--kid-type",
+    type=click.Choice(["", "sha256", "thumbprint-sha256", "thumbprint-sha384", "thumbprint-sha512"]),
+    default="",
+    required=False,
+    help="Check that the kids are generated by this method.",
+)
+@click.option(
+    "--min-rsa-key-size",
+    type=click.IntRange(min=0),
+    default=2048,
+    show_default=True,
+    required=False,
+    help="Reject RSA keys shorter than this (bits).",
+)
+@click.option(
+    "-o",
+    "--output_format",
+    type=click.Choice(["json", "ndjson"]),
+    default="json",
+    show_default=True,
+    required=False,
+    help="Set output format ('json' reports a summary with the invalid keys, 'ndjson' streams a record per key).",
+)
+@click.option(
+    "--workers",
+    type=click.IntRange(min=0),
+    default=1,
+    show_default=True,
+    required=False,
+    help="Set the number of worker processes for verification (0 means the number of CPUs).",
+)
+def verify(sources: tuple, kid_type: str, min_rsa_key_size: int, output_format: str, workers: int):
+    """Verify JWKs in JWK, JWKS or NDJSON files, directories, globs or stdin ('-'). Exits with 1 if any is invalid."""
+    from .output import NDJSONWriter
+    from .verify import verify_all
+
+    try:
+        records = verify_all(sources, sys.stdin.buffer, kid_type, min_rsa_key_size, workers)
+        writer = NDJSONWriter(sys.stdout) if output_format == "ndjson" else None
+        keys = valid = failed = 0
+        invalid = []
+        for res in records:
+            keys += "error" not in res
+            if "error" not in res and not res["errors"]:
+                valid += 1
+            else:
+                failed += 1
+                if writer is None:
+                    invalid.append(res)
+            if writer is not None:
+                writer.write(res)
+        if writer is None:
+            _show_result({"keys": keys, "valid": valid, "invalid": invalid})
+    except Exception as err:
+        _show_error(err)
+        exit(1)
+    if failed:
+        exit(1)
+    return
+
+
+@cli.group("jwks")
+def jwks():
+    """Manage JWKS files."""
+
+
+@jwks.command("index")
+@click.argument(
+    "path",
+    type=str,
+    required=True,
+)
+@click.option(
+    "--output",
+    type=str,
+    default="",
+    required=False,
+    help="Set the path of the index file (defaults to PATH.idx).",
+)
+def jwks_index(path: str, output: str):
+    """Build a kid index of a JWKS file for fast lookups."""
+    from .index import build_index
+
+    try:
+        indexed, skipped = build_index(path, output)
+        _show_result({"index": output or path + ".idx", "keys": indexed, "skipped": skipped})
+    except Exception as err:
+        _show_error(err)
+    return
+
+
+@jwks.command("shard")
+@click.argument(
+    "path",
+    type=str,
+    required=True,
+)
+@click.argument(
+    "out_dir",
+    type=str,
+    required=True,
+)
+@click.option(
+    "--shards",
+    type=click.IntRange(min=1, max=65536),
+    default=16,
+    show_default=True,
+    required=False,
+    help="Set the number of shards.",
+)
+def jwks_shard(path: str, out_dir: str, shards: int):
+    """Split a JWKS file into shards by kid hash with a manifest."""
+    from .shard import MANIFEST, shard_jwks
+
+    try:
+        manifest, skipped = shard_jwks(path, out_dir, shards)
+        _show_result(
+            {"manifest": os.path.join(out_dir, MANIFEST), "shards": shards, "keys": manifest["keys"], "skipped": skipped}
+        )
+    except Exception as err:
+        _show_error(err)
+    return
+
+
+@jwks.command("get")
+@click.argument(
+    "path",
+    type=str,
+    required=True,
+)
+@click.argument(
+    "kid",
+    type=str,
+    required=True,
+)
+@click.option(
+    "--index",
+    type=str,
+    default="",
+    required=False,
+    help="Set the path of the index file (defaults to PATH.idx).",
+)
+def jwks_get(path: str, kid: str, index: str):
+    """Look up a JWK by kid in a JWKS file through its index, or in a sharded JWKS (a directory or URL)."""
+    from .index import JWKSIndex
+    from .shard import ShardedJWKS
+
+    try:
+        if os.path.isdir(path) or path.startswith(("http://", "https://")):
+            jwk = ShardedJWKS.open(path).get(kid)
+        else:
+            with JWKSIndex(path, index) as idx:
+                jwk = idx.get(kid)
+        if jwk is None:
+            raise ValueError(f"kid not found: {kid}.")
+        _show_result({"jwk": jwk})
+    except Exception as err:
+        _show_error(err)
+    return
+
+
+@cli.group("rotate")
+def rotate():
+    """Manage a rotated JWKS."""
+
+
+@rotate.command("add")
+@click.argument(
+    "path",
+    type=str,
+    required=True,
+)
+@click.option(
+    "--kty",
+    type=click.Choice(["RSA", "EC", "OKP"]),
+    default="EC",
+    show_default=True,
+    required=False,
+    help="Set key type.",
+)
+@click.option(
+    "--crv",
+    type=click.Choice(["", "P-256", "P-384", "P-521", "secp256k1", "Ed25519", "Ed448"]),
+    default="",
+    required=False,
+    help="Set curve for EC or OKP (defaults to P-256 and Ed25519 respectively).",
+)
+@click.option(
+    "--alg",
+    type=str,
+    default="",
+    required=False,
+    help="Set algorithm ('alg').",
+)
+@click.option(
+    "--use",
+    type=click.Choice(["", "sig", "enc"]),
+    default="",
+    required=False,
+    help="Set public key use ('use').",
+)
+@click.option(
+    "--key-size",
+    type=int,
+    default=2048,
+    show_default=True,
+    required=False,
+    help="Set the length of modulus in bits for RSA key (MUST be >=512).",
+)
+@click.option(
+    "--max-keys",
+    type=click.IntRange(min=0),
+    default=0,
+    required=False,
+    help="Retire the keys beyond this number from the newest on compaction (0 means no limit).",
+)
+@click.option(
+    "--max-age",
+    type=click.IntRange(min=0),
+    default=0,
+    required=False,
+    help="Retire the keys older than this number of seconds on compaction (0 means no limit).",
+)
+@click.option(
+    "--compact-store/--no-compact-store",
+    default=False,
+    show_default=True,
+    required=False,
+    help="Publish the new key by compacting the key set right away or leave it to 'mkkey rotate compact'.",
+)
+def rotate_add(
+    path: str, kty: str, crv: str, alg: str, use: str, key_size: int, max_keys: int, max_age: int, compact_store: bool
+):
+    """Add a new key (with an auto-generated kid) to a rotated JWKS."""
+    from .jwk import KeySpec
+    from .rotate import RotationStore
+
+    try:
+        if not crv and kty != "RSA":
+            crv = "P-256" if kty == "EC" else "Ed25519"
+        if kty == "RSA":
+            alg = alg or "RS256"
+            crv = ""
+        spec = KeySpec(kty, crv, alg, use, kid_type="sha256", rsa_key_size=key_size)
+        store = RotationStore(path)
+        res: dict = store.rotate(spec).to_dict()
+        if compact_store:
+            retired = store.compact(max_keys, max_age)
+            res["retired"] = retired if retired is not None else []
+        _show_result(res)
+    except Exception as err:
+        _show_error(err)
+    return
+
+
+@rotate.command("compact")
+@click.argument(
+    "path",
+    type=str,
+    required=True,
+)
+@click.option(
+    "--max-keys",
+    type=click.IntRange(min=0),
+    default=0,
+    required=False,
+    help="Retire the keys beyond this number from the newest (0 means no limit).",
+)
+@click.option(
+    "--max-age",
+    type=click.IntRange(min=0),
+    default=0,
+    required=False,
+    help="Retire the keys older than this number of seconds (0 means no limit).",
+)
+def rotate_compact(path: str, max_keys: int, max_age: int):
+    """Fold the added keys into a rotated JWKS, retire old keys and publish it."""
+    from .rotate import RotationStore
+
+    try:
+        store = RotationStore(path)
+        retired = store.compact(max_keys, max_age)
+        if retired is None:
+            raise ValueError("Another process is compacting the key set.")
+        _show_result({"published": store.published_path, "keys": len(store.keys()), "retired": retired})
+    except Exception as err:
+        _show_error(err)
+    return
+
+
+@rotate.command("show")
+@click.argument(
+    "path",
+    type=str,
+    required=True,
+)
+def rotate_show(path: str):
+    """Show the public and secret JWKS of a rotated JWKS (the newest key comes first)."""
+    from .rotate import RotationStore
+
+    try:
+        keys = RotationStore(path).keys()
+        _show_result(
+            {
+                "public": {"jwks": {"keys": [k["public"] for k in keys]}},
+                "secret": {"jwks": {"keys": [k["secret"] for k in keys]}},
+            }
+        )
+    except Exception as err:
+        _show_error(err)
+    return
+
+
+@cli.command("serve")
+@click.option(
+    "--host",
+    type=str,
+    default="127.0.0.1",
+    show_default=True,
+    required=False,
+    help="Set the address to listen on.",
+)
+@click.option(
+    "--port",
+    type=int,
+    default=8765,
+    show_default=True,
+    required=False,
+    help="Set the port to listen on.",
+)
+@click.option(
+    "--unix",
+    type=str,
+    default="",
+    required=False,
+    help="Listen on this Unix domain socket instead of TCP.",
+)
+@click.option(
+    "--workers",
+    type=click.IntRange(min=0),
+    default=0,
+    show_default=True,
+    required=False,
+    help="Set the number of worker processes for key generation (0 means the number of CPUs).",
+)
+@click.option(
+    "--quiet/--no-quiet",
+    default=False,
+    required=False,
+    help="Suppress the access log (with per-request latency) on stderr.",
+)
+def serve(host: str, port: int, unix: str, workers: int, quiet: bool):
+    """Run a resident key issuance server (POST /jwk, /paserk/public, /paserk/local)."""
+    from .serve import create_server
+
+    server: Any
+    try:
+        server = create_server(host, port, unix, workers, quiet=quiet)
+    except Exception as err:
+        _show_error(err)
+        exit(1)
+    click.secho(f"Serving on {unix or f'http://{host}:{server.server_address[1]}'}", err=True, fg="green")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return
+
+
+@cli.command("completion")
+@click.argument("shell", type=click.Choice(["bash", "zsh", "fish"]))
+def completion(shell: str):
+    """Print a static completion script for the shell (used by --install)."""
+    from .completion import render
+
+    click.echo(render(shell, cli), nl=False)
     return
@@ -1,6 +1,7 @@
-import subprocess
-from typing import Tuple
+import os
+from typing import List, Tuple
 
+import click
 import shellingham
 
 
@@ -20,8 +21,146 @@ def _get_path(shell: str) -> str:
     raise InstallCompletionError(shell, f"Unsupported shell: {shell}.")
 
 
-def install() -> Tuple[str, str]:
+class _Node:
+    """
+    A command in the command tree along with what can be completed for it.
+    """
+
+    def __init__(self, path: str, cmd: click.Command):
+        self.path = path
+        self.help = (cmd.get_short_help_str(limit=80) if path != "mkkey" else "").replace("\n", " ")
+        self.subcommands: List[str] = []
+        self.flags: List[str] = []
+        # (option names, choices, help)
+        self.options: List[Tuple[List[str], List[str], str]] = []
+        ctx = click.Context(cmd, info_name=path.split(" ")[-1])
+        for param in cmd.get_params(ctx):
+            if not isinstance(param, click.Option) or param.hidden:
+                continue
+            names = param.opts + param.secondary_opts
+            if param.is_flag or param.count:
+                self.flags.extend(names)
+                continue
+            choices = [c for c in param.type.choices if c] if isinstance(param.type, click.Choice) else []
+            self.options.append((names, [str(c) for c in choices], (param.help or "").replace("\n", " ")))
+
+
+def _walk(cmd: click.Command, path: str = "mkkey") -> List[_Node]:
+    node = _Node(path, cmd)
+    nodes = [node]
+    if isinstance(cmd, click.Group):
+        for name in sorted(cmd.commands):
+            if cmd.commands[name].hidden:
+                continue
+            node.subcommands.append(name)
+            nodes.extend(_walk(cmd.commands[name], f"{path} {name}"))
+    return nodes
+
+
+def _render_bash(nodes: List[_Node]) -> str:
+    groups = " ".join(f'"{n.path}"' for n in nodes[1:])
+    lines = [
+        "# Generated by mkkey. Completes without running mkkey.",
+        "_mkkey_completion() {",
+        '    local cur="${COMP_WORDS[COMP_CWORD]}" prev="${COMP_WORDS[COMP_CWORD-1]}" path="mkkey" w',
+        f"    local -a commands=({groups})",
+        '    for w in "${COMP_WORDS[@]:1:COMP_CWORD-1}"; do',
+        '        for c in "${commands[@]}"; do',
+        '            if [[ "$path $w" == "$c" ]]; then path="$c"; break; fi',
+        "        done",
+        "    done",
+        '    case "$path" in',
+    ]
+    for n in nodes:
+        lines.append(f'    "{n.path}")')
+        lines.append('        case "$prev" in')
+        for names, choices, _ in n.options:
+            pattern = "|".join(names)
+            if choices:
+                lines.append(f'            {pattern}) COMPREPLY=($(compgen -W "{" ".join(choices)}" -- "$cur")); return ;;')
+            else:
+                lines.append(f"            {pattern}) return ;;")
+        lines.append("        esac")
+        options = " ".join(n.flags + [name for names, _, _ in n.options for name in names])
+        lines.append('        if [[ "$cur" == -* ]]; then')
+        lines.append(f'            COMPREPLY=($(compgen -W "{options}" -- "$cur"))')
+        if n.subcommands:
+            lines.append("        else")
+            lines.append(f'            COMPREPLY=($(compgen -W "{" ".join(n.subcommands)}" -- "$cur"))')
+        lines.append("        fi")
+        lines.append("        ;;")
+    lines += [
+        "    esac",
+        "}",
+        "",
+        "complete -o default -F _mkkey_completion mkkey",
+        "",
+    ]
+    return "\n".join(lines)
+
+
+def _fish_quote(s: str) -> str:
+    return "'" + s.replace("\\", "\\\\").replace("'", "\\'") + "'"
+
+
+def _render_fish(nodes: List[_Node]) -> str:
+    lines = [
+        "# Generated by mkkey. Completes without running mkkey.",
+        "set -g __mkkey_commands " + " ".join(_fish_quote(n.path) for n in nodes[1:]),
+        "",
+        "function __mkkey_path",
+        "    set -l path mkkey",
+        "    for w in (commandline -opc)[2..-1]",
+        '        if contains -- "$path $w" $__mkkey_commands',
+        '            set path "$path $w"',
+        "        end",
+        "    end",
+        "    echo $path",
+        "end",
+        "",
+        "complete -c mkkey -e",
+    ]
+    by_path = {n.path: n for n in nodes}
+    for n in nodes:
+        cond = f"-n {_fish_quote(f'test (__mkkey_path) = {chr(34)}{n.path}{chr(34)}')}"
+        for name in n.subcommands:
+            desc = by_path[f"{n.path} {name}"].help
+            lines.append(f"complete -c mkkey -f {cond} -a {name} -d {_fish_quote(desc)}")
+        for flag in n.flags:
+            opt = f"-l {flag[2:]}" if flag.startswith("--") else f"-s {flag[1:]}"
+            lines.append(f"complete -c mkkey {cond} {opt}")
+        for names, choices, desc in n.options:
+            opts = " ".join(f"-l {o[2:]}" if o.startswith("--") else f"-s {o[1:]}" for o in names)
+            if choices:
+                lines.append(f"complete -c mkkey -x {cond} {opts} -a {_fish_quote(' '.join(choices))} -d {_fish_quote(desc)}")
+            else:
+                lines.append(f"complete -c mkkey -r {cond} {opts} -d {_fish_quote(desc)}")
+    lines.append("")
+    return "\n".join(lines)
+
+
+def render(shell: str, cmd: click.Command) -> str:
+    """
+    Renders a static completion script of ``cmd`` for ``shell`` (bash, zsh or fish).
+
+    All the subcommands, options and choices are embedded in the script, so
+    that completion does not launch mkkey (and Python) on each TAB.
+    """
+    nodes = _walk(cmd)
+    if shell == "bash":
+        return _render_bash(nodes)
+    if shell == "zsh":
+        return "autoload -U +X bashcompinit && bashcompinit\n" + _render_bash(nodes)
+    if shell == "fish":
+        return _render_fish(nodes)
+    raise InstallCompletionError(shell, f"Unsupported shell: {shell}.")
+
+
+def install(cmd: click.Command) -> Tuple[str, str]:
     shell: str = shellingham.detect_shell()[0]
     path = _get_path(shell)
-    subprocess.call(f"_MKKEY_COMPLETE={shell}_source mkkey > {path}", shell=True)
+    # The fish completions directory may not exist yet.
+    os.makedirs(os.path.dirname(os.path.expanduser(path)), exist_ok=True)
+    with open(os.path.expanduser(path), "w") as f:
+        f.write(render(shell, cmd))
     return shell, path
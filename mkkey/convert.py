@@ -0,0 +1,213 @@
+import glob
+import json
+import os
+from functools import lru_cache
+from itertools import chain
+from typing import Any, BinaryIO, Iterable, Iterator, List, Sequence, Tuple
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec, rsa
+from cryptography.hazmat.primitives.asymmetric.ed448 import Ed448PrivateKey
+from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PrivateKey
+
+from .batch import map_batch
+from .export import export_key
+from .jwk import EC_CURVES, OKP_CURVES, KeyFactory, KeySpec
+from .timing import profiling_generation
+from .utils import base64url_decode, from_base64url_uint
+
+# The members of a JWK source which are kept by the conversion.
+_KEPT_MEMBERS = ("kid", "alg", "use")
+# kty: the members required to load the private key
+_REQUIRED_MEMBERS: dict = {
+    "RSA": ("n", "e", "d", "p", "q", "dp", "dq", "qi"),
+    "EC": ("d",),
+    "OKP": ("d",),
+}
+# cryptography's curve name: crv
+_CURVE_NAMES: dict = {
+    "secp256r1": "P-256",
+    "secp384r1": "P-384",
+    "secp521r1": "P-521",
+    "secp256k1": "secp256k1",
+}
+
+
+def load_jwk(jwk: dict) -> Any:
+    """
+    Loads the private key of a JWK.
+    """
+    if "d" not in jwk:
+        raise ValueError("The JWK does not contain a private key.")
+    kty = jwk.get("kty", "")
+    for m in _REQUIRED_MEMBERS.get(kty, ()):
+        if m not in jwk:
+            raise ValueError(f"Missing member for {kty}: {m}.")
+    if kty == "RSA":
+        public_numbers = rsa.RSAPublicNumbers(from_base64url_uint(jwk["e"]), from_base64url_uint(jwk["n"]))
+        return rsa.RSAPrivateNumbers(
+            from_base64url_uint(jwk["p"]),
+            from_base64url_uint(jwk["q"]),
+            from_base64url_uint(jwk["d"]),
+            from_base64url_uint(jwk["dp"]),
+            from_base64url_uint(jwk["dq"]),
+            from_base64url_uint(jwk["qi"]),
+            public_numbers,
+        ).private_key()
+    if kty == "EC":
+        if jwk.get("crv") not in EC_CURVES:
+            raise ValueError(f"Invalid crv for EC: {jwk.get('crv')}.")
+        return ec.derive_private_key(from_base64url_uint(jwk["d"]), EC_CURVES[jwk["crv"]][0]())
+    if kty == "OKP":
+        if jwk.get("crv") not in OKP_CURVES:
+            raise ValueError(f"Invalid crv for OKP: {jwk.get('crv')}.")
+        return OKP_CURVES[jwk["crv"]].from_private_bytes(base64url_decode(jwk["d"]))
+    raise ValueError(f"Invalid kty: {kty}.")
+
+
+def _pem_blocks(lines: Iterable[bytes]) -> Iterator[bytes]:
+    block: List[bytes] = []
+    for line in lines:
+        if line.startswith(b"-----BEGIN "):
+            block = []
+        block.append(line.strip())
+        if line.startswith(b"-----END "):
+            yield b"\n".join(block) + b"\n"
+            block = []
+
+
+def _load_keys(data: bytes) -> List[Tuple[Any, dict]]:
+    # Pairs of a private key and the members kept from its JWK (empty for PEM and DER).
+    # DER must not be stripped since it may end with whitespace bytes.
+    text = data.strip()
+    if text.startswith(b"-----BEGIN "):
+        return [(serialization.load_pem_private_key(b, password=None), {}) for b in _pem_blocks(text.splitlines())]
+    if text.startswith(b"{"):
+        obj = json.loads(text)
+        jwks = obj["keys"] if "keys" in obj else [obj]
+        return [(load_jwk(jwk), {m: jwk[m] for m in _KEPT_MEMBERS if m in jwk}) for jwk in jwks]
+    try:
+        return [(serialization.load_der_private_key(data, password=None), {})]
+    except ValueError:
+        raise ValueError("Unsupported key format.")
+
+
+def load_private_keys(data: bytes) -> List[Any]:
+    """
+    Loads the private keys in ``data``, which is PEM (possibly with multiple keys),
+    DER (PKCS8 or traditional), a JWK or a JWKS.
+    """
+    return [k for k, _ in _load_keys(data)]
+
+
+def spec_for_key(k: Any, use: str, key_ops: bool, kid_type: str, kid_size: int, alg: str = "", kid: str = "") -> KeySpec:
+    """
+    Returns the :class:`KeySpec` which renders the private key ``k`` as is.
+    """
+    if isinstance(k, rsa.RSAPrivateKey):
+        return KeySpec("RSA", "", alg, use, key_ops, kid, kid_type, kid_size, rsa_key_size=k.key_size)
+    if isinstance(k, ec.EllipticCurvePrivateKey) and k.curve.name in _CURVE_NAMES:
+        return KeySpec("EC", _CURVE_NAMES[k.curve.name], alg, use, key_ops, kid, kid_type, kid_size)
+    if isinstance(k, Ed25519PrivateKey):
+        return KeySpec("OKP", "Ed25519", alg, use, key_ops, kid, kid_type, kid_size)
+    if isinstance(k, Ed448PrivateKey):
+        return KeySpec("OKP", "Ed448", alg, use, key_ops, kid, kid_type, kid_size)
+    raise ValueError(f"Unsupported key type: {type(k).__name__}.")
+
+
+@lru_cache(maxsize=64)
+def _cached_factory(spec: KeySpec, generation: int) -> KeyFactory:
+    return KeyFactory(spec)
+
+
+def cached_factory(spec: KeySpec) -> KeyFactory:
+    """
+    Returns a :class:`KeyFactory` of ``spec`` shared by the keys of the same spec.
+    """
+    # A factory times itself if built while profiling (see mkkey.timing).
+    return _cached_factory(spec, profiling_generation())
+
+
+def convert_keys(
+    source: Tuple[str, bytes],
+    emit: Sequence[str] = ("jwk",),
+    alg: str = "",
+    use: str = "",
+    key_ops: bool = False,
+    kid_type: str = "none",
+    kid_size: int = 0,
+    paserk_version: int = 0,
+) -> List[dict]:
+    """
+    Converts the private keys in a source (a pair of its name and data, or of
+    a file path and ``b""``) into each of the ``emit`` formats.
+
+    The ``kid``, ``alg`` and ``use`` of JWK sources are kept. ``alg``, ``use``
+    and ``kid_type`` apply to the keys without them.
+
+    Returns a record per key with the name of the source (``source``), or a
+    record with ``error`` if the source cannot be converted.
+    """
+    name, data = source
+    try:
+        if not data:
+            with open(name, "rb") as f:
+                data = f.read()
+        res = []
+        for k, members in _load_keys(data):
+            spec = spec_for_key(
+                k,
+                members.get("use", use),
+                key_ops,
+                kid_type,
+                kid_size,
+                members.get("alg", alg),
+                members.get("kid", ""),
+            )
+            factory = cached_factory(spec)
+            res.append({"source": name, **export_key(factory, k, emit, paserk_version)})
+        return res
+    except Exception as err:
+        return [{"source": name, "error": str(err)}]
+
+
+def iter_sources(sources: Iterable[str], stdin: BinaryIO) -> Iterator[Tuple[str, bytes]]:
+    """
+    Yields the sources to convert lazily from file paths, directories (walked
+    recursively), glob patterns and ``-`` (``stdin``).
+
+    Files are yielded as pairs of a path and ``b""`` so that they are read by
+    the workers. PEM keys on ``stdin`` are yielded one by one as they arrive.
+    """
+    for src in sources:
+        if src == "-":
+            first = stdin.readline()
+            if first.lstrip().startswith(b"{"):
+                yield "<stdin>", first + stdin.read()
+                continue
+            for i, block in enumerate(_pem_blocks(chain([first], stdin))):
+                yield f"<stdin>#{i}", block
+        elif os.path.isdir(src):
+            for root, dirs, files in os.walk(src):
+                dirs.sort()
+                for f in sorted(files):
+                    yield os.path.join(root, f), b""
+        elif os.path.isfile(src):
+            yield src, b""
+        else:
+            paths = sorted(glob.glob(src, recursive=True))
+            if not paths:
+                yield src, b""
+            for p in paths:
+                if os.path.isfile(p):
+                    yield p, b""
+
+
+def convert(sources: Iterable[str], stdin: BinaryIO, workers: int = 1, **kwargs) -> Iterator[dict]:
+    """
+    Converts the keys in ``sources`` (see :func:`iter_sources`) as a streaming
+    pipeline distributed across ``workers`` processes, yielding the records of
+    :func:`convert_keys` in order.
+    """
+    for records in map_batch(convert_keys, iter_sources(sources, stdin), workers, **kwargs):
+        yield from records
@@ -0,0 +1,122 @@
+from typing import Any, Iterator, Union
+
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.asymmetric import ec
+from cryptography.hazmat.primitives.asymmetric.ed448 import Ed448PrivateKey
+from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PrivateKey
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
+
+from .jwk import EC_CURVES, JWKPair, KeyFactory, KeySpec
+
+_SEED_SIZE = 32
+_MIN_MASTER_SIZE = 16
+
+# crv: group order
+_EC_ORDERS: dict = {
+    "P-256": 0xFFFFFFFF00000000FFFFFFFFFFFFFFFFBCE6FAADA7179E84F3B9CAC2FC632551,
+    "P-384": 0xFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFC7634D81F4372DDF581A0DB248B0A77AECEC196ACCC52973,
+    "P-521": 0x01FFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFA51868783BF2F966B7FCC0148F709A5D03BB5C9B8899C47AEBB6FB71E91386409,
+    "secp256k1": 0xFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFEBAAEDCE6AF48A03BBFD25E8CD0364141,
+}
+# crv: (private key class, private key size)
+_OKP_CURVES: dict = {
+    "Ed25519": (Ed25519PrivateKey, 32),
+    "Ed448": (Ed448PrivateKey, 57),
+}
+
+
+def _hkdf(secret: bytes, info: bytes, length: int) -> bytes:
+    return HKDF(algorithm=hashes.SHA256(), length=length, salt=None, info=info).derive(secret)
+
+
+def _to_bytes(master: Union[str, bytes]) -> bytes:
+    return master.encode("utf-8") if isinstance(master, str) else master
+
+
+def derive_seed(master: Union[str, bytes], path: str = "") -> bytes:
+    """
+    Derives the seed of the node at ``path`` (e.g., ``tenant/purpose/epoch``) from ``master``.
+
+    Each segment of the path is derived from its parent with HKDF-SHA256, so
+    ``derive_seed(derive_seed(master, "a"), "b") == derive_seed(master, "a/b")``.
+    A node can be given the seed of its subtree instead of the master secret.
+    An empty path means ``master`` itself.
+    """
+    seed = _to_bytes(master)
+    if len(seed) < _MIN_MASTER_SIZE:
+        raise ValueError(f"master must be at least {_MIN_MASTER_SIZE} bytes.")
+    if not path:
+        return seed
+    segments = path.split("/")
+    if not all(segments):
+        raise ValueError(f"Invalid path: {path}.")
+    for segment in segments:
+        seed = _hkdf(seed, b"mkkey:node:" + segment.encode("utf-8"), _SEED_SIZE)
+    return seed
+
+
+def derive_private_key(seed: bytes, crv: str) -> Any:
+    """
+    Derives an EC or OKP private key of ``crv`` from the seed of a node.
+    """
+    info = b"mkkey:key:" + crv.encode("utf-8")
+    if crv in _EC_ORDERS:
+        curve, key_len, _ = EC_CURVES[crv]
+        n = _EC_ORDERS[crv]
+        # 128 extra bits make the modulo bias negligible (FIPS 186-4 B.4.1).
+        d = int.from_bytes(_hkdf(seed, info, key_len + 16), "big") % (n - 1) + 1
+        return ec.derive_private_key(d, curve())
+    if crv in _OKP_CURVES:
+        cls, size = _OKP_CURVES[crv]
+        return cls.from_private_bytes(_hkdf(seed, info, size))
+    raise ValueError(f"Invalid crv: {crv}.")
+
+
+def derive_private_keys(crv: str, master: Union[str, bytes], path: str = "", start: int = 0, count: int = 1) -> Iterator[Any]:
+    """
+    Derives the private keys of the ``count`` children of ``path`` (``path/start``, ``path/start+1``, ...).
+
+    The seed of ``path`` is derived only once, so each child costs a single
+    HKDF step in addition to the key construction.
+    """
+    if start < 0:
+        raise ValueError("start must be 0 or a positive integer.")
+    if count < 1:
+        raise ValueError("count must be a positive integer.")
+    seed = derive_seed(master, path)
+    return (derive_private_key(derive_seed(seed, str(i)), crv) for i in range(start, start + count))
+
+
+def derive_jwks(spec: KeySpec, master: Union[str, bytes], path: str = "", start: int = 0, count: int = 1) -> Iterator[JWKPair]:
+    """
+    Derives the JWKs of the ``count`` children of ``path``. See :func:`derive_private_keys`.
+    """
+    if spec.kty not in ["EC", "OKP"]:
+        raise ValueError(f"Invalid kty for derivation: {spec.kty}.")
+    factory = KeyFactory(spec)
+    return (factory.serialize(k) for k in derive_private_keys(spec.crv, master, path, start, count))
+
+
+def derive_jwk(
+    master: Union[str, bytes],
+    path: str,
+    kty: str,
+    crv: str,
+    alg: str = "",
+    use: str = "",
+    key_ops: bool = False,
+    kid: str = "",
+    kid_type: str = "none",
+    kid_size: int = 0,
+    output_format: str = "json",
+) -> dict:
+    """
+    Derives the EC or OKP JWK at ``path`` from ``master`` deterministically.
+
+    The other arguments are the same as :func:`mkkey.jwk.generate_jwk`.
+    """
+    spec = KeySpec(kty, crv, alg, use, key_ops, kid, kid_type, kid_size, output_format)
+    if kty not in ["EC", "OKP"]:
+        raise ValueError(f"Invalid kty for derivation: {kty}.")
+    k = derive_private_key(derive_seed(master, path), crv)
+    return KeyFactory(spec).serialize(k).to_dict(output_format)
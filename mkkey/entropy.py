@@ -0,0 +1,86 @@
+import hashlib
+import os
+import threading
+
+_DEFAULT_BLOCK_SIZE = 4096
+_MIN_BLOCK_SIZE = 64
+
+
+class EntropySource:
+    """
+    A source of random bytes for key material.
+
+    Pass one to :class:`mkkey.jwk.KeyFactory`, :func:`mkkey.jwk.generate_jwk`,
+    :func:`mkkey.paserk.generate_public_paserk` (v2/v4) or
+    :func:`mkkey.paserk.generate_local_paserk` to build OKP private keys and
+    local keys from it. Without it, they use OpenSSL's and the OS CSPRNG directly.
+    """
+
+    def read(self, n: int) -> bytes:
+        raise NotImplementedError
+
+
+class BufferedEntropy(EntropySource):
+    """
+    Reads the OS CSPRNG (``os.urandom``, i.e., ``getrandom(2)`` on Linux) in
+    blocks of ``block_size`` bytes and hands out slices of them, so that
+    generating many small keys does not make a system call per key.
+
+    The bytes handed out are wiped from the buffer. The buffer is discarded
+    when the process has been forked, so that a child never reuses the bytes
+    buffered by its parent. Requests larger than ``block_size`` bypass the
+    buffer.
+
+    This pays off where system calls are expensive (e.g., sandboxed or
+    emulated environments). On a recent Linux kernel, a ``getrandom(2)`` per
+    key is already cheaper than the buffering in Python.
+    """
+
+    def __init__(self, block_size: int = _DEFAULT_BLOCK_SIZE):
+        if block_size < _MIN_BLOCK_SIZE:
+            raise ValueError(f"block_size must be at least {_MIN_BLOCK_SIZE}.")
+        self._block_size = block_size
+        self._buf = bytearray()
+        self._pos = 0
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+
+    def read(self, n: int) -> bytes:
+        if n < 0:
+            raise ValueError("n must be 0 or a positive integer.")
+        if n > self._block_size:
+            return os.urandom(n)
+        with self._lock:
+            pid = os.getpid()
+            if pid != self._pid or self._pos + n > len(self._buf):
+                self._buf[:] = bytes(len(self._buf))
+                self._buf = bytearray(os.urandom(self._block_size))
+                self._pos = 0
+                self._pid = pid
+            end = self._pos + n
+            res = bytes(self._buf[self._pos : end])
+            self._buf[self._pos : end] = bytes(n)
+            self._pos = end
+        return res
+
+
+class DeterministicEntropy(EntropySource):
+    """
+    Derives a reproducible byte stream from ``seed`` (SHA-256 in counter mode).
+
+    This is for tests only. Keys generated with it are as secret as the seed.
+    """
+
+    def __init__(self, seed: bytes):
+        self._seed = seed
+        self._counter = 0
+        self._buf = b""
+
+    def read(self, n: int) -> bytes:
+        if n < 0:
+            raise ValueError("n must be 0 or a positive integer.")
+        while len(self._buf) < n:
+            self._buf += hashlib.sha256(self._seed + self._counter.to_bytes(8, "big")).digest()
+            self._counter += 1
+        res, self._buf = self._buf[:n], self._buf[n:]
+        return res
@@ -0,0 +1,109 @@
+import base64
+from typing import Any, Optional, Sequence, Tuple
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec, rsa
+from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PrivateKey
+from pyseto import Key
+
+from .jwk import KeyFactory, KeySpec
+from .pool import KeyPool
+
+EMIT_FORMATS = ["jwk", "pem", "der", "paserk"]
+
+
+def _pem(label: str, der: bytes) -> str:
+    # The same layout as cryptography's PEM encoding (64 characters per line).
+    b64 = base64.b64encode(der).decode("ascii")
+    lines = "\n".join(b64[i : i + 64] for i in range(0, len(b64), 64))
+    return f"-----BEGIN {label}-----\n{lines}\n-----END {label}-----\n"
+
+
+def _paserk_versions(k: Any) -> list:
+    if isinstance(k, rsa.RSAPrivateKey):
+        return [1]
+    if isinstance(k, Ed25519PrivateKey):
+        return [4, 2]
+    if isinstance(k, ec.EllipticCurvePrivateKey) and isinstance(k.curve, ec.SECP384R1):
+        return [3]
+    return []
+
+
+def _validate_emit(emit: Sequence[str]):
+    if not emit:
+        raise ValueError("emit must not be empty.")
+    for f in emit:
+        if f not in EMIT_FORMATS:
+            raise ValueError(f"Invalid emit format: {f}.")
+
+
+def _paserk(factory: KeyFactory, k: Any, pems: Tuple[str, str], paserk_version: int) -> Tuple[str, str]:
+    versions = _paserk_versions(k)
+    name = factory.spec.crv or factory.spec.kty
+    if not versions:
+        raise ValueError(f"PASERK is not available for {name} keys.")
+    version = paserk_version or versions[0]
+    if version not in versions:
+        raise ValueError(f"PASERK v{version} is not available for {name} keys.")
+    return Key.new(version, "public", pems[0]).to_paserk(), Key.new(version, "public", pems[1]).to_paserk()
+
+
+def export_key(factory: KeyFactory, k: Any, emit: Sequence[str], paserk_version: int = 0) -> dict:
+    """
+    Exports a private key of ``factory``'s spec into each of the ``emit`` formats
+    (``jwk``, ``pem``, ``der`` and ``paserk``) in a single pass.
+
+    The public (SubjectPublicKeyInfo) and private (PKCS8) DER are serialized at
+    most once and the PEM and PASERK are built from them. ``der`` is
+    base64-encoded. ``paserk`` is available for RSA (v1), P-384 (v3) and
+    Ed25519 (v4 by default, or v2) keys.
+    """
+    _validate_emit(emit)
+    ders: Optional[Tuple[bytes, bytes]] = None
+    pems: Optional[Tuple[str, str]] = None
+    if any(f != "jwk" for f in emit):
+        ders = (
+            k.public_key().public_bytes(serialization.Encoding.DER, serialization.PublicFormat.SubjectPublicKeyInfo),
+            k.private_bytes(serialization.Encoding.DER, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()),
+        )
+    if ders and ("pem" in emit or "paserk" in emit):
+        pems = (_pem("PUBLIC KEY", ders[0]), _pem("PRIVATE KEY", ders[1]))
+
+    res: dict = {"public": {}, "secret": {}}
+    for f in emit:
+        if f == "jwk":
+            pair = factory.serialize(k)
+            res["public"]["jwk"], res["secret"]["jwk"] = pair.public, pair.secret
+        elif f == "der" and ders:
+            res["public"]["der"] = base64.b64encode(ders[0]).decode("ascii")
+            res["secret"]["der"] = base64.b64encode(ders[1]).decode("ascii")
+        elif f == "pem" and pems:
+            res["public"]["pem"], res["secret"]["pem"] = pems
+        elif f == "paserk" and pems:
+            res["public"]["paserk"], res["secret"]["paserk"] = _paserk(factory, k, pems, paserk_version)
+    return res
+
+
+def generate_key(
+    kty: str,
+    crv: str = "",
+    alg: str = "",
+    use: str = "",
+    key_ops: bool = False,
+    kid: str = "",
+    kid_type: str = "none",
+    kid_size: int = 0,
+    rsa_key_size: int = 2048,
+    emit: Sequence[str] = ("jwk",),
+    paserk_version: int = 0,
+    pool: Optional[KeyPool] = None,
+) -> dict:
+    """
+    Generates a private key once and exports it into each of the ``emit`` formats.
+
+    The arguments for the JWK are the same as :func:`mkkey.jwk.generate_jwk`.
+    See :func:`export_key` for the formats.
+    """
+    _validate_emit(emit)
+    factory = KeyFactory(KeySpec(kty, crv, alg, use, key_ops, kid, kid_type, kid_size, "json", rsa_key_size), pool)
+    return export_key(factory, factory.new_private_key(), emit, paserk_version)
@@ -0,0 +1,93 @@
+import hashlib
+import json
+from typing import BinaryIO, Iterable, Iterator, List, Sequence, Tuple
+
+from .batch import map_batch
+from .utils import base64url_encode
+
+# kty: the required members of RFC 7638 (and RFC 8037 for OKP) in lexicographic order
+_THUMBPRINT_MEMBERS: dict = {
+    "RSA": ["e", "kty", "n"],
+    "EC": ["crv", "kty", "x", "y"],
+    "OKP": ["crv", "kty", "x"],
+    "oct": ["k", "kty"],
+}
+DIGESTS = ["sha256", "sha384", "sha512"]
+
+
+def _validate_digests(digests: Sequence[str]):
+    if not digests:
+        raise ValueError("digests must not be empty.")
+    for d in digests:
+        if d not in DIGESTS:
+            raise ValueError(f"Invalid digest: {d}.")
+
+
+def thumbprint_input(jwk: dict) -> bytes:
+    """
+    Returns the canonical serialization of a JWK for its RFC 7638 thumbprint.
+    """
+    kty = jwk.get("kty", "")
+    if kty not in _THUMBPRINT_MEMBERS:
+        raise ValueError(f"Invalid kty: {kty}.")
+    members = {}
+    for m in _THUMBPRINT_MEMBERS[kty]:
+        if m not in jwk:
+            raise ValueError(f"Missing member for {kty}: {m}.")
+        members[m] = jwk[m]
+    return json.dumps(members, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def thumbprints(jwk: dict, digests: Sequence[str] = ("sha256",)) -> dict:
+    """
+    Computes the RFC 7638 thumbprints of a JWK with each of ``digests``
+    (``sha256``, ``sha384`` and ``sha512``) over one canonical serialization.
+    """
+    _validate_digests(digests)
+    data = thumbprint_input(jwk)
+    return {d: base64url_encode(hashlib.new(d, data).digest()) for d in digests}
+
+
+def thumbprint_keys(source: Tuple[str, bytes], digests: Sequence[str] = ("sha256",)) -> List[dict]:
+    """
+    Computes the thumbprints of the JWKs in a source (a pair of its name and
+    data, or of a file path and ``b""``) with :func:`thumbprints`.
+
+    Returns a record per key with the name of the source (``source``), or a
+    record with ``error`` if the source cannot be read.
+    """
+    name, data = source
+    try:
+        if not data:
+            with open(name, "rb") as f:
+                data = f.read()
+        obj = json.loads(data)
+        keys = obj["keys"] if "keys" in obj else [obj]
+    except Exception as err:
+        return [{"source": name, "error": str(err)}]
+    res = []
+    for jwk in keys:
+        try:
+            res.append({"source": name, "kid": jwk.get("kid", ""), "thumbprints": thumbprints(jwk, digests)})
+        except Exception as err:
+            res.append({"source": name, "kid": jwk.get("kid", ""), "error": str(err)})
+    return res
+
+
+def thumbprint_all(
+    sources: Iterable[str],
+    stdin: BinaryIO,
+    digests: Sequence[str] = ("sha256",),
+    workers: int = 1,
+) -> Iterator[dict]:
+    """
+    Computes the thumbprints of all the JWKs in JWK/JWKS files, directories,
+    glob patterns and ``-`` (``stdin``), reading and parsing the files in
+    ``workers`` processes. Yields the records of :func:`thumbprint_keys` in order.
+    """
+    # Imported here since mkkey.convert depends on mkkey.jwk which depends on this module.
+    from .convert import iter_sources
+
+    _validate_digests(digests)
+    for records in map_batch(thumbprint_keys, iter_sources(sources, stdin), workers, digests=digests):
+        yield from records
@@ -0,0 +1,171 @@
+import hashlib
+import json
+import mmap
+import os
+import struct
+from typing import Iterator, Optional, Tuple
+
+_MAGIC = b"MKKIDX02"
+# magic, size and mtime (ns) of the JWKS file, number of records
+_HEADER = struct.Struct(">8sQQQ")
+# truncated SHA-256 of the kid, byte offset and byte length of the JWK
+_RECORD = struct.Struct(">16sQI")
+_HASH_SIZE = 16
+_WHITESPACE = " \t\n\r"
+
+
+def _kid_hash(kid: str) -> bytes:
+    return hashlib.sha256(kid.encode("utf-8")).digest()[:_HASH_SIZE]
+
+
+def _skip(doc: str, pos: int, chars: str = "") -> int:
+    while pos < len(doc) and (doc[pos] in _WHITESPACE or doc[pos] in chars):
+        pos += 1
+    return pos
+
+
+def _expect(doc: str, pos: int, char: str) -> int:
+    pos = _skip(doc, pos)
+    if pos >= len(doc) or doc[pos] != char:
+        raise ValueError(f"Invalid JWKS: '{char}' is expected at {pos}.")
+    return pos + 1
+
+
+def _iter_jwks(doc: str) -> Iterator[Tuple[dict, int, int]]:
+    """
+    Yields the JWKs in a JWKS along with their byte offsets and lengths.
+
+    ``doc`` is the JWKS decoded as latin-1, so that character positions are
+    byte positions.
+    """
+    decoder = json.JSONDecoder()
+    pos = _expect(doc, 0, "{")
+    while True:
+        pos = _skip(doc, pos, ",")
+        if pos < len(doc) and doc[pos] == "}":
+            return
+        name, pos = decoder.raw_decode(doc, pos)
+        pos = _expect(doc, pos, ":")
+        pos = _skip(doc, pos)
+        if name != "keys":
+            _, pos = decoder.raw_decode(doc, pos)
+            continue
+        pos = _expect(doc, pos, "[")
+        while True:
+            pos = _skip(doc, pos, ",")
+            if pos < len(doc) and doc[pos] == "]":
+                pos += 1
+                break
+            jwk, end = decoder.raw_decode(doc, pos)
+            yield jwk, pos, end - pos
+            pos = end
+
+
+def build_index(jwks_path: str, index_path: str = "") -> Tuple[int, int]:
+    """
+    Writes a kid index of a JWKS file (``<jwks_path>.idx`` by default) and
+    returns the numbers of the indexed keys and of the keys without kid.
+
+    The index consists of fixed-size records (truncated SHA-256 of the kid,
+    byte offset and byte length of the JWK) sorted by the hash. The size and
+    the modification time of the JWKS are recorded to detect a stale index.
+    """
+    index_path = index_path or jwks_path + ".idx"
+    with open(jwks_path, "rb") as f:
+        # Taken before reading, so that a concurrent rewrite makes the index stale.
+        st = os.fstat(f.fileno())
+        data = f.read()
+    records = []
+    skipped = 0
+    for jwk, offset, length in _iter_jwks(data.decode("latin-1")):
+        if not isinstance(jwk, dict) or not isinstance(jwk.get("kid"), str):
+            skipped += 1
+            continue
+        kid = jwk["kid"]
+        if not kid.isascii():
+            # Parse the raw UTF-8 bytes again since the kid may be written as is or \u-escaped.
+            kid = json.loads(data[offset : offset + length])["kid"]
+        records.append((_kid_hash(kid), offset, length))
+    records.sort()
+
+    tmp = index_path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(_HEADER.pack(_MAGIC, len(data), st.st_mtime_ns, len(records)))
+        for r in records:
+            f.write(_RECORD.pack(*r))
+    os.replace(tmp, index_path)
+    return len(records), skipped
+
+
+class JWKSIndex:
+    """
+    Looks up JWKs in a JWKS file by kid through its index built by :func:`build_index`.
+
+    Both files are memory-mapped and a lookup is a binary search over the
+    index records followed by parsing only the matched JWK.
+    """
+
+    def __init__(self, jwks_path: str, index_path: str = ""):
+        index_path = index_path or jwks_path + ".idx"
+        self._count = 0
+        self._index: Optional[mmap.mmap] = None
+        self._jwks: Optional[mmap.mmap] = None
+        with open(index_path, "rb") as f:
+            header = f.read(_HEADER.size)
+            if len(header) != _HEADER.size or not header.startswith(_MAGIC):
+                raise ValueError("Invalid JWKS index.")
+            _, size, mtime_ns, count = _HEADER.unpack(header)
+            if os.path.getsize(index_path) != _HEADER.size + count * _RECORD.size:
+                raise ValueError("Invalid JWKS index.")
+            with open(jwks_path, "rb") as j:
+                # A rewrite (e.g., after a rotation) may keep the size.
+                st = os.fstat(j.fileno())
+                if st.st_size != size or st.st_mtime_ns != mtime_ns:
+                    raise ValueError("The JWKS index is stale.")
+                if count:
+                    self._jwks = mmap.mmap(j.fileno(), 0, access=mmap.ACCESS_READ)
+            if count:
+                self._index = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._count = count
+
+    def __enter__(self) -> "JWKSIndex":
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __len__(self) -> int:
+        return self._count
+
+    def close(self):
+        for m in (self._index, self._jwks):
+            if m is not None:
+                m.close()
+        self._index = self._jwks = None
+
+    def _hash_at(self, i: int) -> bytes:
+        pos = _HEADER.size + i * _RECORD.size
+        return self._index[pos : pos + _HASH_SIZE]  # type: ignore[index]
+
+    def get(self, kid: str) -> Optional[dict]:
+        """
+        Returns the JWK of ``kid``, or ``None`` if it is not in the JWKS.
+        """
+        if not self._count:
+            return None
+        h = _kid_hash(kid)
+        lo, hi = 0, self._count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._hash_at(mid) < h:
+                lo = mid + 1
+            else:
+                hi = mid
+        # Records sharing the truncated hash are adjacent.
+        while lo < self._count and self._hash_at(lo) == h:
+            _, offset, length = _RECORD.unpack_from(self._index, _HEADER.size + lo * _RECORD.size)  # type: ignore[arg-type]
+            jwk = json.loads(self._jwks[offset : offset + length])  # type: ignore[index]
+            if jwk.get("kid") == kid:
+                return jwk
+            lo += 1
+        return None
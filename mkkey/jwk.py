@@ -1,13 +1,57 @@
 import hashlib
-from copy import deepcopy
-from typing import Any, Callable
+from dataclasses import dataclass
+from typing import Any, Callable, Iterable, Iterator, NamedTuple, Optional, Tuple
 
-from cryptography.hazmat.primitives import serialization
 from cryptography.hazmat.primitives.asymmetric import ec, rsa
 from cryptography.hazmat.primitives.asymmetric.ed448 import Ed448PrivateKey
 from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PrivateKey
 
-from .utils import base64url_encode, to_base64url_uint
+from .entropy import EntropySource
+from .fingerprint import thumbprint_input
+from .pool import KeyPool, key_kind
+from .timing import timed
+from .utils import _bytes_from_int, base64url_encode, rsa_spki, to_base64url_uint
+
+# crv: (curve, key length, alg)
+EC_CURVES: dict = {
+    "P-256": (ec.SECP256R1, 32, "ES256"),
+    "P-384": (ec.SECP384R1, 48, "ES384"),
+    "P-521": (ec.SECP521R1, 66, "ES512"),
+    "secp256k1": (ec.SECP256K1, 32, "ES256K"),
+}
+OKP_CURVES: dict = {
+    "Ed25519": Ed25519PrivateKey,
+    "Ed448": Ed448PrivateKey,
+}
+# crv: private key size
+_OKP_KEY_SIZES: dict = {
+    "Ed25519": 32,
+    "Ed448": 57,
+}
+# The fixed DER prefixes of the SubjectPublicKeyInfo which are followed by
+# the uncompressed point (EC) or the raw public key (OKP).
+_SPKI_PREFIXES: dict = {
+    "P-256": bytes.fromhex("3059301306072a8648ce3d020106082a8648ce3d030107034200"),
+    "P-384": bytes.fromhex("3076301006072a8648ce3d020106052b81040022036200"),
+    "P-521": bytes.fromhex("30819b301006072a8648ce3d020106052b8104002303818600"),
+    "secp256k1": bytes.fromhex("3056301006072a8648ce3d020106052b8104000a034200"),
+    "Ed25519": bytes.fromhex("302a300506032b6570032100"),
+    "Ed448": bytes.fromhex("3043300506032b6571033a00"),
+}
+# kid_type: hash function ("sha256" is over the DER SubjectPublicKeyInfo)
+KID_TYPES: dict = {
+    "sha256": hashlib.sha256,
+    "thumbprint-sha256": hashlib.sha256,
+    "thumbprint-sha384": hashlib.sha384,
+    "thumbprint-sha512": hashlib.sha512,
+}
+_OUTPUT_FORMATS = ["json", "jwks"]
+# kty: (public member names, private member names) in the order of the output
+MEMBER_NAMES: dict = {
+    "RSA": (("n", "e"), ("d", "p", "q", "dp", "dq", "qi")),
+    "EC": (("x", "y"), ("d",)),
+    "OKP": (("x",), ("d",)),
+}
 
 
 def _generate_kid(key_bytes: bytes, hash_func: Callable, size: int = 0) -> str:
@@ -19,6 +63,295 @@ def _generate_kid(key_bytes: bytes, hash_func: Callable, size: int = 0) -> str:
     return base64url_encode(src_kid[0:size])
 
 
+class JWKPair(NamedTuple):
+    """
+    A pair of public and secret JWKs generated from the same key.
+    """
+
+    public: dict
+    secret: dict
+
+    def to_dict(self, output_format: str = "json") -> dict:
+        if output_format == "json":
+            return {"public": {"jwk": self.public}, "secret": {"jwk": self.secret}}
+        if output_format == "jwks":
+            return {"public": {"jwks": {"keys": [self.public]}}, "secret": {"jwks": {"keys": [self.secret]}}}
+        raise ValueError(f"Invalid output_format: {output_format}.")
+
+
+class _RecordLayout(NamedTuple):
+    # Shared by all the records of a KeyFactory.
+    spec: "KeySpec"
+    header: dict
+    public_names: Tuple[str, ...]
+    secret_names: Tuple[str, ...]
+
+
+class JWKRecord:
+    """
+    A compact record of a generated key for holding many keys in memory.
+
+    The kid and the base64url-encoded key members are held once in a single
+    string, and the members shared by the keys of the same spec are held
+    once per :class:`KeyFactory`. The JWK, JWKS and PASERK views are rendered
+    on demand.
+    """
+
+    __slots__ = ("_layout", "_data")
+
+    def __init__(self, layout: _RecordLayout, data: str):
+        self._layout = layout
+        # "<kid>.<public members>.<private members>" (base64url has no ".").
+        self._data = data
+
+    @property
+    def kid(self) -> str:
+        return self._data[: self._data.index(".")] or self._layout.spec.kid
+
+    @property
+    def public(self) -> dict:
+        return self._render(False)
+
+    @property
+    def secret(self) -> dict:
+        return self._render(True)
+
+    def _render(self, secret: bool) -> dict:
+        layout = self._layout
+        values = self._data.split(".")
+        kid = values[0] or layout.spec.kid
+        jwk: dict = {"kid": kid} if kid else {}
+        jwk.update(layout.header)
+        if layout.spec.key_ops:
+            jwk["key_ops"] = ["sign"] if secret else ["verify"]
+        jwk.update(zip(layout.secret_names if secret else layout.public_names, values[1:]))
+        return jwk
+
+    def to_pair(self) -> JWKPair:
+        return JWKPair(self.public, self.secret)
+
+    def to_dict(self, output_format: str = "json") -> dict:
+        return self.to_pair().to_dict(output_format)
+
+    def to_paserk(self, paserk_version: int = 0) -> dict:
+        """
+        Renders the key as PASERK. See :func:`mkkey.export.export_key`.
+        """
+        from .convert import cached_factory, load_jwk
+        from .export import export_key
+
+        return export_key(cached_factory(self._layout.spec), load_jwk(self.secret), ["paserk"], paserk_version)
+
+    def __repr__(self) -> str:
+        return f"JWKRecord(kty={self._layout.spec.kty!r}, kid={self.kid!r})"
+
+
+def to_jwks(records: Iterable[JWKRecord], secret: bool = False) -> dict:
+    """
+    Renders the public (or secret) JWKS of ``records``.
+    """
+    return {"keys": [r.secret if secret else r.public for r in records]}
+
+
+@dataclass(frozen=True)
+class KeySpec:
+    """
+    An immutable JWK specification which is validated once on construction.
+
+    The arguments are the same as :func:`generate_jwk`. Use it with
+    :class:`KeyFactory` to generate many keys without re-validating them.
+    """
+
+    kty: str
+    crv: str = ""
+    alg: str = ""
+    use: str = ""
+    key_ops: bool = False
+    kid: str = ""
+    kid_type: str = "none"
+    kid_size: int = 0
+    output_format: str = "json"
+    rsa_key_size: int = 2048
+
+    def __post_init__(self):
+        if self.kty == "EC":
+            if self.crv not in EC_CURVES:
+                raise ValueError(f"Invalid crv for EC: {self.crv}.")
+            alg = EC_CURVES[self.crv][2]
+            if self.alg and self.alg != alg:
+                raise ValueError(f"alg must be {alg}.")
+        elif self.kty == "OKP":
+            if self.crv not in OKP_CURVES:
+                raise ValueError(f"Invalid crv for OKP: {self.crv}.")
+            if self.alg and self.alg != "EdDSA":
+                raise ValueError("alg must be EdDSA.")
+        elif self.kty != "RSA":
+            raise ValueError(f"Invalid kty: {self.kty}.")
+
+        if not self.kid and self.kid_type != "none":
+            if self.kid_type not in KID_TYPES:
+                raise ValueError(f"Invalid kid_type: {self.kid_type}.")
+            if self.kid_size > KID_TYPES[self.kid_type]().digest_size:
+                raise ValueError("size is longer than the source kid.")
+
+        if self.output_format not in _OUTPUT_FORMATS:
+            raise ValueError(f"Invalid output_format: {self.output_format}.")
+
+
+def _rsa_members(k: Any, spki: bool) -> Tuple[dict, dict, bytes]:
+    sn = k.private_numbers()
+    pn = sn.public_numbers
+    n = _bytes_from_int(pn.n)
+    e = _bytes_from_int(pn.e)
+    public = {"n": base64url_encode(n), "e": base64url_encode(e)}
+    private = {
+        "d": to_base64url_uint(sn.d),
+        "p": to_base64url_uint(sn.p),
+        "q": to_base64url_uint(sn.q),
+        "dp": to_base64url_uint(sn.dmp1),
+        "dq": to_base64url_uint(sn.dmq1),
+        "qi": to_base64url_uint(sn.iqmp),
+    }
+    return public, private, rsa_spki(n, e) if spki else b""
+
+
+def _okp_members(k: Any, spki_prefix: bytes) -> Tuple[dict, dict, bytes]:
+    x = k.public_key().public_bytes_raw()
+    d = k.private_bytes_raw()
+    return {"x": base64url_encode(x)}, {"d": base64url_encode(d)}, spki_prefix + x if spki_prefix else b""
+
+
+class KeyFactory:
+    """
+    Generates JWKs following a :class:`KeySpec`.
+
+    Everything derived from the spec (key generator, static members, kid
+    method) is prepared once here, so that :meth:`generate` only does key
+    generation and serialization.
+    """
+
+    def __init__(self, spec: KeySpec, pool: Optional[KeyPool] = None, entropy: Optional[EntropySource] = None):
+        self._spec = spec
+        self._pool = pool
+        self._kind = ""
+        if pool is not None:
+            try:
+                self._kind = key_kind(spec.kty, spec.crv, spec.rsa_key_size)
+            except ValueError:
+                # Leave it to the key generation to report the invalid arguments.
+                self._pool = None
+
+        self._kid_hash: Optional[Callable] = None
+        if not spec.kid and spec.kid_type != "none":
+            self._kid_hash = KID_TYPES[spec.kid_type]
+        # The SubjectPublicKeyInfo is only needed to compute the "sha256" kid.
+        self._kid_spki = self._kid_hash is not None and spec.kid_type == "sha256"
+        self._spki_prefix = _SPKI_PREFIXES.get(spec.crv, b"") if self._kid_spki else b""
+
+        self._new_key: Callable[[], Any]
+        self._members: Callable[[Any], Tuple[dict, dict, bytes]]
+        if spec.kty == "RSA":
+            self._new_key = lambda: rsa.generate_private_key(65537, key_size=spec.rsa_key_size)
+            self._members = lambda k: _rsa_members(k, self._kid_spki)
+        elif spec.kty == "EC":
+            curve, self._key_len, _ = EC_CURVES[spec.crv]
+            self._new_key = lambda: ec.generate_private_key(curve())
+            self._members = self._ec_members
+        else:
+            # OKP private keys are random bytes, so they can be built from an
+            # entropy source. OpenSSL's own generator is faster otherwise.
+            cls, size = OKP_CURVES[spec.crv], _OKP_KEY_SIZES[spec.crv]
+            self._new_key = cls.generate if entropy is None else lambda: cls.from_private_bytes(entropy.read(size))
+            self._members = lambda k: _okp_members(k, self._spki_prefix)
+
+        # The members shared by all the keys, in the order of the output.
+        header: dict = {"kty": spec.kty}
+        if spec.kty != "RSA":
+            header["crv"] = spec.crv
+        if spec.alg:
+            header["alg"] = spec.alg
+        if spec.use:
+            header["use"] = spec.use
+        if spec.key_ops:
+            header["key_ops"] = None
+        self._header = header
+        public_names, private_names = MEMBER_NAMES[spec.kty]
+        self._layout = _RecordLayout(spec, header, public_names, public_names + private_names)
+
+        # No-ops unless profiling is enabled (see mkkey.timing).
+        self._new_key = timed("jwk.keygen", self._new_key)
+        self._members = timed("jwk.members", self._members)
+        self._kid: Callable[[dict, bytes, Callable], str] = timed("jwk.kid", self._compute_kid)
+
+    @property
+    def spec(self) -> KeySpec:
+        return self._spec
+
+    def new_private_key(self) -> Any:
+        """
+        Returns a private key of the spec's type, taken from the pool if any.
+        """
+        return self._pool.take(self._kind) if self._pool is not None else self._new_key()
+
+    def generate(self) -> JWKPair:
+        return self.serialize(self.new_private_key())
+
+    def generate_many(self, n: int) -> Iterator[JWKPair]:
+        for _ in range(n):
+            yield self.generate()
+
+    def generate_record(self) -> JWKRecord:
+        return self.serialize_record(self.new_private_key())
+
+    def generate_records(self, n: int) -> Iterator[JWKRecord]:
+        for _ in range(n):
+            yield self.generate_record()
+
+    def serialize_record(self, k: Any) -> JWKRecord:
+        """
+        Serializes a private key of the spec's type into a compact :class:`JWKRecord`.
+        """
+        public, private, spki = self._members(k)
+        kid = self._kid(public, spki, self._kid_hash) if self._kid_hash is not None else ""
+        return JWKRecord(self._layout, ".".join([kid, *public.values(), *private.values()]))
+
+    def serialize(self, k: Any) -> JWKPair:
+        """
+        Serializes a private key of the spec's type into a :class:`JWKPair`.
+        """
+        public, private, spki = self._members(k)
+        kid = self._spec.kid
+        if self._kid_hash is not None:
+            kid = self._kid(public, spki, self._kid_hash)
+
+        pk: dict = {"kid": kid} if kid else {}
+        pk.update(self._header)
+        sk: dict = {"kid": kid} if kid else {}
+        sk.update(self._header)
+        if self._spec.key_ops:
+            pk["key_ops"] = ["verify"]
+            sk["key_ops"] = ["sign"]
+
+        pk.update(public)
+        sk.update(public)
+        sk.update(private)
+        return JWKPair(pk, sk)
+
+    def _compute_kid(self, public: dict, spki: bytes, hash_func: Callable) -> str:
+        # RFC 7638 thumbprints are over the required public members.
+        src = spki if self._kid_spki else thumbprint_input(dict(public, **self._header))
+        return _generate_kid(src, hash_func, self._spec.kid_size)
+
+    def _ec_members(self, k: Any) -> Tuple[dict, dict, bytes]:
+        # The private numbers carry the public ones, so the key is only exported once.
+        sn = k.private_numbers()
+        x = sn.public_numbers.x.to_bytes(self._key_len, byteorder="big")
+        y = sn.public_numbers.y.to_bytes(self._key_len, byteorder="big")
+        public = {"x": base64url_encode(x), "y": base64url_encode(y)}
+        private = {"d": base64url_encode(sn.private_value.to_bytes(self._key_len, byteorder="big"))}
+        return public, private, self._spki_prefix + b"\x04" + x + y if self._spki_prefix else b""
+
+
 def generate_jwk(
     kty: str,
     crv: str = "",
@@ -27,165 +360,11 @@ def generate_jwk(
     key_ops: bool = False,
     kid: str = "",
     kid_type: str = "none",
-    kid_size: int = 32,
+    kid_size: int = 0,
     output_format: str = "json",
     rsa_key_size: int = 2048,
+    pool: Optional[KeyPool] = None,
+    entropy: Optional[EntropySource] = None,
 ) -> dict:
-    k: Any
-    res: dict = {}
-    pk: dict = {} if not kid else {"kid": kid}
-
-    if kty == "RSA":
-        k = rsa.generate_private_key(65537, key_size=rsa_key_size)
-
-        if not kid and kid_type != "none":
-            if kid_type == "sha256":
-                pk["kid"] = _generate_kid(
-                    k.public_key().public_bytes(
-                        serialization.Encoding.DER,
-                        serialization.PublicFormat.SubjectPublicKeyInfo,
-                    ),
-                    hashlib.sha256,
-                    kid_size,
-                )
-            else:
-                raise ValueError(f"Invalid kid_type: {kid_type}.")
-
-        # public
-        pn = k.private_numbers().public_numbers
-        pk["kty"] = "RSA"
-        pk["alg"] = alg
-        if use:
-            pk["use"] = use
-        if key_ops:
-            pk["key_ops"] = ["verify"]
-        pk["n"] = to_base64url_uint(pn.n)
-        pk["e"] = to_base64url_uint(pn.e)
-
-        # secret
-        sn = k.private_numbers()
-        sk = deepcopy(pk)
-        if key_ops:
-            sk["key_ops"] = ["sign"]
-        sk["d"] = to_base64url_uint(sn.d)
-        sk["p"] = to_base64url_uint(sn.p)
-        sk["q"] = to_base64url_uint(sn.q)
-        sk["dp"] = to_base64url_uint(sn.dmp1)
-        sk["dq"] = to_base64url_uint(sn.dmq1)
-        sk["qi"] = to_base64url_uint(sn.iqmp)
-
-    elif kty == "EC":
-        key_len: int
-        if crv == "P-256":
-            k = ec.generate_private_key(ec.SECP256R1())
-            key_len = 32
-            if alg and alg != "ES256":
-                raise ValueError("alg must be ES256.")
-        elif crv == "P-384":
-            k = ec.generate_private_key(ec.SECP384R1())
-            key_len = 48
-            if alg and alg != "ES384":
-                raise ValueError("alg must be ES384.")
-        elif crv == "P-521":
-            k = ec.generate_private_key(ec.SECP521R1())
-            if alg and alg != "ES512":
-                raise ValueError("alg must be ES512.")
-            key_len = 66
-        elif crv == "secp256k1":
-            k = ec.generate_private_key(ec.SECP256K1())
-            key_len = 32
-            if alg and alg != "ES256K":
-                raise ValueError("alg must be ES256K.")
-        else:
-            raise ValueError(f"Invalid crv for EC: {crv}.")
-
-        if not kid and kid_type != "none":
-            if kid_type == "sha256":
-                pk["kid"] = _generate_kid(
-                    k.public_key().public_bytes(
-                        serialization.Encoding.DER,
-                        serialization.PublicFormat.SubjectPublicKeyInfo,
-                    ),
-                    hashlib.sha256,
-                    kid_size,
-                )
-            else:
-                raise ValueError(f"Invalid kid_type: {kid_type}.")
-
-        # public
-        pk["kty"] = "EC"
-        pk["crv"] = crv
-        if alg:
-            pk["alg"] = alg
-        if use:
-            pk["use"] = use
-        if key_ops:
-            pk["key_ops"] = ["verify"]
-        pk["x"] = base64url_encode(k.public_key().public_numbers().x.to_bytes(key_len, byteorder="big"))
-        pk["y"] = base64url_encode(k.public_key().public_numbers().y.to_bytes(key_len, byteorder="big"))
-
-        # secret
-        sk = deepcopy(pk)
-        if key_ops:
-            sk["key_ops"] = ["sign"]
-        sk["d"] = base64url_encode(k.private_numbers().private_value.to_bytes(key_len, byteorder="big"))
-
-    elif kty == "OKP":
-        if crv == "Ed25519":
-            k = Ed25519PrivateKey.generate()
-        elif crv == "Ed448":
-            k = Ed448PrivateKey.generate()
-        else:
-            raise ValueError(f"Invalid crv for OKP: {crv}.")
-
-        if not kid and kid_type != "none":
-            if kid_type == "sha256":
-                pk["kid"] = _generate_kid(
-                    k.public_key().public_bytes(
-                        serialization.Encoding.DER,
-                        serialization.PublicFormat.SubjectPublicKeyInfo,
-                    ),
-                    hashlib.sha256,
-                    kid_size,
-                )
-            else:
-                raise ValueError(f"Invalid kid_type: {kid_type}.")
-
-        x = k.public_key().public_bytes(serialization.Encoding.Raw, serialization.PublicFormat.Raw)
-        d = k.private_bytes(
-            serialization.Encoding.Raw,
-            serialization.PrivateFormat.Raw,
-            serialization.NoEncryption(),
-        )
-
-        # public
-        pk["kty"] = "OKP"
-        pk["crv"] = crv
-        if alg:
-            if alg != "EdDSA":
-                raise ValueError("alg must be EdDSA.")
-            pk["alg"] = alg
-        if use:
-            pk["use"] = use
-        if key_ops:
-            pk["key_ops"] = ["verify"]
-        pk["x"] = base64url_encode(x)
-
-        # secret
-        sk = deepcopy(pk)
-        if key_ops:
-            sk["key_ops"] = ["sign"]
-        sk["d"] = base64url_encode(d)
-
-    else:
-        raise ValueError(f"Invalid kty: {kty}.")
-
-    if output_format == "json":
-        res["public"] = {"jwk": pk}
-        res["secret"] = {"jwk": sk}
-    elif output_format == "jwks":
-        res["public"] = {"jwks": {"keys": [pk]}}
-        res["secret"] = {"jwks": {"keys": [sk]}}
-    else:
-        raise ValueError(f"Invalid output_format: {output_format}.")
-    return res
+    spec = KeySpec(kty, crv, alg, use, key_ops, kid, kid_type, kid_size, output_format, rsa_key_size)
+    return KeyFactory(spec, pool, entropy).generate().to_dict(output_format)
@@ -0,0 +1,14 @@
+# The cost parameters of password-based key wrapping (PASERK). This module has
+# no dependencies, so that the CLI can validate the options without importing pyseto.
+
+# Defaults of pyseto for password-based key wrapping.
+DEFAULT_ITERATION = 100000
+DEFAULT_MEMORY_COST = 15 * 1024
+DEFAULT_TIME_COST = 2
+DEFAULT_PARALLELISM = 1
+
+# Upper bounds of the cost parameters that pyseto accepts.
+MAX_ITERATION = 1000000
+MAX_MEMORY_COST = 256 * 1024
+MAX_TIME_COST = 4
+MAX_PARALLELISM = 4
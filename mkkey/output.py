@@ -0,0 +1,251 @@
+import json
+import os
+import re
+from secrets import token_hex
+from typing import Any, Iterable, List, TextIO, Tuple
+
+from .fingerprint import thumbprints
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None  # type: ignore[assignment]
+
+_PUBLIC_DIR = "public"
+_SECRET_DIR = "secret"
+_PUBLIC_JWKS = "jwks.json"
+_SECRET_JWKS = "secret-jwks.json"
+_PUBLIC_MODE = 0o644
+_SECRET_MODE = 0o600
+_SYNC_EVERY = 1024
+_FILE_NAME = re.compile(r"[A-Za-z0-9_-][A-Za-z0-9._-]*")
+
+
+def dumps(obj: Any) -> str:
+    """
+    Serializes ``obj`` into compact JSON, using orjson if it is installed.
+    """
+    if orjson is not None:
+        return orjson.dumps(obj).decode("utf-8")
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False)
+
+
+class NDJSONWriter:
+    """
+    Writes one JSON record per line and flushes it immediately.
+    """
+
+    def __init__(self, stream: TextIO):
+        self._stream = stream
+
+    def write(self, record: dict):
+        self._stream.write(dumps(record) + "\n")
+        self._stream.flush()
+
+
+class JWKSWriter:
+    """
+    Writes a JWKS (``{"keys":[...]}``) incrementally, flushing each key as it is
+    written unless ``autoflush`` is ``False``.
+
+    The closing brackets are written by :meth:`close` (or on leaving the ``with``
+    block), so the memory usage does not depend on the number of keys.
+    """
+
+    def __init__(self, stream: TextIO, autoflush: bool = True):
+        self._stream = stream
+        self._autoflush = autoflush
+        self._count = 0
+        self._closed = False
+        self._stream.write('{"keys":[')
+
+    def __enter__(self) -> "JWKSWriter":
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    @property
+    def count(self) -> int:
+        return self._count
+
+    def write(self, jwk: dict):
+        if self._closed:
+            raise ValueError("The writer has already been closed.")
+        if self._count:
+            self._stream.write(",")
+        self._stream.write(dumps(jwk))
+        if self._autoflush:
+            self._stream.flush()
+        self._count += 1
+
+    def close(self):
+        if self._closed:
+            return
+        self._stream.write("]}\n")
+        self._stream.flush()
+        self._closed = True
+
+
+def write_jwks(stream: TextIO, jwks: Iterable[dict]) -> int:
+    """
+    Streams JWKs into ``stream`` as a single JWKS and returns the number of keys written.
+    """
+    with JWKSWriter(stream) as writer:
+        for jwk in jwks:
+            writer.write(jwk)
+    return writer.count
+
+
+def _create(path: str, mode: int) -> int:
+    return os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, "O_BINARY", 0), mode)
+
+
+def _fsync_dir(path: str):
+    # Directories cannot be opened on Windows, where renames are durable once the call returns.
+    if os.name == "nt":
+        return
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class KeyDirectoryWriter:
+    """
+    Writes public and secret JWKs into a directory, the secret ones readable by
+    the owner only (``0600``).
+
+    By default, each key pair is written as ``public/<name>.json`` and
+    ``secret/<name>.json``, where the name is the kid, or the RFC 7638
+    thumbprint (SHA-256) of the key if it has no kid. With ``jwks=True``,
+    the keys are streamed into a JWKS each (``jwks.json`` and
+    ``secret-jwks.json``). Existing files are not replaced unless
+    ``overwrite`` is true.
+
+    The files are written to temporary files without syncing each of them.
+    Every ``sync_every`` keys and on :meth:`close`, the batch is made durable at
+    once: the files are fsynced, renamed into place and then the directories
+    are fsynced. A crash therefore leaves complete keys only (along with
+    temporary files starting with a dot). If the ``with`` block raises, the
+    keys not yet synced are discarded.
+    """
+
+    def __init__(self, path: str, jwks: bool = False, sync_every: int = _SYNC_EVERY, overwrite: bool = False):
+        if sync_every < 1:
+            raise ValueError("sync_every must be a positive integer.")
+        self._path = path
+        self._overwrite = overwrite
+        self._sync_every = sync_every
+        self._count = 0
+        self._closed = False
+        # (temporary path, path)
+        self._pending: List[Tuple[str, str]] = []
+        self._names: set = set()
+        self._streams: List[TextIO] = []
+        self._jwks: List[JWKSWriter] = []
+        os.makedirs(path, exist_ok=True)
+        if jwks:
+            for name in (_PUBLIC_JWKS, _SECRET_JWKS):
+                if not overwrite and os.path.exists(os.path.join(path, name)):
+                    raise ValueError(f"The JWKS already exists: {name}.")
+            self._jwks = [self._open_jwks(_PUBLIC_JWKS, _PUBLIC_MODE), self._open_jwks(_SECRET_JWKS, _SECRET_MODE)]
+            return
+        os.makedirs(os.path.join(path, _PUBLIC_DIR), exist_ok=True)
+        os.makedirs(os.path.join(path, _SECRET_DIR), 0o700, exist_ok=True)
+
+    def __enter__(self) -> "KeyDirectoryWriter":
+        return self
+
+    def __exit__(self, exc_type, *args):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+    @property
+    def count(self) -> int:
+        return self._count
+
+    def write(self, public: dict, secret: dict):
+        if self._closed:
+            raise ValueError("The writer has already been closed.")
+        if self._jwks:
+            self._jwks[0].write(public)
+            self._jwks[1].write(secret)
+            self._count += 1
+            return
+        name = self._name(public)
+        self._write_file(os.path.join(self._path, _PUBLIC_DIR, name), public, _PUBLIC_MODE)
+        self._write_file(os.path.join(self._path, _SECRET_DIR, name), secret, _SECRET_MODE)
+        self._count += 1
+        if self._count % self._sync_every == 0:
+            self._sync()
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        for writer in self._jwks:
+            writer.close()
+        self._sync()
+
+    def abort(self):
+        if self._closed:
+            return
+        self._closed = True
+        for stream in self._streams:
+            stream.close()
+        for tmp, _ in self._pending:
+            os.remove(tmp)
+        self._pending = []
+
+    def _name(self, jwk: dict) -> str:
+        if "kid" in jwk:
+            if not _FILE_NAME.fullmatch(jwk["kid"]):
+                raise ValueError(f"kid cannot be used as a file name: {jwk['kid']}.")
+            name = jwk["kid"] + ".json"
+        else:
+            name = thumbprints(jwk)["sha256"] + ".json"
+        if name in self._names or (not self._overwrite and os.path.exists(os.path.join(self._path, _PUBLIC_DIR, name))):
+            raise ValueError(f"The key already exists: {name}.")
+        self._names.add(name)
+        return name
+
+    def _open_jwks(self, name: str, mode: int) -> JWKSWriter:
+        tmp = os.path.join(self._path, f".tmp-{token_hex(16)}")
+        self._pending.append((tmp, os.path.join(self._path, name)))
+        stream = os.fdopen(_create(tmp, mode), "w", encoding="utf-8")
+        self._streams.append(stream)
+        return JWKSWriter(stream, autoflush=False)
+
+    def _write_file(self, path: str, jwk: dict, mode: int):
+        tmp = os.path.join(os.path.dirname(path), f".tmp-{token_hex(16)}")
+        with os.fdopen(_create(tmp, mode), "wb") as f:
+            f.write(dumps(jwk).encode("utf-8") + b"\n")
+        self._pending.append((tmp, path))
+
+    def _sync(self):
+        if not self._pending:
+            return
+        if self._streams:
+            for stream in self._streams:
+                os.fsync(stream.fileno())
+                stream.close()
+        else:
+            # The files have been closed without syncing, so reopen them to sync.
+            for tmp, _ in self._pending:
+                fd = os.open(tmp, os.O_WRONLY | getattr(os, "O_BINARY", 0))
+                try:
+                    os.fsync(fd)
+                finally:
+                    os.close(fd)
+        dirs = set()
+        for tmp, path in self._pending:
+            os.replace(tmp, path)
+            dirs.add(os.path.dirname(path))
+        self._pending = []
+        for d in sorted(dirs):
+            _fsync_dir(d)
+        _fsync_dir(self._path)
@@ -1,32 +1,60 @@
+import math
+import statistics
+import time
 from secrets import token_bytes
-from typing import Any, Union
+from typing import Any, Callable, Iterator, Optional, Tuple, Union
 
 from cryptography.hazmat.primitives import serialization
 from cryptography.hazmat.primitives.asymmetric import ec, rsa
 from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PrivateKey
 from pyseto import Key
 
+from .batch import generate_batch
+from .entropy import EntropySource
+from .kdf import (
+    DEFAULT_ITERATION,
+    DEFAULT_MEMORY_COST,
+    DEFAULT_PARALLELISM,
+    DEFAULT_TIME_COST,
+    MAX_ITERATION,
+    MAX_MEMORY_COST,
+    MAX_PARALLELISM,
+    MAX_TIME_COST,
+)
+from .pool import KeyPool
+from .timing import profiling_enabled, timed
 
-def generate_public_paserk(
-    version: int,
-    kid: bool,
+
+def _to_paserk(
+    k: Any,
     password: str,
-    wrapping_key: str,
-    rsa_key_size: int = 2048,
-) -> dict:
-    if password and wrapping_key:
-        raise ValueError("Only one of password or wrapping_key must be specified.")
+    wrapping_key: Union[str, bytes],
+    iteration: int,
+    memory_cost: int,
+    time_cost: int,
+    parallelism: int,
+) -> str:
+    if not password:
+        return k.to_paserk(wrapping_key=wrapping_key)
+    # v1/v3 use PBKDF2 (iteration) and v2/v4 use Argon2id (memory_cost, time_cost and parallelism).
+    if k.version in [1, 3]:
+        return k.to_paserk(password=password, iteration=iteration)
+    return k.to_paserk(password=password, memory_cost=memory_cost, time_cost=time_cost, parallelism=parallelism)
 
-    k: Any
+
+def _new_private_key(version: int, rsa_key_size: int, pool: Optional[KeyPool], entropy: Optional[EntropySource]) -> Any:
     if version == 1:
-        k = rsa.generate_private_key(65537, key_size=rsa_key_size)
-    elif version in [2, 4]:
-        k = Ed25519PrivateKey.generate()
-    elif version == 3:
-        k = ec.generate_private_key(ec.SECP384R1())
-    else:
-        raise ValueError(f"Invalid version: {version}.")
+        return pool.take(f"rsa-{rsa_key_size}") if pool else rsa.generate_private_key(65537, key_size=rsa_key_size)
+    if version in [2, 4]:
+        if pool:
+            return pool.take("ed25519")
+        return Ed25519PrivateKey.generate() if entropy is None else Ed25519PrivateKey.from_private_bytes(entropy.read(32))
+    if version == 3:
+        return pool.take("p-384") if pool else ec.generate_private_key(ec.SECP384R1())
+    raise ValueError(f"Invalid version: {version}.")
 
+
+def _pems(k: Any) -> Tuple[bytes, bytes]:
     priv_pem = k.private_bytes(
         serialization.Encoding.PEM,
         serialization.PrivateFormat.PKCS8,
@@ -37,14 +65,62 @@ def generate_public_paserk(
         serialization.Encoding.PEM,
         serialization.PublicFormat.SubjectPublicKeyInfo,
     )
+    return pub_pem, priv_pem
+
+
+def _paserk_id(k: Any) -> str:
+    return k.to_paserk_id()
+
+
+def _public_paserk(k: Any) -> str:
+    return k.to_paserk()
+
+
+_PHASES = (
+    ("paserk.keygen", _new_private_key),
+    ("paserk.pem", _pems),
+    ("paserk.key", Key.new),
+    ("paserk.to_paserk_id", _paserk_id),
+    ("paserk.to_paserk", _public_paserk),
+    ("paserk.wrap", _to_paserk),
+)
+_UNTIMED_PHASES = tuple(f for _, f in _PHASES)
+
+
+def _phases() -> Tuple[Callable, ...]:
+    # Checked once per key rather than per phase so that disabled profiling costs nothing.
+    if not profiling_enabled():
+        return _UNTIMED_PHASES
+    return tuple(timed(name, f) for name, f in _PHASES)
+
+
+def generate_public_paserk(
+    version: int,
+    kid: bool,
+    password: str,
+    wrapping_key: Union[str, bytes],
+    rsa_key_size: int = 2048,
+    pool: Optional[KeyPool] = None,
+    iteration: int = DEFAULT_ITERATION,
+    memory_cost: int = DEFAULT_MEMORY_COST,
+    time_cost: int = DEFAULT_TIME_COST,
+    parallelism: int = DEFAULT_PARALLELISM,
+    entropy: Optional[EntropySource] = None,
+) -> dict:
+    if password and wrapping_key:
+        raise ValueError("Only one of password or wrapping_key must be specified.")
+
+    new_private_key, pems, new_key, paserk_id, public_paserk, wrap = _phases()
+    k = new_private_key(version, rsa_key_size, pool, entropy)
+    pub_pem, priv_pem = pems(k)
     res: dict = {"public": {}, "secret": {}}
-    pk = Key.new(version, "public", pub_pem)
-    sk = Key.new(version, "public", priv_pem)
+    pk = new_key(version, "public", pub_pem)
+    sk = new_key(version, "public", priv_pem)
     if kid:
-        res["public"]["kid"] = pk.to_paserk_id()
-        res["secret"]["kid"] = sk.to_paserk_id()
-    res["public"]["paserk"] = pk.to_paserk()
-    res["secret"]["paserk"] = sk.to_paserk(password=password, wrapping_key=wrapping_key)
+        res["public"]["kid"] = paserk_id(pk)
+        res["secret"]["kid"] = paserk_id(sk)
+    res["public"]["paserk"] = public_paserk(pk)
+    res["secret"]["paserk"] = wrap(sk, password, wrapping_key, iteration, memory_cost, time_cost, parallelism)
     return res
 
 
@@ -53,16 +129,132 @@ def generate_local_paserk(
     key_material: Union[str, bytes],
     kid: bool,
     password: str = "",
-    wrapping_key: str = "",
+    wrapping_key: Union[str, bytes] = "",
+    iteration: int = DEFAULT_ITERATION,
+    memory_cost: int = DEFAULT_MEMORY_COST,
+    time_cost: int = DEFAULT_TIME_COST,
+    parallelism: int = DEFAULT_PARALLELISM,
+    entropy: Optional[EntropySource] = None,
 ) -> dict:
     if password and wrapping_key:
         raise ValueError("Only one of password or wrapping_key must be specified.")
     if not key_material:
-        key_material = token_bytes(32)
+        key_material = token_bytes(32) if entropy is None else entropy.read(32)
 
+    _, _, new_key, paserk_id, _, wrap = _phases()
     res: dict = {"secret": {}}
-    sk = Key.new(version, "local", key_material)
+    sk = new_key(version, "local", key_material)
     if kid:
-        res["secret"]["kid"] = sk.to_paserk_id()
-    res["secret"]["paserk"] = sk.to_paserk(password=password, wrapping_key=wrapping_key)
+        res["secret"]["kid"] = paserk_id(sk)
+    res["secret"]["paserk"] = wrap(sk, password, wrapping_key, iteration, memory_cost, time_cost, parallelism)
     return res
+
+
+def _batch_wrapping_key(wrapping_key: Union[str, bytes]) -> bytes:
+    # pyseto encodes a str wrapping key on each wrap, so it is done once per batch here.
+    return wrapping_key.encode("utf-8") if isinstance(wrapping_key, str) else wrapping_key
+
+
+def generate_public_paserks(
+    version: int,
+    count: int,
+    kid: bool = False,
+    password: str = "",
+    wrapping_key: Union[str, bytes] = "",
+    workers: int = 1,
+    **kwargs,
+) -> Iterator[dict]:
+    """
+    Generates ``count`` public PASERKs and yields them in order as they are generated.
+
+    The keys are distributed across ``workers`` processes (``0`` means the
+    number of CPUs). The other arguments are the same as :func:`generate_public_paserk`.
+    """
+    if password and wrapping_key:
+        raise ValueError("Only one of password or wrapping_key must be specified.")
+    return generate_batch(
+        generate_public_paserk,
+        count,
+        workers,
+        version=version,
+        kid=kid,
+        password=password,
+        wrapping_key=_batch_wrapping_key(wrapping_key),
+        **kwargs,
+    )
+
+
+def generate_local_paserks(
+    version: int,
+    count: int,
+    kid: bool = False,
+    password: str = "",
+    wrapping_key: Union[str, bytes] = "",
+    workers: int = 1,
+    **kwargs,
+) -> Iterator[dict]:
+    """
+    Generates ``count`` local PASERKs from random key material and yields them
+    in order as they are generated. See :func:`generate_public_paserks`.
+    """
+    if password and wrapping_key:
+        raise ValueError("Only one of password or wrapping_key must be specified.")
+    return generate_batch(
+        generate_local_paserk,
+        count,
+        workers,
+        version=version,
+        key_material="",
+        kid=kid,
+        password=password,
+        wrapping_key=_batch_wrapping_key(wrapping_key),
+        **kwargs,
+    )
+
+
+def _measure_wrap(version: int, runs: int, **params) -> float:
+    k = Key.new(version, "local", token_bytes(32))
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        k.to_paserk(password="calibration", **params)
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def calibrate_kdf(version: int, target_ms: float, parallelism: int = DEFAULT_PARALLELISM, runs: int = 3) -> dict:
+    """
+    Chooses the cost parameters of password-based key wrapping so that a
+    single wrap takes about ``target_ms`` milliseconds on the current host.
+
+    For v1/v3 (PBKDF2) ``iteration`` is returned. For v2/v4 (Argon2id)
+    ``memory_cost`` (KiB), ``time_cost`` and ``parallelism`` are returned.
+    The parameters are capped at the bounds that pyseto accepts on unwrapping.
+    The measured latency with the chosen parameters is returned as ``latency_ms``.
+    """
+    if target_ms <= 0:
+        raise ValueError("target_ms must be a positive number.")
+    if not 1 <= parallelism <= MAX_PARALLELISM:
+        raise ValueError(f"parallelism must be between 1 and {MAX_PARALLELISM}.")
+    target = target_ms / 1000
+    params: dict
+    if version in [1, 3]:
+        iteration = DEFAULT_ITERATION
+        # Estimate with the default cost first, and then refine the estimate once.
+        for _ in range(2):
+            elapsed = _measure_wrap(version, runs, iteration=iteration)
+            iteration = max(1, min(int(iteration * target / elapsed), MAX_ITERATION))
+        params = {"iteration": iteration}
+    elif version in [2, 4]:
+        # The cost of Argon2 is roughly proportional to memory_cost * time_cost.
+        params = {"memory_cost": DEFAULT_MEMORY_COST, "time_cost": 1, "parallelism": parallelism}
+        for _ in range(2):
+            elapsed = _measure_wrap(version, runs, **params)
+            work = params["memory_cost"] * params["time_cost"] * target / elapsed
+            time_cost = max(1, min(math.ceil(work / MAX_MEMORY_COST), MAX_TIME_COST))
+            memory_cost = max(8 * parallelism, min(int(work / time_cost), MAX_MEMORY_COST))
+            params = {"memory_cost": memory_cost, "time_cost": time_cost, "parallelism": parallelism}
+    else:
+        raise ValueError(f"Invalid version: {version}.")
+    params["latency_ms"] = round(_measure_wrap(version, 1, **params) * 1000, 3)
+    return params
@@ -0,0 +1,280 @@
+import os
+import subprocess
+import sys
+import time
+from secrets import token_bytes, token_hex
+from typing import Any, Optional, Tuple, Union
+
+from cryptography.exceptions import InvalidTag
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec, rsa
+from cryptography.hazmat.primitives.asymmetric.ed448 import Ed448PrivateKey
+from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PrivateKey
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from cryptography.hazmat.primitives.kdf.scrypt import Scrypt
+
+from .batch import generate_batch
+from .utils import write_atomic
+
+_CURVES: dict = {
+    "p-256": ec.SECP256R1,
+    "p-384": ec.SECP384R1,
+    "p-521": ec.SECP521R1,
+    "secp256k1": ec.SECP256K1,
+}
+
+_SUFFIX = ".key"
+_FILL_LOCK = ".filling"
+_FILL_LOCK_EXPIRY = 600
+# Created by take() before spawning a refill and removed by the refill.
+_REFILL_REQUEST = ".refill-requested"
+_SALT_SIZE = 16
+_WATERMARK = "watermark"
+
+
+def key_kind(kty: str, crv: str = "", rsa_key_size: int = 2048) -> str:
+    """
+    Returns the pool kind name for a key type, e.g., ``rsa-2048``, ``p-256`` or ``ed25519``.
+    """
+    kind = f"rsa-{rsa_key_size}" if kty == "RSA" else crv.lower()
+    _validate_kind(kind)
+    return kind
+
+
+def _validate_kind(kind: str):
+    if kind.startswith("rsa-") and kind[4:].isdigit():
+        return
+    if kind in _CURVES or kind in ["ed25519", "ed448"]:
+        return
+    raise ValueError(f"Invalid kind: {kind}.")
+
+
+def generate_private_key(kind: str) -> Any:
+    _validate_kind(kind)
+    if kind.startswith("rsa-"):
+        return rsa.generate_private_key(65537, key_size=int(kind[4:]))
+    if kind in _CURVES:
+        return ec.generate_private_key(_CURVES[kind]())
+    if kind == "ed25519":
+        return Ed25519PrivateKey.generate()
+    return Ed448PrivateKey.generate()
+
+
+def _is_entry(name: str) -> bool:
+    # Temporary and taken files start with a dot.
+    return name.endswith(_SUFFIX) and not name.startswith(".")
+
+
+def acquire_lock(lock: str, expiry: float) -> bool:
+    """
+    Creates ``lock`` exclusively and returns ``False`` if another process holds it.
+
+    A lock file older than ``expiry`` seconds is regarded as left behind by a
+    crashed process and taken over. The caller removes the file to release it.
+    """
+    try:
+        os.close(os.open(lock, os.O_WRONLY | os.O_CREAT | os.O_EXCL))
+        return True
+    except FileExistsError:
+        pass
+    try:
+        if time.time() - os.path.getmtime(lock) < expiry:
+            return False
+        os.remove(lock)
+    except FileNotFoundError:
+        pass
+    return acquire_lock(lock, expiry)
+
+
+def _generate_der(kind: str) -> bytes:
+    return generate_private_key(kind).private_bytes(
+        serialization.Encoding.DER,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption(),
+    )
+
+
+def _restore(path: str, password: bytes, key: bytes) -> "KeyPool":
+    pool = KeyPool.__new__(KeyPool)
+    pool._path = path
+    pool._password = password
+    pool._key = key
+    pool._aead = AESGCM(key)
+    return pool
+
+
+class KeyPool:
+    """
+    An on-disk spool of pre-generated private keys encrypted at rest.
+
+    Each key is stored in its own file as PKCS8 DER sealed with AES-256-GCM under
+    a key derived from ``password`` with scrypt (derived once per instance).
+    Keys are taken by atomically renaming their files, so every pooled key is
+    consumed exactly once even with concurrent takers.
+    """
+
+    def __init__(self, path: str, password: Union[str, bytes]):
+        if not password:
+            raise ValueError("password must be specified.")
+        self._path = path
+        # A password from the environment may carry undecodable bytes as surrogates (see _refill).
+        self._password = password if isinstance(password, bytes) else password.encode("utf-8", "surrogateescape")
+        os.makedirs(path, exist_ok=True)
+        self._key = Scrypt(salt=self._salt(), length=32, n=2**14, r=8, p=1).derive(self._password)
+        self._aead = AESGCM(self._key)
+
+    def __reduce__(self):
+        # Pass the derived key to worker processes instead of re-running scrypt.
+        return (_restore, (self._path, self._password, self._key))
+
+    @property
+    def path(self) -> str:
+        return self._path
+
+    def count(self, kind: str) -> int:
+        try:
+            return sum(1 for name in os.listdir(self._kind_dir(kind)) if _is_entry(name))
+        except FileNotFoundError:
+            return 0
+
+    def put(self, kind: str, der: bytes):
+        d = self._kind_dir(kind)
+        os.makedirs(d, exist_ok=True)
+        token = token_hex(16)
+        nonce = token_bytes(12)
+        tmp = os.path.join(d, f".tmp-{token}")
+        with open(tmp, "wb") as f:
+            f.write(nonce + self._aead.encrypt(nonce, der, kind.encode("ascii")))
+        os.replace(tmp, os.path.join(d, token + _SUFFIX))
+
+    def fill(self, kind: str, size: int, workers: int = 1, low_watermark: Optional[int] = None) -> int:
+        """
+        Tops up the pool of ``kind`` to ``size`` keys and returns the number of keys added.
+
+        If ``low_watermark`` is given, it is recorded so that :meth:`take` triggers
+        a background refill up to ``size`` when the pool runs low. Returns 0 without
+        doing anything when another process is already filling the same kind.
+        """
+        d = self._kind_dir(kind)
+        os.makedirs(d, exist_ok=True)
+        if low_watermark is not None:
+            # Written atomically since take() may read it at any time.
+            write_atomic(os.path.join(d, _WATERMARK), f"{low_watermark} {size}".encode("ascii"), 0o600)
+        lock = os.path.join(d, _FILL_LOCK)
+        locked = acquire_lock(lock, _FILL_LOCK_EXPIRY)
+        # The pool is being filled by this or another process from now on.
+        try:
+            os.remove(os.path.join(d, _REFILL_REQUEST))
+        except FileNotFoundError:
+            pass
+        if not locked:
+            return 0
+        try:
+            n = size - self.count(kind)
+            if n <= 0:
+                return 0
+            for der in generate_batch(_generate_der, n, workers, kind=kind):
+                self.put(kind, der)
+                # Keep the lock fresh so that a long fill is not taken over as a crashed one.
+                os.utime(lock)
+            return n
+        finally:
+            os.remove(lock)
+
+    def pop(self, kind: str) -> Optional[Any]:
+        """
+        Takes a pooled private key of ``kind``, or returns ``None`` if the pool is empty.
+        """
+        d = self._kind_dir(kind)
+        try:
+            names = os.listdir(d)
+        except FileNotFoundError:
+            return None
+        for name in names:
+            if not _is_entry(name):
+                continue
+            src = os.path.join(d, name)
+            dst = os.path.join(d, f".taken-{os.getpid()}-{name}")
+            try:
+                os.rename(src, dst)
+            except (FileNotFoundError, PermissionError):
+                # Already taken by another process.
+                continue
+            with open(dst, "rb") as f:
+                data = f.read()
+            try:
+                der = self._aead.decrypt(data[0:12], data[12:], kind.encode("ascii"))
+            except InvalidTag:
+                os.rename(dst, src)
+                raise ValueError("Failed to decrypt the pooled key (wrong password?).")
+            os.remove(dst)
+            return serialization.load_der_private_key(der, password=None)
+        return None
+
+    def take(self, kind: str) -> Any:
+        """
+        Takes a pooled private key of ``kind``, generating a fresh one if the pool is empty.
+
+        A background refill is started when the number of remaining keys drops
+        below the low watermark recorded by :meth:`fill`.
+        """
+        k = self.pop(kind)
+        watermark = self._watermark(kind)
+        if watermark and self.count(kind) < watermark[0]:
+            self._refill(kind, watermark[1])
+        return k if k is not None else generate_private_key(kind)
+
+    def _kind_dir(self, kind: str) -> str:
+        _validate_kind(kind)
+        return os.path.join(self._path, kind)
+
+    def _salt(self) -> bytes:
+        p = os.path.join(self._path, "salt")
+        if not os.path.exists(p):
+            # Publish a complete salt by a link, which fails if a concurrent creator has won.
+            tmp = os.path.join(self._path, f".tmp-{token_hex(16)}")
+            fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, "O_BINARY", 0), 0o600)
+            with os.fdopen(fd, "wb") as f:
+                f.write(token_bytes(_SALT_SIZE))
+            try:
+                os.link(tmp, p)
+            except FileExistsError:
+                pass
+            finally:
+                os.remove(tmp)
+        with open(p, "rb") as f:
+            salt = f.read()
+        if len(salt) != _SALT_SIZE:
+            raise ValueError(f"The salt of the key pool is broken: {p}.")
+        return salt
+
+    def _watermark(self, kind: str) -> Optional[Tuple[int, int]]:
+        try:
+            with open(os.path.join(self._kind_dir(kind), _WATERMARK)) as f:
+                low, size = f.read().split()
+        except FileNotFoundError:
+            return None
+        return int(low), int(size)
+
+    def _refill(self, kind: str, size: int):
+        d = self._kind_dir(kind)
+        if os.path.exists(os.path.join(d, _FILL_LOCK)):
+            return
+        # Spawn at most one refill until it starts filling, even with many concurrent takers.
+        request = os.path.join(d, _REFILL_REQUEST)
+        if not acquire_lock(request, _FILL_LOCK_EXPIRY):
+            return
+        env = dict(os.environ)
+        env["MKKEY_POOL_PASSWORD"] = self._password.decode("utf-8", "surrogateescape")
+        try:
+            subprocess.Popen(
+                [sys.executable, "-m", "mkkey", "pool", "fill", self._path, "--kind", kind, "--size", str(size)],
+                env=env,
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+                start_new_session=True,
+            )
+        except BaseException:
+            os.remove(request)
+            raise
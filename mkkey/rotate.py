@@ -0,0 +1,122 @@
+import json
+import os
+import time
+from secrets import token_hex
+from typing import List, Optional
+
+from .jwk import JWKPair, KeyFactory, KeySpec
+from .pool import acquire_lock
+from .utils import write_atomic
+
+_ENTRY_DIR = "log"
+_ENTRY_SUFFIX = ".json"
+_STATE = "keys.json"
+_PUBLISHED = "jwks.json"
+_COMPACT_LOCK = ".compacting"
+_COMPACT_LOCK_EXPIRY = 600
+
+
+def _is_entry(name: str) -> bool:
+    # Temporary files start with a dot.
+    return name.endswith(_ENTRY_SUFFIX) and not name.startswith(".")
+
+
+class RotationStore:
+    """
+    A directory holding a rotated key set.
+
+    :meth:`rotate` appends each new key to a log as a file of its own, so that
+    a rotation costs the same regardless of the number of keys and concurrent
+    rotators never interfere. :meth:`compact` folds the log into the key set,
+    retires old keys and publishes the public JWKS (``jwks.json``) by an atomic
+    rename. Only one process compacts at a time.
+
+    The keys are ordered from the newest, so the first key is the current one.
+    """
+
+    def __init__(self, path: str):
+        self._path = path
+        os.makedirs(os.path.join(path, _ENTRY_DIR), exist_ok=True)
+
+    @property
+    def path(self) -> str:
+        return self._path
+
+    @property
+    def published_path(self) -> str:
+        return os.path.join(self._path, _PUBLISHED)
+
+    def rotate(self, spec: KeySpec) -> JWKPair:
+        """
+        Generates a key following ``spec`` and appends it to the log.
+
+        The key is not published until the next :meth:`compact`. The kid must be
+        generated by ``kid_type``, since the keys are told apart by their kids.
+        """
+        if spec.kid:
+            raise ValueError("kid cannot be specified for rotation, use kid_type instead.")
+        if spec.kid_type == "none":
+            raise ValueError("kid_type must be specified for rotation.")
+        pair = KeyFactory(spec).generate()
+        created_at = time.time_ns()
+        entry = {"created_at": created_at // 1_000_000_000, "public": pair.public, "secret": pair.secret}
+        name = f"{created_at:020d}-{token_hex(8)}{_ENTRY_SUFFIX}"
+        write_atomic(os.path.join(self._path, _ENTRY_DIR, name), json.dumps(entry).encode("utf-8"), 0o600)
+        return pair
+
+    def keys(self) -> List[dict]:
+        """
+        Returns the compacted key entries (``created_at``, ``public`` and ``secret``) from the newest.
+        """
+        try:
+            with open(os.path.join(self._path, _STATE), "rb") as f:
+                return json.load(f)["keys"]
+        except FileNotFoundError:
+            return []
+
+    def compact(self, max_keys: int = 0, max_age: int = 0) -> Optional[List[str]]:
+        """
+        Folds the log into the key set, retires keys and publishes the public JWKS.
+
+        Keys beyond the newest ``max_keys`` and keys older than ``max_age`` seconds
+        are retired (0 means no limit), but the newest key is always kept.
+        Returns the kids of the retired keys, or ``None`` without doing anything
+        when another process is already compacting.
+        """
+        if max_keys < 0:
+            raise ValueError("max_keys must be 0 or a positive integer.")
+        if max_age < 0:
+            raise ValueError("max_age must be 0 or a positive integer.")
+        lock = os.path.join(self._path, _COMPACT_LOCK)
+        if not acquire_lock(lock, _COMPACT_LOCK_EXPIRY):
+            return None
+        try:
+            log_dir = os.path.join(self._path, _ENTRY_DIR)
+            names = sorted(name for name in os.listdir(log_dir) if _is_entry(name))
+            keys = self.keys()
+            # An entry may already be in the key set if the last compaction was interrupted.
+            kids = {k["public"]["kid"] for k in keys}
+            for name in names:
+                with open(os.path.join(log_dir, name), "rb") as f:
+                    entry = json.load(f)
+                if entry["public"]["kid"] not in kids:
+                    keys.insert(0, entry)
+                    kids.add(entry["public"]["kid"])
+            # The sort is stable, so the keys created in the same second stay from the newest.
+            keys.sort(key=lambda k: k["created_at"], reverse=True)
+
+            kept = keys[:max_keys] if max_keys else keys
+            if max_age:
+                oldest = int(time.time()) - max_age
+                kept = kept[:1] + [k for k in kept[1:] if k["created_at"] >= oldest]
+            kept_kids = {k["public"]["kid"] for k in kept}
+            retired = [k["public"]["kid"] for k in keys if k["public"]["kid"] not in kept_kids]
+
+            write_atomic(os.path.join(self._path, _STATE), json.dumps({"keys": kept}).encode("utf-8"), 0o600)
+            jwks = {"keys": [k["public"] for k in kept]}
+            write_atomic(self.published_path, json.dumps(jwks, indent=4).encode("utf-8"))
+            for name in names:
+                os.remove(os.path.join(log_dir, name))
+            return retired
+        finally:
+            os.remove(lock)
@@ -0,0 +1,201 @@
+import json
+import os
+import socket
+import socketserver
+import stat
+import sys
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from .jwk import KeyFactory, KeySpec
+from .paserk import generate_local_paserk, generate_public_paserk
+from .timing import profiling_generation
+
+_MAX_BODY_SIZE = 64 * 1024
+
+_JWK_PARAMS = ["kty", "crv", "alg", "use", "key_ops", "kid", "kid_type", "kid_size", "output_format", "rsa_key_size"]
+_PASERK_PUBLIC_PARAMS = ["version", "kid", "password", "wrapping_key", "rsa_key_size"]
+_PASERK_LOCAL_PARAMS = ["version", "key_material", "kid", "password", "wrapping_key"]
+
+
+@lru_cache(maxsize=64)
+def _factory(spec: KeySpec, generation: int) -> KeyFactory:
+    # Keyed on the profiling block, since a factory times itself if built while profiling.
+    return KeyFactory(spec)
+
+
+def _jwk(params: dict) -> dict:
+    spec = KeySpec(**params)
+    return _factory(spec, profiling_generation()).generate().to_dict(spec.output_format)
+
+
+def _paserk_public(params: dict) -> dict:
+    return generate_public_paserk(
+        params.get("version", 4),
+        params.get("kid", False),
+        params.get("password", ""),
+        params.get("wrapping_key", ""),
+        rsa_key_size=params.get("rsa_key_size", 2048),
+    )
+
+
+def _paserk_local(params: dict) -> dict:
+    return generate_local_paserk(
+        params.get("version", 4),
+        params.get("key_material", ""),
+        params.get("kid", False),
+        params.get("password", ""),
+        params.get("wrapping_key", ""),
+    )
+
+
+# path: (operation, allowed parameters)
+_OPERATIONS: Dict[str, Tuple[Callable[[dict], dict], list]] = {
+    "/jwk": (_jwk, _JWK_PARAMS),
+    "/paserk/public": (_paserk_public, _PASERK_PUBLIC_PARAMS),
+    "/paserk/local": (_paserk_local, _PASERK_LOCAL_PARAMS),
+}
+
+
+def _warm_up(_: int) -> int:
+    # Runs once in each worker so that the first request does not pay for the imports.
+    return os.getpid()
+
+
+def execute(path: str, params: dict) -> dict:
+    """
+    Executes an operation of the server (``/jwk``, ``/paserk/public`` or ``/paserk/local``).
+    """
+    if path not in _OPERATIONS:
+        raise LookupError(f"Unknown operation: {path}.")
+    op, allowed = _OPERATIONS[path]
+    unknown = sorted(set(params) - set(allowed))
+    if unknown:
+        raise ValueError(f"Unknown parameters: {', '.join(unknown)}.")
+    return op(params)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server_version = "mkkey"
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        if self.path == "/health":
+            self._respond(200, {"status": "ok"})
+            return
+        self._respond(404, {"error": f"Unknown operation: {self.path}."})
+
+    def do_POST(self):
+        start = time.perf_counter_ns()
+        # The unread body would be parsed as the next request on the keep-alive connection.
+        close_connection, self.close_connection = self.close_connection, True
+        try:
+            length = int(self.headers.get("Content-Length", "0"))
+            if length < 0:
+                raise ValueError("Invalid Content-Length.")
+            if length > _MAX_BODY_SIZE:
+                raise ValueError("Request body is too large.")
+            body = self.rfile.read(length)
+            self.close_connection = close_connection
+            params = json.loads(body or b"{}")
+            if not isinstance(params, dict):
+                raise ValueError("Request body must be a JSON object.")
+            res = self.server.executor.submit(execute, self.path, params).result()  # type: ignore[attr-defined]
+            status = 200
+        except LookupError as err:
+            res, status = {"error": str(err)}, 404
+        except (ValueError, TypeError) as err:
+            res, status = {"error": str(err)}, 400
+        except Exception as err:
+            res, status = {"error": str(err)}, 500
+        self._respond(status, res, time.perf_counter_ns() - start)
+
+    def _respond(self, status: int, res: dict, latency_ns: int = 0):
+        body = json.dumps(res).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        if self.close_connection:
+            self.send_header("Connection", "close")
+        if latency_ns:
+            self.send_header("Server-Timing", f"gen;dur={latency_ns / 1e6:.3f}")
+        self.end_headers()
+        self.wfile.write(body)
+        if latency_ns:
+            self.log_message('"%s %s" %d %.3fms', self.command, self.path, status, latency_ns / 1e6)
+
+    def log_request(self, code: Any = "-", size: Any = "-"):
+        # Requests are logged along with their latency in _respond().
+        pass
+
+    def address_string(self) -> str:
+        # client_address is empty for Unix domain sockets.
+        return self.client_address[0] if self.client_address else "unix"
+
+    def log_message(self, format: str, *args):
+        if self.server.quiet:  # type: ignore[attr-defined]
+            return
+        sys.stderr.write(f"{self.address_string()} - {format % args}\n")
+
+
+class _TCPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+
+if hasattr(socket, "AF_UNIX"):
+
+    class _UnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+        daemon_threads = True
+
+
+def create_server(
+    host: str = "127.0.0.1",
+    port: int = 8765,
+    unix_socket: str = "",
+    workers: int = 0,
+    executor: Optional[Executor] = None,
+    quiet: bool = False,
+) -> socketserver.BaseServer:
+    """
+    Creates a key issuance server listening on ``host:port`` or on ``unix_socket``.
+
+    Requests are handled concurrently, and keys are generated on ``executor``
+    (a pool of ``workers`` processes by default, 0 means the number of CPUs)
+    which is warmed up in advance. Call ``serve_forever()`` on the returned
+    server to start serving and ``server_close()`` to release it.
+    """
+    if unix_socket:
+        if not hasattr(socket, "AF_UNIX"):
+            raise ValueError("Unix domain sockets are not supported on this platform.")
+        if os.path.exists(unix_socket) and not stat.S_ISSOCK(os.stat(unix_socket).st_mode):
+            raise ValueError(f"{unix_socket} exists and is not a socket.")
+    if executor is None:
+        if workers < 0:
+            raise ValueError("workers must be 0 or a positive integer.")
+        n = workers or os.cpu_count() or 1
+        executor = ProcessPoolExecutor(max_workers=n)
+        list(executor.map(_warm_up, range(n)))
+
+    server: Any
+    if unix_socket:
+        # A stale socket left by a previous server.
+        if os.path.exists(unix_socket):
+            os.remove(unix_socket)
+        server = _UnixServer(unix_socket, _Handler)
+    else:
+        server = _TCPServer((host, port), _Handler)
+    server.executor = executor
+    server.quiet = quiet
+    server_close = server.server_close
+
+    def _close():
+        server_close()
+        executor.shutdown(wait=False)
+        if unix_socket and os.path.exists(unix_socket):
+            os.remove(unix_socket)
+
+    server.server_close = _close
+    return server
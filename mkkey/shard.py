@@ -0,0 +1,148 @@
+import hashlib
+import json
+import os
+import urllib.request
+from bisect import bisect_right
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .output import dumps
+from .utils import write_atomic
+
+MANIFEST = "manifest.json"
+MAX_SHARDS = 65536
+
+# The shards partition the range of the first 4 bytes of SHA-256(kid).
+_PREFIX_SIZE = 4
+_PREFIX_RANGE = 1 << (8 * _PREFIX_SIZE)
+_FETCH_TIMEOUT = 10
+
+
+def _kid_prefix(kid: str) -> int:
+    return int.from_bytes(hashlib.sha256(kid.encode("utf-8")).digest()[:_PREFIX_SIZE], "big")
+
+
+def _starts(shards: int) -> List[int]:
+    # The smallest prefix of each shard (ceil(i * range / shards)).
+    return [-(-i * _PREFIX_RANGE // shards) for i in range(shards)]
+
+
+def shard_jwks(jwks_path: str, out_dir: str, shards: int) -> Tuple[dict, int]:
+    """
+    Splits the JWKS file into ``shards`` JWKS files by the prefix of the
+    SHA-256 hash of the kid and writes them into ``out_dir`` along with a
+    manifest (``manifest.json``) which maps the prefixes to the shard files.
+    Returns the manifest and the number of keys skipped for having no kid.
+
+    The shard files are named after the hash of their content, so that they
+    can be cached forever and an unchanged shard keeps its name (and is not
+    rewritten) when the JWKS is sharded again. The manifest is replaced last,
+    so that readers never see a manifest referring to missing shards. The
+    shard files no longer referenced are left for the readers which still
+    hold the previous manifest.
+    """
+    if not 1 <= shards <= MAX_SHARDS:
+        raise ValueError(f"shards must be between 1 and {MAX_SHARDS}.")
+    with open(jwks_path, "rb") as f:
+        jwks = json.load(f)
+    if not isinstance(jwks, dict) or not isinstance(jwks.get("keys"), list):
+        raise ValueError("Invalid JWKS.")
+
+    starts = _starts(shards)
+    buckets: List[List[dict]] = [[] for _ in range(shards)]
+    skipped = 0
+    for jwk in jwks["keys"]:
+        if not isinstance(jwk, dict) or not isinstance(jwk.get("kid"), str):
+            skipped += 1
+            continue
+        buckets[bisect_right(starts, _kid_prefix(jwk["kid"])) - 1].append(jwk)
+
+    os.makedirs(out_dir, exist_ok=True)
+    entries = []
+    for start, keys in zip(starts, buckets):
+        data = dumps({"keys": keys}).encode("utf-8")
+        digest = hashlib.sha256(data).hexdigest()
+        name = f"shard-{digest[:16]}.json"
+        if not os.path.exists(os.path.join(out_dir, name)):
+            write_atomic(os.path.join(out_dir, name), data)
+        entries.append({"prefix": f"{start:08x}", "path": name, "keys": len(keys), "sha256": digest})
+    manifest = {"hash": "sha256", "keys": sum(len(keys) for keys in buckets), "shards": entries}
+    write_atomic(os.path.join(out_dir, MANIFEST), dumps(manifest).encode("utf-8"))
+    return manifest, skipped
+
+
+def _file_fetcher(base: str) -> Callable[[str], bytes]:
+    def fetch(name: str) -> bytes:
+        with open(os.path.join(base, name), "rb") as f:
+            return f.read()
+
+    return fetch
+
+
+def _url_fetcher(base: str) -> Callable[[str], bytes]:
+    base = base if base.endswith("/") else base + "/"
+
+    def fetch(name: str) -> bytes:
+        with urllib.request.urlopen(base + name, timeout=_FETCH_TIMEOUT) as res:
+            return res.read()
+
+    return fetch
+
+
+class ShardedJWKS:
+    """
+    Looks up JWKs by kid in a JWKS sharded by :func:`shard_jwks`.
+
+    Only the manifest and the shard which holds the requested kid are
+    fetched and parsed. ``fetch`` reads a file (the manifest or a shard) by
+    the name relative to the sharded JWKS. The fetched shards are verified
+    against the hashes in the manifest and cached.
+    """
+
+    def __init__(self, fetch: Callable[[str], bytes]):
+        self._fetch = fetch
+        try:
+            manifest = json.loads(fetch(MANIFEST))
+            self._shards: List[dict] = manifest["shards"]
+            self._starts = [int(s["prefix"], 16) for s in self._shards]
+        except (KeyError, TypeError, ValueError):
+            raise ValueError("Invalid JWKS manifest.")
+        if manifest.get("hash") != "sha256" or not self._starts or self._starts[0] != 0 or self._starts != sorted(self._starts):
+            raise ValueError("Invalid JWKS manifest.")
+        self._cache: Dict[str, Dict[str, dict]] = {}
+
+    @classmethod
+    def open(cls, location: str) -> "ShardedJWKS":
+        """
+        Opens the sharded JWKS in a directory or at an HTTP(S) URL.
+        """
+        if location.startswith(("http://", "https://")):
+            return cls(_url_fetcher(location))
+        return cls(_file_fetcher(location))
+
+    def __len__(self) -> int:
+        return sum(s["keys"] for s in self._shards)
+
+    def _shard(self, kid: str) -> dict:
+        return self._shards[bisect_right(self._starts, _kid_prefix(kid)) - 1]
+
+    def shard_of(self, kid: str) -> str:
+        """
+        Returns the name of the shard file which would hold ``kid``.
+        """
+        return self._shard(kid)["path"]
+
+    def get(self, kid: str) -> Optional[dict]:
+        """
+        Returns the JWK of ``kid``, or ``None`` if it is not in the JWKS.
+        """
+        shard = self._shard(kid)
+        keys = self._cache.get(shard["path"])
+        if keys is None:
+            data = self._fetch(shard["path"])
+            if hashlib.sha256(data).hexdigest() != shard["sha256"]:
+                raise ValueError(f"The shard does not match the manifest: {shard['path']}.")
+            keys = {}
+            for jwk in json.loads(data)["keys"]:
+                keys.setdefault(jwk["kid"], jwk)
+            self._cache[shard["path"]] = keys
+        return keys.get(kid)
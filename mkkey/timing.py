@@ -0,0 +1,81 @@
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional
+
+# phase: [count, total_ns] while profiling, or None
+_stats: Optional[Dict[str, List[int]]] = None
+# Changes whenever a profiling block is entered or exited.
+_generation = 0
+
+
+def profiling_enabled() -> bool:
+    return _stats is not None
+
+
+def profiling_generation() -> int:
+    """
+    Returns a number which changes whenever a :func:`profiling` block is
+    entered or exited. Key the caches of objects holding :func:`timed`
+    callables on it, so that a cached object is never used across blocks.
+    """
+    return _generation
+
+
+def timed(phase: str, func: Callable) -> Callable:
+    """
+    Returns ``func`` wrapped to record its call count and elapsed time under
+    ``phase`` if profiling is enabled, or ``func`` itself otherwise.
+
+    Wrap callables once where they are set up (e.g., in a factory) rather
+    than on each call, so that the disabled case costs nothing. The wrapped
+    callables belong to the current block (see :func:`profiling_generation`).
+    """
+    stats = _stats
+    if stats is None:
+        return func
+
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter_ns()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            elapsed = time.perf_counter_ns() - start
+            rec = stats.setdefault(phase, [0, 0])
+            rec[0] += 1
+            rec[1] += elapsed
+
+    return wrapper
+
+
+def _report(stats: Dict[str, List[int]], wall_ns: int) -> dict:
+    phases = {}
+    for phase, (count, total_ns) in sorted(stats.items(), key=lambda x: -x[1][1]):
+        phases[phase] = {"count": count, "total_ns": total_ns, "mean_ns": total_ns // count}
+    return {"wall_ns": wall_ns, "phases": phases}
+
+
+@contextmanager
+def profiling(callback: Optional[Callable[[dict], None]] = None) -> Iterator[Dict[str, List[int]]]:
+    """
+    Enables profiling of the key generation phases within the block and
+    passes the report to ``callback`` on exit.
+
+    The report consists of ``wall_ns`` (of the block) and ``phases``, which
+    maps each phase (e.g., ``jwk.keygen``, ``paserk.wrap`` and ``cli.json``)
+    to its ``count``, ``total_ns`` and ``mean_ns``, the slowest first.
+    Only the phases run in the current process are recorded.
+    """
+    global _stats, _generation
+    prev = _stats
+    stats: Dict[str, List[int]] = {}
+    _stats = stats
+    _generation += 1
+    start = time.perf_counter_ns()
+    try:
+        yield stats
+    finally:
+        wall_ns = time.perf_counter_ns() - start
+        _stats = prev
+        _generation += 1
+        if callback is not None:
+            callback(_report(stats, wall_ns))
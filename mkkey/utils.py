@@ -1,17 +1,25 @@
 import base64
+import os
+from secrets import token_hex
+
+# AlgorithmIdentifier of rsaEncryption (with NULL parameters).
+_RSA_ALGORITHM_IDENTIFIER = bytes.fromhex("300d06092a864886f70d0101010500")
 
 
 def _bytes_from_int(val: int) -> bytes:
-    remaining = val
-    byte_length = 0
-    while remaining != 0:
-        remaining >>= 8
-        byte_length += 1
-    return val.to_bytes(byte_length, "big", signed=False)
+    return val.to_bytes((val.bit_length() + 7) // 8, "big", signed=False)
 
 
 def base64url_encode(val: bytes) -> str:
-    return base64.urlsafe_b64encode(val).replace(b"=", b"").decode()
+    return base64.urlsafe_b64encode(val).rstrip(b"=").decode("ascii")
+
+
+def base64url_decode(val: str) -> bytes:
+    return base64.urlsafe_b64decode(val + "=" * (-len(val) % 4))
+
+
+def from_base64url_uint(val: str) -> int:
+    return int.from_bytes(base64url_decode(val), "big")
 
 
 def to_base64url_uint(val: int) -> str:
@@ -21,3 +29,40 @@ def to_base64url_uint(val: int) -> str:
     if len(int_bytes) == 0:
         int_bytes = b"\x00"
     return base64url_encode(int_bytes)
+
+
+def _der(tag: int, content: bytes) -> bytes:
+    n = len(content)
+    if n < 0x80:
+        return bytes([tag, n]) + content
+    length = _bytes_from_int(n)
+    return bytes([tag, 0x80 | len(length)]) + length + content
+
+
+def _der_uint(val_bytes: bytes) -> bytes:
+    # A DER INTEGER is signed, so a leading zero is needed when the MSB is set.
+    if not val_bytes or val_bytes[0] & 0x80:
+        val_bytes = b"\x00" + val_bytes
+    return _der(0x02, val_bytes)
+
+
+def rsa_spki(n: bytes, e: bytes) -> bytes:
+    """
+    Returns the DER-encoded SubjectPublicKeyInfo of an RSA public key from
+    the big-endian bytes of its modulus and exponent.
+    """
+    public_key = _der(0x30, _der_uint(n) + _der_uint(e))
+    return _der(0x30, _RSA_ALGORITHM_IDENTIFIER + _der(0x03, b"\x00" + public_key))
+
+
+def write_atomic(path: str, data: bytes, mode: int = 0o644):
+    """
+    Writes ``data`` to ``path`` by an atomic rename, so that readers see either the old or the new content.
+    """
+    tmp = os.path.join(os.path.dirname(path), f".tmp-{token_hex(16)}")
+    fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, "O_BINARY", 0), mode)
+    with os.fdopen(fd, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
@@ -0,0 +1,232 @@
+import json
+from itertools import chain
+from typing import Any, BinaryIO, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec, rsa
+from cryptography.hazmat.primitives.asymmetric.ed448 import Ed448PublicKey
+from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PublicKey
+
+from .batch import map_batch
+from .convert import cached_factory, iter_sources, load_jwk, spec_for_key
+from .fingerprint import thumbprint_input
+from .jwk import EC_CURVES, KID_TYPES, MEMBER_NAMES
+from .utils import base64url_decode, from_base64url_uint
+
+DEFAULT_MIN_RSA_KEY_SIZE = 2048
+
+_OKP_PUBLIC_KEYS: dict = {
+    "Ed25519": Ed25519PublicKey,
+    "Ed448": Ed448PublicKey,
+}
+
+
+def _public_key(jwk: dict) -> Any:
+    kty = jwk.get("kty", "")
+    if kty == "RSA":
+        return rsa.RSAPublicNumbers(from_base64url_uint(jwk["e"]), from_base64url_uint(jwk["n"])).public_key()
+    if kty == "EC":
+        if jwk.get("crv") not in EC_CURVES:
+            raise ValueError(f"Invalid crv for EC: {jwk.get('crv')}.")
+        # Fails if the point is not on the curve.
+        return ec.EllipticCurvePublicNumbers(
+            from_base64url_uint(jwk["x"]), from_base64url_uint(jwk["y"]), EC_CURVES[jwk["crv"]][0]()
+        ).public_key()
+    if kty == "OKP":
+        if jwk.get("crv") not in _OKP_PUBLIC_KEYS:
+            raise ValueError(f"Invalid crv for OKP: {jwk.get('crv')}.")
+        return _OKP_PUBLIC_KEYS[jwk["crv"]].from_public_bytes(base64url_decode(jwk["x"]))
+    raise ValueError(f"Invalid kty: {kty}.")
+
+
+def _verify_rsa_crt(jwk: dict) -> List[str]:
+    n, p, q, d = (
+        from_base64url_uint(jwk["n"]),
+        from_base64url_uint(jwk["p"]),
+        from_base64url_uint(jwk["q"]),
+        from_base64url_uint(jwk["d"]),
+    )
+    if p < 2 or q < 2 or n != p * q:
+        return ["n does not match p and q."]
+    errors = []
+    for m, v in (("dp", d % (p - 1)), ("dq", d % (q - 1)), ("qi", pow(q, -1, p))):
+        if from_base64url_uint(jwk[m]) != v:
+            errors.append(f"{m} does not match the private key.")
+    return errors
+
+
+def _verify_kid(jwk: dict, public_key: Any, kid_type: str) -> List[str]:
+    if "kid" not in jwk:
+        return ["kid is missing."]
+    if kid_type == "sha256":
+        src = public_key.public_bytes(serialization.Encoding.DER, serialization.PublicFormat.SubjectPublicKeyInfo)
+    else:
+        src = thumbprint_input(jwk)
+    digest = KID_TYPES[kid_type](src).digest()
+    try:
+        kid = base64url_decode(jwk["kid"])
+    except Exception:
+        kid = b""
+    # The kid may be truncated with kid_size.
+    if not kid or digest[: len(kid)] != kid:
+        return [f"kid does not match kid_type {kid_type}."]
+    return []
+
+
+def verify_jwk(
+    jwk: dict,
+    public: Optional[dict] = None,
+    kid_type: str = "",
+    min_rsa_key_size: int = DEFAULT_MIN_RSA_KEY_SIZE,
+) -> List[str]:
+    """
+    Verifies a JWK and returns the problems found (an empty list if none).
+
+    A secret JWK must be consistent with its private key (the RSA CRT
+    members, the EC point and the OKP public key derived from ``d``) and,
+    if ``public`` is given, with its public half. RSA keys must not be
+    shorter than ``min_rsa_key_size`` bits. If ``kid_type`` is given, the
+    kid must be computed by the method (possibly truncated).
+    """
+    if kid_type and kid_type not in KID_TYPES:
+        raise ValueError(f"Invalid kid_type: {kid_type}.")
+    if not isinstance(jwk, dict):
+        return ["A JWK must be a JSON object."]
+    errors: List[str] = []
+    try:
+        if "d" in jwk:
+            if jwk.get("kty") == "RSA":
+                errors = _verify_rsa_crt(jwk)
+                if errors:
+                    return errors
+            k = load_jwk(jwk)
+            public_key = k.public_key()
+            expected = cached_factory(spec_for_key(k, "", False, "none", 0)).serialize(k).secret
+            names = MEMBER_NAMES[jwk["kty"]]
+            for m in chain(*names):
+                if jwk.get(m) != expected[m]:
+                    errors.append(f"{m} does not match the private key.")
+        else:
+            public_key = _public_key(jwk)
+    except KeyError as err:
+        return [f"Missing member for {jwk.get('kty')}: {err.args[0]}."]
+    except Exception as err:
+        return [f"Invalid key: {err}"]
+
+    if jwk["kty"] == "RSA" and public_key.key_size < min_rsa_key_size:
+        errors.append(f"RSA key size {public_key.key_size} is less than {min_rsa_key_size}.")
+    if public is not None:
+        for m, v in public.items():
+            if m != "key_ops" and jwk.get(m) != v:
+                errors.append(f"{m} of the public JWK does not match.")
+        for m in MEMBER_NAMES[jwk["kty"]][1]:
+            if m in public:
+                errors.append(f"The public JWK contains a private member: {m}.")
+    if kid_type:
+        errors.extend(_verify_kid(jwk, public_key, kid_type))
+    return errors
+
+
+def _entries(obj: Any) -> Iterator[Tuple[dict, Optional[dict]]]:
+    # A JWK, a JWKS, or a result of mkkey ({"public": {"jwk"|"jwks": ...}, "secret": {...}}).
+    if not isinstance(obj, dict):
+        raise ValueError("A JWK, JWKS or a pair of them is expected.")
+    if "secret" in obj and "public" in obj:
+        secret, public = obj["secret"], obj["public"]
+        if "jwks" in secret:
+            yield from zip(secret["jwks"]["keys"], public["jwks"]["keys"])
+        else:
+            yield secret["jwk"], public["jwk"]
+    elif "keys" in obj:
+        for jwk in obj["keys"]:
+            yield jwk, None
+    elif "kty" in obj:
+        yield obj, None
+    else:
+        raise ValueError("A JWK, JWKS or a pair of them is expected.")
+
+
+def _iter_objects(lines: Iterable[bytes]) -> Iterator[Any]:
+    # NDJSON is parsed line by line. Otherwise, the whole document is parsed.
+    it = iter(lines)
+    head: List[bytes] = []
+    for line in it:
+        head.append(line)
+        if line.strip():
+            break
+    try:
+        first = json.loads(b"".join(head))
+    except ValueError:
+        yield json.loads(b"".join(chain(head, it)))
+        return
+    yield first
+    for line in it:
+        if line.strip():
+            yield json.loads(line)
+
+
+def _read_entries(name: str, data: bytes) -> Iterator[Tuple[dict, Optional[dict]]]:
+    if data:
+        for obj in _iter_objects(data.splitlines(keepends=True)):
+            yield from _entries(obj)
+        return
+    with open(name, "rb") as f:
+        for obj in _iter_objects(f):
+            yield from _entries(obj)
+
+
+def _iter_chunks(sources: Iterable[str], stdin: BinaryIO, chunksize: int) -> Iterator[Tuple[str, int, list, str]]:
+    for name, data in iter_sources(sources, stdin):
+        index = 0
+        chunk: list = []
+        try:
+            for entry in _read_entries(name, data):
+                chunk.append(entry)
+                if len(chunk) == chunksize:
+                    yield name, index, chunk, ""
+                    index += len(chunk)
+                    chunk = []
+            error = ""
+        except Exception as err:
+            error = str(err)
+        if chunk:
+            yield name, index, chunk, ""
+        if error:
+            yield name, index + len(chunk), [], error
+
+
+def _verify_records(chunk: Tuple[str, int, list, str], kid_type: str, min_rsa_key_size: int) -> List[dict]:
+    name, index, entries, error = chunk
+    if error:
+        return [{"source": name, "error": error}]
+    res = []
+    for i, (jwk, public) in enumerate(entries, index):
+        errors = verify_jwk(jwk, public, kid_type, min_rsa_key_size)
+        kid = jwk.get("kid", "") if isinstance(jwk, dict) else ""
+        res.append({"source": name, "index": i, "kid": kid, "errors": errors})
+    return res
+
+
+def verify_all(
+    sources: Sequence[str],
+    stdin: BinaryIO,
+    kid_type: str = "",
+    min_rsa_key_size: int = DEFAULT_MIN_RSA_KEY_SIZE,
+    workers: int = 1,
+    chunksize: int = 256,
+) -> Iterator[dict]:
+    """
+    Verifies all the JWKs in JWK, JWKS and NDJSON (e.g., the output of
+    ``mkkey jwk -o ndjson``) files, directories, glob patterns and ``-``
+    (``stdin``) with :func:`verify_jwk`, distributing chunks of ``chunksize``
+    keys across ``workers`` processes.
+
+    Yields a record per key in order with the source, the index of the key
+    in the source, the kid and the ``errors``, or a record with ``error`` if
+    a source cannot be read.
+    """
+    if kid_type and kid_type not in KID_TYPES:
+        raise ValueError(f"Invalid kid_type: {kid_type}.")
+    chunks = _iter_chunks(sources, stdin, chunksize)
+    for records in map_batch(_verify_records, chunks, workers, 1, kid_type=kid_type, min_rsa_key_size=min_rsa_key_size):
+        yield from records
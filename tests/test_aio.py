@@ -0,0 +1,94 @@
+import asyncio
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import pytest
+
+from mkkey.aio import (
+    AsyncKeyGenerator,
+    agenerate_jwk,
+    agenerate_local_paserk,
+    agenerate_public_paserk,
+)
+
+
+def test_agenerate_jwk():
+    res = asyncio.run(agenerate_jwk("EC", crv="P-256", kid_type="sha256"))
+    assert "kid" in res["public"]["jwk"]
+    assert "d" in res["secret"]["jwk"]
+
+
+def test_agenerate_jwk_with_process_pool():
+    async def main():
+        with ProcessPoolExecutor(max_workers=2) as executor:
+            return await asyncio.gather(*[agenerate_jwk("RSA", alg="RS256", executor=executor) for _ in range(2)])
+
+    res = asyncio.run(main())
+    assert len({r["secret"]["jwk"]["d"] for r in res}) == 2
+
+
+def test_agenerate_paserk():
+    async def main():
+        return await asyncio.gather(
+            agenerate_public_paserk(4, True, "", ""),
+            agenerate_local_paserk(4, "", True, wrapping_key="mysecret"),
+        )
+
+    public, local = asyncio.run(main())
+    assert public["public"]["paserk"].startswith("k4.public.")
+    assert local["secret"]["paserk"].startswith("k4.local-wrap.pie.")
+
+
+def test_agenerate_jwk_with_invalid_arg():
+    with pytest.raises(ValueError) as err:
+        asyncio.run(agenerate_jwk("EC", crv="P-256", alg="ES384"))
+        pytest.fail("agenerate_jwk() must fail.")
+    assert "alg must be ES256." in str(err.value)
+
+
+def test_agenerate_jwk_with_timeout():
+    async def main():
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            # Occupy the only worker so that the generation cannot start in time.
+            blocker = asyncio.get_running_loop().run_in_executor(executor, time.sleep, 0.5)
+            with pytest.raises(asyncio.TimeoutError):
+                await agenerate_jwk("EC", crv="P-256", executor=executor, timeout=0.01)
+            await blocker
+
+    asyncio.run(main())
+
+
+def test_async_key_generator_bounds_concurrency():
+    async def main():
+        gen = AsyncKeyGenerator(max_concurrency=2, timeout=30)
+        res = await asyncio.gather(
+            *[gen.generate_jwk("OKP", crv="Ed25519") for _ in range(8)],
+            gen.generate_public_paserk(2, False, "", ""),
+            gen.generate_local_paserk(2, "", False),
+        )
+        assert gen._get_limiter()._value == 2
+        return res
+
+    res = asyncio.run(main())
+    assert len(res) == 10
+
+
+def test_async_key_generator_cancel():
+    async def main():
+        gen = AsyncKeyGenerator(max_concurrency=1)
+        task = asyncio.ensure_future(gen.generate_jwk("RSA", alg="RS256", rsa_key_size=4096))
+        await asyncio.sleep(0)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        # The limiter must be released after the cancellation.
+        return await gen.generate_jwk("OKP", crv="Ed25519")
+
+    assert "d" in asyncio.run(main())["secret"]["jwk"]
+
+
+def test_async_key_generator_with_invalid_arg():
+    with pytest.raises(ValueError) as err:
+        AsyncKeyGenerator(max_concurrency=-1)
+        pytest.fail("AsyncKeyGenerator() must fail.")
+    assert "max_concurrency must be 0 or a positive integer." in str(err.value)
@@ -0,0 +1,55 @@
+import pytest
+
+from mkkey.batch import generate_batch, merge_jwks
+from mkkey.jwk import generate_jwk
+
+
+@pytest.mark.parametrize(
+    "kty, crv, count, workers",
+    [
+        ("EC", "P-256", 1, 1),
+        ("EC", "P-256", 3, 1),
+        ("OKP", "Ed25519", 3, 1),
+        ("OKP", "Ed25519", 4, 2),
+        ("RSA", "", 2, 2),
+        ("EC", "P-384", 2, 0),
+    ],
+)
+def test_generate_batch(kty, crv, count, workers):
+    res = list(generate_batch(generate_jwk, count, workers, kty=kty, crv=crv))
+    assert len(res) == count
+    assert len({r["secret"]["jwk"]["d"] for r in res}) == count
+    for r in res:
+        assert r["public"]["jwk"]["kty"] == kty
+
+
+@pytest.mark.parametrize(
+    "count, workers, msg",
+    [
+        (0, 1, "count must be a positive integer."),
+        (-1, 1, "count must be a positive integer."),
+        (1, -1, "workers must be 0 or a positive integer."),
+    ],
+)
+def test_generate_batch_with_invalid_arg(count, workers, msg):
+    with pytest.raises(ValueError) as err:
+        list(generate_batch(generate_jwk, count, workers, kty="EC", crv="P-256"))
+        pytest.fail("generate_batch() must fail.")
+    assert msg in str(err.value)
+
+
+def test_generate_batch_propagates_error():
+    with pytest.raises(ValueError) as err:
+        list(generate_batch(generate_jwk, 2, 2, kty="EC", crv="P-256", alg="ES384"))
+        pytest.fail("generate_batch() must fail.")
+    assert "alg must be ES256." in str(err.value)
+
+
+@pytest.mark.parametrize("output_format", ["json", "jwks"])
+def test_merge_jwks(output_format):
+    results = [generate_jwk("OKP", "Ed25519", output_format=output_format) for _ in range(3)]
+    res = merge_jwks(results)
+    assert len(res["public"]["jwks"]["keys"]) == 3
+    assert len(res["secret"]["jwks"]["keys"]) == 3
+    assert "d" not in res["public"]["jwks"]["keys"][0]
+    assert "d" in res["secret"]["jwks"]["keys"][0]
@@ -0,0 +1,79 @@
+import contextlib
+
+import pytest
+
+from benchmarks.cases import all_cases
+from benchmarks.runner import Case, _percentile, compare, measure, run
+
+
+@pytest.mark.parametrize(
+    "samples, p, expected",
+    [
+        ([1], 50, 1),
+        ([1, 2, 3, 4], 50, 2),
+        (list(range(1, 101)), 90, 90),
+        (list(range(1, 101)), 99, 99),
+        (list(range(100, 0, -1)), 100, 100),
+    ],
+)
+def test_percentile(samples, p, expected):
+    assert _percentile(samples, p) == expected
+
+
+def test_measure():
+    res = measure(Case("noop", lambda: bytearray(1024), 10))
+    assert res["iterations"] == 10
+    assert res["keys_per_sec"] > 0
+    assert res["p50_ns"] <= res["p90_ns"] <= res["p99_ns"]
+    assert res["peak_memory_bytes"] >= 1024
+
+
+def test_measure_with_setup():
+    calls = []
+
+    @contextlib.contextmanager
+    def setup():
+        calls.append("enter")
+        yield bytearray(1024)
+        calls.append("exit")
+
+    res = measure(Case("copy", bytes, 10, setup), warmup=2)
+    assert res["iterations"] == 10
+    assert calls == ["enter", "exit"]
+
+
+def test_run():
+    cases = [c for c in all_cases() if c.name in ["jwk.okp-Ed25519", "paserk.v4.local"]]
+    assert len(cases) == 2
+    res = run(cases, scale=0.01)
+    assert "cryptography" in res["environment"]
+    assert set(res["results"].keys()) == {"jwk.okp-Ed25519", "paserk.v4.local"}
+
+
+def test_all_cases_have_unique_names():
+    names = [c.name for c in all_cases()]
+    assert len(names) == len(set(names))
+
+
+@pytest.mark.parametrize(
+    "cur, expected",
+    [
+        ({"p50_ns": 100, "peak_memory_bytes": 100}, []),
+        ({"p50_ns": 110, "peak_memory_bytes": 100}, []),
+        ({"p50_ns": 50, "peak_memory_bytes": 50}, []),
+        ({"p50_ns": 120, "peak_memory_bytes": 100}, ["p50_ns"]),
+        ({"p50_ns": 120, "peak_memory_bytes": 200}, ["p50_ns", "peak_memory_bytes"]),
+    ],
+)
+def test_compare(cur, expected):
+    baseline = {"results": {"a": {"p50_ns": 100, "peak_memory_bytes": 100}}}
+    current = {"results": {"a": cur, "b": {"p50_ns": 1, "peak_memory_bytes": 1}}}
+    res = compare(baseline, current, 0.1)
+    assert [r["metric"] for r in res] == expected
+
+
+def test_run_with_setup():
+    cases = [c for c in all_cases() if c.name in ["jwk.serialize.ec-P-256", "cli.show-result.compact.ec-P-256"]]
+    assert len(cases) == 2
+    res = run(cases, scale=0.01)
+    assert set(res["results"].keys()) == {"jwk.serialize.ec-P-256", "cli.show-result.compact.ec-P-256"}
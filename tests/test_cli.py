@@ -1,9 +1,23 @@
 import json
+import os
+import subprocess
+import sys
 
+import click
 import pytest
 from click.testing import CliRunner
 
-from mkkey.cli import _display_instruction, cli, jwk, paserk
+from mkkey.cli import (
+    _display_instruction,
+    cli,
+    convert,
+    jwk,
+    jwks,
+    paserk,
+    pool,
+    rotate,
+    verify,
+)
 
 runner = CliRunner()
 
@@ -30,6 +44,57 @@ def test_cli_install():
         assert "bash completion installed in" in res.output
 
 
+@pytest.mark.parametrize(
+    "shell",
+    ["bash", "zsh", "fish"],
+)
+def test_cli_completion(shell):
+    res = runner.invoke(cli, ["completion", shell])
+    assert res.exit_code == 0
+    assert "mkkey paserk v4" in res.output
+    assert "_MKKEY_COMPLETE" not in res.output
+
+
+@pytest.mark.parametrize(
+    "args, env",
+    [
+        (["--profile", "jwk", "ec", "--kid-type", "sha256"], {}),
+        (["jwk", "ec", "--kid-type", "sha256"], {"MKKEY_PROFILE": "1"}),
+    ],
+)
+def test_cli_profile(args, env):
+    res = runner.invoke(cli, args, env=env)
+    assert res.exit_code == 0
+    line = [x for x in res.output.splitlines() if x.startswith('{"profile"')][0]
+    phases = json.loads(line)["profile"]["phases"]
+    assert sorted(phases) == ["cli.echo", "cli.json", "jwk.keygen", "jwk.kid", "jwk.members"]
+
+
+def test_cli_without_profile():
+    res = runner.invoke(cli, ["jwk", "ec"])
+    assert res.exit_code == 0
+    assert '"profile"' not in res.output
+
+
+@pytest.mark.parametrize(
+    "args, env, compact",
+    [
+        (["jwk", "ec"], {}, True),
+        (["--compact", "jwk", "ec"], {}, True),
+        (["--pretty", "jwk", "ec"], {}, False),
+        (["jwk", "ec"], {"MKKEY_COMPACT": "0"}, False),
+        (["paserk", "v4", "local"], {}, True),
+    ],
+)
+def test_cli_compact(args, env, compact):
+    # The output of CliRunner is not a terminal.
+    res = runner.invoke(cli, args, env=env, color=True)
+    assert res.exit_code == 0
+    assert ("\x1b[" not in res.output) is compact
+    assert (len(res.output.splitlines()) == 1) is compact
+    assert "secret" in json.loads(click.unstyle(res.output))
+
+
 def test_cli_help():
     res = runner.invoke(cli, ["--help"])
     assert res.exit_code == 0
@@ -42,6 +107,46 @@ def test_cli_version():
     assert "cli, version" in res.output
 
 
+_HEAVY_MODULES = ["cryptography", "pyseto", "mkkey.jwk", "mkkey.paserk", "mkkey.pool", "shellingham"]
+
+
+@pytest.mark.parametrize(
+    "args",
+    [
+        [],
+        ["--help"],
+        ["jwk", "--help"],
+        ["paserk", "v4", "--help"],
+    ],
+)
+def test_cli_does_not_import_heavy_modules(args):
+    code = (
+        "import sys\n"
+        "from mkkey.cli import cli\n"
+        "if sys.argv[1:]:\n"
+        "    try:\n"
+        "        cli(sys.argv[1:], standalone_mode=False)\n"
+        "    except Exception:\n"
+        "        pass\n"
+        f"print([m for m in {_HEAVY_MODULES!r} if m in sys.modules])\n"
+    )
+    res = subprocess.run([sys.executable, "-c", code, *args], capture_output=True, text=True, check=True)
+    assert res.stdout.splitlines()[-1] == "[]"
+
+
+def test_cli_completion_does_not_import_heavy_modules():
+    code = (
+        "import atexit, sys\n"
+        f"atexit.register(lambda: sys.stderr.write(str([m for m in {_HEAVY_MODULES!r} if m in sys.modules])))\n"
+        "from mkkey.cli import cli\n"
+        "cli(prog_name='mkkey')\n"
+    )
+    env = dict(os.environ, _MKKEY_COMPLETE="bash_complete", COMP_WORDS="mkkey jwk ec --crv ", COMP_CWORD="4")
+    res = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, env=env)
+    assert "P-256" in res.stdout
+    assert res.stderr == "[]"
+
+
 @pytest.mark.parametrize(
     "args",
     [
@@ -69,6 +174,66 @@ def test_jwk(args):
     assert "public" in k
 
 
+@pytest.mark.parametrize(
+    "args, count",
+    [
+        (["ec", "--count", "3"], 3),
+        (["okp", "--count", "3", "--workers", "2"], 3),
+        (["rsa", "--count", "2", "--workers", "2"], 2),
+    ],
+)
+def test_jwk_with_count(args, count):
+    res = runner.invoke(jwk, args)
+    assert res.exit_code == 0
+    k = json.loads(res.output)
+    assert isinstance(k, list)
+    assert len(k) == count
+    for r in k:
+        assert "secret" in r
+        assert "public" in r
+
+
+@pytest.mark.parametrize(
+    "args, count",
+    [
+        (["ec", "-o", "jwks", "--count", "3"], 3),
+        (["okp", "-o", "jwks", "--count", "3", "--workers", "0"], 3),
+    ],
+)
+def test_jwk_jwks_with_count(args, count):
+    res = runner.invoke(jwk, args)
+    assert res.exit_code == 0
+    k = json.loads(res.output)
+    assert len(k["public"]["jwks"]["keys"]) == count
+    assert len(k["secret"]["jwks"]["keys"]) == count
+
+
+@pytest.mark.parametrize(
+    "args, count",
+    [
+        (["ec", "-o", "ndjson"], 1),
+        (["ec", "-o", "ndjson", "--count", "3"], 3),
+        (["okp", "-o", "ndjson", "--count", "5", "--workers", "2"], 5),
+    ],
+)
+def test_jwk_ndjson(args, count):
+    res = runner.invoke(jwk, args)
+    assert res.exit_code == 0
+    lines = res.output.splitlines()
+    assert len(lines) == count
+    for line in lines:
+        k = json.loads(line)
+        assert "jwk" in k["public"]
+        assert "jwk" in k["secret"]
+
+
+def test_jwk_rsa_key_size():
+    res = runner.invoke(jwk, ["rsa", "--key-size", "3072"])
+    assert res.exit_code == 0
+    k = json.loads(res.output)
+    assert len(k["public"]["jwk"]["n"]) == 512
+
+
 @pytest.mark.parametrize(
     "args",
     [
@@ -104,6 +269,10 @@ def test_jwk(args):
         ["v2", "local", "--wrapping-key", "mysecret"],
         ["v3", "local", "--wrapping-key", "mysecret"],
         ["v4", "local", "--wrapping-key", "mysecret"],
+        ["v1", "public", "--password", "mysecret", "--iteration", "1000"],
+        ["v3", "local", "--password", "mysecret", "--iteration", "1000"],
+        ["v2", "local", "--password", "mysecret", "--memory-cost", "64", "--time-cost", "1", "--parallelism", "2"],
+        ["v4", "public", "--password", "mysecret", "--memory-cost", "64", "--time-cost", "1", "--parallelism", "2"],
     ],
 )
 def test_paserk(args):
@@ -115,6 +284,22 @@ def test_paserk(args):
         assert "public" in k
 
 
+@pytest.mark.parametrize(
+    "args, option",
+    [
+        (["v4", "local", "--password", "mysecret", "--time-cost", "5"], "--time-cost"),
+        (["v2", "public", "--password", "mysecret", "--memory-cost", str(256 * 1024 + 1)], "--memory-cost"),
+        (["v4", "public", "--password", "mysecret", "--parallelism", "5"], "--parallelism"),
+        (["v1", "local", "--password", "mysecret", "--iteration", "1000001"], "--iteration"),
+        (["calibrate", "v4", "--parallelism", "5"], "--parallelism"),
+    ],
+)
+def test_paserk_with_kdf_params_out_of_range(args, option):
+    res = runner.invoke(paserk, args)
+    assert res.exit_code == 2
+    assert f"Invalid value for '{option}'" in res.output
+
+
 @pytest.mark.parametrize(
     "args, msg",
     [
@@ -131,6 +316,8 @@ def test_jwk_with_invalid_args(args, msg):
     "args, msg",
     [
         (["rsa", "--alg", "RSxxx"], "Usage: jwk rsa [OPTIONS]"),
+        (["ec", "--count", "0"], "Usage: jwk ec [OPTIONS]"),
+        (["ec", "--workers", "-1"], "Usage: jwk ec [OPTIONS]"),
     ],
 )
 def test_jwk_with_invalid_args_handled_by_click(args, msg):
@@ -153,3 +340,312 @@ def test_paserk_with_invalid_args(args, msg):
     res = runner.invoke(paserk, args)
     assert res.exit_code == 0
     assert msg in res.output
+
+
+def test_pool(tmp_path, monkeypatch):
+    monkeypatch.setenv("MKKEY_POOL_PASSWORD", "mysecret")
+    res = runner.invoke(pool, ["fill", str(tmp_path), "--kind", "p-256", "--size", "2"])
+    assert res.exit_code == 0
+    assert json.loads(res.output) == {"kind": "p-256", "added": 2, "count": 2}
+    res = runner.invoke(pool, ["take", str(tmp_path), "--kind", "p-256"])
+    assert res.exit_code == 0
+    assert "BEGIN PRIVATE KEY" in json.loads(res.output)["secret"]["pem"]
+    res = runner.invoke(jwk, ["ec", "--pool", str(tmp_path)])
+    assert res.exit_code == 0
+    assert "secret" in json.loads(res.output)
+    res = runner.invoke(paserk, ["v3", "public", "--pool", str(tmp_path)])
+    assert res.exit_code == 0
+    assert "secret" in json.loads(res.output)
+
+
+def test_jwk_with_pool_without_password(tmp_path, monkeypatch):
+    monkeypatch.delenv("MKKEY_POOL_PASSWORD", raising=False)
+    res = runner.invoke(jwk, ["ec", "--pool", str(tmp_path)])
+    assert res.exit_code == 0
+    assert "Failed to make key: MKKEY_POOL_PASSWORD must be set to use a key pool." in res.output
+
+
+@pytest.mark.parametrize("kty", ["rsa", "ec", "okp"])
+def test_jwk_with_kid_and_count(kty):
+    res = runner.invoke(jwk, [kty, "--kid", "fixed", "--count", "3", "-o", "jwks"])
+    assert res.exit_code == 2
+    assert "--kid cannot be used with --count > 1, use --kid-type instead." in res.output
+    res = runner.invoke(jwk, [kty, "--kid", "fixed", "--count", "1", "-o", "jwks"])
+    assert res.exit_code == 0
+
+
+def test_jwk_with_derive(monkeypatch):
+    monkeypatch.setenv("MKKEY_MASTER_SECRET", "0123456789abcdef0123456789abcdef")
+    res = runner.invoke(jwk, ["ec", "--derive", "tenant/sig/1"])
+    assert res.exit_code == 0
+    assert res.output == runner.invoke(jwk, ["ec", "--derive", "tenant/sig/1"]).output
+    res = runner.invoke(jwk, ["okp", "--derive", "tenant/sig", "--count", "3", "-o", "ndjson"])
+    assert res.exit_code == 0
+    lines = res.output.splitlines()
+    assert len(set(lines)) == 3
+    res = runner.invoke(jwk, ["okp", "--derive", "tenant/sig/1", "-o", "ndjson"])
+    assert res.output.splitlines() == [lines[1]]
+    # The first key does not depend on the count.
+    res = runner.invoke(jwk, ["okp", "--derive", "tenant/sig", "--count", "1", "-o", "ndjson"])
+    assert res.output.splitlines() == [lines[0]]
+    res = runner.invoke(jwk, ["okp", "--derive", "tenant/sig/0", "-o", "ndjson"])
+    assert res.output.splitlines() == [lines[0]]
+
+
+@pytest.mark.parametrize(
+    "args, msg",
+    [
+        (["ec", "--derive", "a"], "Failed to make key: MKKEY_MASTER_SECRET must be set to derive keys."),
+        (["ec", "--derive", "a", "--pool", "x"], "Failed to make key: --derive cannot be used with --pool."),
+    ],
+)
+def test_jwk_with_derive_and_invalid_args(monkeypatch, args, msg):
+    monkeypatch.delenv("MKKEY_MASTER_SECRET", raising=False)
+    if "--pool" in args:
+        monkeypatch.setenv("MKKEY_MASTER_SECRET", "0123456789abcdef0123456789abcdef")
+    res = runner.invoke(jwk, args)
+    assert res.exit_code == 0
+    assert msg in res.output
+
+
+@pytest.mark.parametrize(
+    "args, keys",
+    [
+        (["rsa", "--emit", "jwk,pem"], ["jwk", "pem"]),
+        (["ec", "--crv", "P-384", "--emit", "der,paserk"], ["der", "paserk"]),
+        (["okp", "--emit", "paserk,jwk,der,pem"], ["paserk", "jwk", "der", "pem"]),
+    ],
+)
+def test_jwk_with_emit(args, keys):
+    res = runner.invoke(jwk, args)
+    assert res.exit_code == 0
+    out = json.loads(res.output)
+    assert list(out["public"].keys()) == keys
+    assert list(out["secret"].keys()) == keys
+
+
+@pytest.mark.parametrize(
+    "args, msg",
+    [
+        (["ec", "--emit", "pem", "-o", "jwks"], "Failed to make key: --emit cannot be used with -o jwks."),
+        (["ec", "--emit", "pem,xxx"], "Failed to make key: Invalid emit format: xxx."),
+        (["ec", "--emit", "paserk"], "Failed to make key: PASERK is not available for P-256 keys."),
+    ],
+)
+def test_jwk_with_emit_and_invalid_args(args, msg):
+    res = runner.invoke(jwk, args)
+    assert res.exit_code == 0
+    assert msg in res.output
+
+
+@pytest.mark.parametrize(
+    "args, names",
+    [
+        (["ec", "--count", "3", "--kid-type", "sha256"], ["public", "secret"]),
+        (["okp", "--count", "3", "-o", "jwks"], ["jwks.json", "secret-jwks.json"]),
+        (["rsa", "--kid", "xxx"], ["public", "secret"]),
+    ],
+)
+def test_jwk_with_out_dir(tmp_path, args, names):
+    res = runner.invoke(jwk, args + ["--out-dir", str(tmp_path / "keys")])
+    assert res.exit_code == 0
+    count = 1 if args[0] == "rsa" else 3
+    assert json.loads(res.output) == {"out_dir": str(tmp_path / "keys"), "keys": count}
+    assert sorted(os.listdir(tmp_path / "keys")) == names
+    if names[0] == "public":
+        assert len(os.listdir(tmp_path / "keys" / "secret")) == count
+    res = runner.invoke(jwk, ["ec", "--emit", "pem", "--out-dir", str(tmp_path / "keys")])
+    assert "Failed to make key: --emit cannot be used with --out-dir." in res.output
+
+
+def test_convert(tmp_path):
+    res = runner.invoke(jwk, ["ec", "--emit", "pem"])
+    (tmp_path / "a.pem").write_text(json.loads(res.output)["secret"]["pem"])
+    (tmp_path / "b.pem").write_text("xxx")
+    res = runner.invoke(convert, [str(tmp_path), "--emit", "jwk,pem"])
+    assert res.exit_code == 1
+    lines = [json.loads(line) for line in res.output.splitlines()]
+    assert lines[0]["source"] == str(tmp_path / "a.pem")
+    assert lines[0]["public"]["jwk"]["crv"] == "P-256"
+    assert lines[0]["secret"]["pem"] == (tmp_path / "a.pem").read_text()
+    assert lines[1] == {"source": str(tmp_path / "b.pem"), "error": "Unsupported key format."}
+    res = runner.invoke(convert, [str(tmp_path / "a.*"), "-o", "jwks", "--secret"])
+    assert res.exit_code == 0
+    assert json.loads(res.output) == {"keys": [lines[0]["secret"]["jwk"]]}
+    res = runner.invoke(convert, [str(tmp_path / "a.*"), "--alg", "ES256", "--use", "sig"])
+    assert res.exit_code == 0
+    assert json.loads(res.output)["public"]["jwk"]["use"] == "sig"
+    res = runner.invoke(convert, [str(tmp_path / "b.*"), "-o", "jwks"])
+    assert res.exit_code == 1
+    assert f"Failed to convert {tmp_path / 'b.pem'}: Unsupported key format." in res.output
+
+
+@pytest.mark.parametrize(
+    "args, msg",
+    [
+        (["-", "--emit", "xxx"], "Failed to make key: Invalid emit format: xxx."),
+        (["-", "--emit", "pem", "-o", "jwks"], "Failed to make key: --emit cannot be used with -o jwks."),
+    ],
+)
+def test_convert_with_invalid_args(args, msg):
+    res = runner.invoke(convert, args)
+    assert res.exit_code == 0
+    assert msg in res.output
+
+
+def test_verify(tmp_path):
+    res = runner.invoke(jwk, ["ec", "--kid-type", "thumbprint-sha256", "--count", "2", "-o", "ndjson"])
+    (tmp_path / "a.ndjson").write_text(res.output)
+    res = runner.invoke(verify, [str(tmp_path / "a.ndjson"), "--kid-type", "thumbprint-sha256"])
+    assert res.exit_code == 0
+    assert json.loads(res.output) == {"keys": 2, "valid": 2, "invalid": []}
+    res = runner.invoke(jwk, ["rsa", "--key-size", "1024", "-o", "jwks"])
+    (tmp_path / "b.json").write_text(res.output)
+    res = runner.invoke(verify, [str(tmp_path)])
+    assert res.exit_code == 1
+    assert json.loads(res.output) == {
+        "keys": 3,
+        "valid": 2,
+        "invalid": [
+            {"source": str(tmp_path / "b.json"), "index": 0, "kid": "", "errors": ["RSA key size 1024 is less than 2048."]}
+        ],
+    }
+    res = runner.invoke(verify, [str(tmp_path), "--min-rsa-key-size", "1024", "-o", "ndjson", "--workers", "2"])
+    assert res.exit_code == 0
+    lines = [json.loads(line) for line in res.output.splitlines()]
+    assert [(line["index"], line["errors"]) for line in lines] == [(0, []), (1, []), (0, [])]
+
+
+def test_verify_with_invalid_source(tmp_path):
+    (tmp_path / "a.json").write_text("{}")
+    res = runner.invoke(verify, [str(tmp_path / "a.json")])
+    assert res.exit_code == 1
+    assert json.loads(res.output)["invalid"] == [
+        {"source": str(tmp_path / "a.json"), "error": "A JWK, JWKS or a pair of them is expected."}
+    ]
+
+
+def test_jwks_index(tmp_path):
+    res = runner.invoke(jwk, ["ec", "--kid-type", "sha256", "--count", "3", "-o", "jwks"])
+    keys = json.loads(res.output)["public"]["jwks"]["keys"]
+    path = tmp_path / "jwks.json"
+    path.write_text(json.dumps({"keys": keys}))
+    res = runner.invoke(jwks, ["index", str(path)])
+    assert res.exit_code == 0
+    assert json.loads(res.output) == {"index": f"{path}.idx", "keys": 3, "skipped": 0}
+    res = runner.invoke(jwks, ["get", str(path), "--", keys[1]["kid"]])
+    assert res.exit_code == 0
+    assert json.loads(res.output) == {"jwk": keys[1]}
+    res = runner.invoke(jwks, ["get", str(path), "xxx"])
+    assert res.exit_code == 0
+    assert "Failed to make key: kid not found: xxx." in res.output
+
+
+def test_jwks_shard(tmp_path):
+    res = runner.invoke(jwk, ["okp", "--kid-type", "sha256", "--count", "20", "-o", "jwks"])
+    keys = json.loads(res.output)["public"]["jwks"]["keys"]
+    path = tmp_path / "jwks.json"
+    path.write_text(json.dumps({"keys": keys}))
+    out = tmp_path / "shards"
+    res = runner.invoke(jwks, ["shard", str(path), str(out), "--shards", "4"])
+    assert res.exit_code == 0
+    assert json.loads(res.output) == {"manifest": str(out / "manifest.json"), "shards": 4, "keys": 20, "skipped": 0}
+    res = runner.invoke(jwks, ["get", str(out), "--", keys[3]["kid"]])
+    assert res.exit_code == 0
+    assert json.loads(res.output) == {"jwk": keys[3]}
+    res = runner.invoke(jwks, ["get", str(out), "xxx"])
+    assert "Failed to make key: kid not found: xxx." in res.output
+    res = runner.invoke(jwks, ["shard", str(tmp_path / "xxx.json"), str(out)])
+    assert "Failed to make key: " in res.output
+
+
+def test_jwk_thumbprint(tmp_path):
+    res = runner.invoke(jwk, ["okp", "--kid-type", "thumbprint-sha256", "-o", "jwks"])
+    (tmp_path / "jwks.json").write_text(json.dumps(json.loads(res.output)["public"]["jwks"]))
+    kid = json.loads(res.output)["public"]["jwks"]["keys"][0]["kid"]
+    res = runner.invoke(jwk, ["thumbprint", str(tmp_path / "jwks.json"), "--digest", "sha256,sha384"])
+    assert res.exit_code == 0
+    out = json.loads(res.output)
+    assert out["kid"] == kid
+    assert out["thumbprints"]["sha256"] == kid
+    assert len(out["thumbprints"]["sha384"]) == 64
+    res = runner.invoke(jwk, ["thumbprint", str(tmp_path / "jwks.json"), str(tmp_path / "missing.json")])
+    assert res.exit_code == 1
+    assert json.loads(res.output.splitlines()[1])["source"] == str(tmp_path / "missing.json")
+    res = runner.invoke(jwk, ["thumbprint", "-", "--digest", "md5"])
+    assert res.exit_code == 0
+    assert "Failed to make key: Invalid digest: md5." in res.output
+
+
+def test_rotate(tmp_path):
+    res = runner.invoke(rotate, ["add", str(tmp_path), "--kty", "OKP", "--compact-store"])
+    assert res.exit_code == 0
+    first = json.loads(res.output)
+    assert first["public"]["jwk"]["crv"] == "Ed25519"
+    assert first["retired"] == []
+    res = runner.invoke(cli, ["--compact", "rotate", "add", str(tmp_path), "--kty", "OKP", "--no-compact-store"])
+    assert res.exit_code == 0
+    assert "retired" not in json.loads(res.output)
+    res = runner.invoke(rotate, ["compact", str(tmp_path), "--max-keys", "1"])
+    assert res.exit_code == 0
+    assert json.loads(res.output)["retired"] == [first["public"]["jwk"]["kid"]]
+    res = runner.invoke(rotate, ["show", str(tmp_path)])
+    assert res.exit_code == 0
+    assert len(json.loads(res.output)["secret"]["jwks"]["keys"]) == 1
+    with open(tmp_path / "jwks.json") as f:
+        assert json.load(f) == json.loads(res.output)["public"]["jwks"]
+
+
+def test_paserk_v4_local_with_wrapping_key():
+    res = runner.invoke(paserk, ["v4", "local", "--wrapping-key", "mysecret"])
+    assert res.exit_code == 0
+    assert json.loads(res.output)["secret"]["paserk"].startswith("k4.local-wrap.pie.")
+
+
+@pytest.mark.parametrize(
+    "args, prefix",
+    [
+        (["v4", "local", "--count", "3", "--wrapping-key", "mysecret", "-o", "ndjson"], "k4.local-wrap.pie."),
+        (["v3", "local", "--count", "3", "--kid", "-o", "ndjson"], "k3.local."),
+        (["v2", "public", "--count", "3", "-o", "ndjson"], "k2.secret."),
+        (["v1", "public", "--count", "3", "--wrapping-key", "mysecret", "-o", "ndjson"], "k1.secret-wrap.pie."),
+    ],
+)
+def test_paserk_with_count(args, prefix):
+    res = runner.invoke(paserk, args)
+    assert res.exit_code == 0
+    lines = res.output.splitlines()
+    assert len(lines) == 3
+    paserks = [json.loads(line)["secret"]["paserk"] for line in lines]
+    assert all(p.startswith(prefix) for p in paserks)
+    assert len(set(paserks)) == 3
+
+
+def test_paserk_with_count_in_json():
+    res = runner.invoke(paserk, ["v4", "local", "--count", "2", "--kid"])
+    assert res.exit_code == 0
+    res = json.loads(res.output)
+    assert len(res) == 2
+    assert res[0]["secret"]["kid"] != res[1]["secret"]["kid"]
+    res = runner.invoke(paserk, ["v4", "local", "-o", "ndjson"])
+    assert res.exit_code == 0
+    assert json.loads(res.output)["secret"]["paserk"].startswith("k4.local.")
+
+
+def test_paserk_with_count_and_key_material():
+    res = runner.invoke(paserk, ["v4", "local", "xxx", "--count", "2"])
+    assert res.exit_code == 0
+    assert "Failed to make key: key_material cannot be used with --count." in res.output
+
+
+@pytest.mark.parametrize(
+    "args, keys",
+    [
+        (["calibrate", "v1", "--target-ms", "5"], ["iteration", "latency_ms"]),
+        (["calibrate", "v4", "--target-ms", "5"], ["memory_cost", "time_cost", "parallelism", "latency_ms"]),
+    ],
+)
+def test_paserk_calibrate(args, keys):
+    res = runner.invoke(paserk, args)
+    assert res.exit_code == 0
+    assert sorted(json.loads(res.output).keys()) == sorted(keys)
@@ -1,6 +1,7 @@
 import pytest
 
-from mkkey.completion import InstallCompletionError, _get_path
+from mkkey.cli import cli
+from mkkey.completion import InstallCompletionError, _get_path, install, render
 
 # def test_install():
 #     shell, path = install()
@@ -32,3 +33,45 @@ def test__get_path_with_invalid_arg(shell, msg):
         _get_path(shell)
         pytest.fail("_get_path() must fail.")
     assert msg in str(err.value)
+
+
+@pytest.mark.parametrize(
+    "shell",
+    ["bash", "zsh", "fish"],
+)
+def test_render(shell):
+    res = render(shell, cli)
+    assert "_MKKEY_COMPLETE" not in res
+    assert "mkkey jwk ec" in res
+    assert "P-256 P-384 P-521 secp256k1" in res
+    assert "ES256 ES384 ES512 ES256K" in res
+    assert "thumbprint-sha256" in res
+
+
+def test_render_bash():
+    res = render("bash", cli)
+    assert "complete -o default -F _mkkey_completion mkkey" in res
+    assert 'COMPREPLY=($(compgen -W "local public" -- "$cur"))' in res
+    assert render("zsh", cli).endswith(res)
+
+
+def test_render_fish():
+    res = render("fish", cli)
+    assert "complete -c mkkey -x -n 'test (__mkkey_path) = \"mkkey jwk ec\"' -l crv -a 'P-256 P-384 P-521 secp256k1'" in res
+    assert "complete -c mkkey -n 'test (__mkkey_path) = \"mkkey jwk ec\"' -l no-key-ops" in res
+
+
+def test_render_with_invalid_shell():
+    with pytest.raises(InstallCompletionError) as err:
+        render("xxsh", cli)
+        pytest.fail("render() must fail.")
+    assert "Unsupported shell: xxsh." in str(err.value)
+
+
+def test_install_fish_without_completions_dir(tmp_path, monkeypatch):
+    monkeypatch.setenv("HOME", str(tmp_path))
+    monkeypatch.setenv("USERPROFILE", str(tmp_path))
+    monkeypatch.setattr("shellingham.detect_shell", lambda: ("fish", "/usr/bin/fish"))
+    shell, path = install(cli)
+    assert (shell, path) == ("fish", "~/.config/fish/completions/mkkey.fish")
+    assert (tmp_path / ".config" / "fish" / "completions" / "mkkey.fish").read_text() == render("fish", cli)
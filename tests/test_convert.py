@@ -0,0 +1,126 @@
+import base64
+import io
+import json
+
+import pytest
+from cryptography.hazmat.primitives import serialization
+
+from mkkey.batch import map_batch
+from mkkey.convert import convert, convert_keys, iter_sources, load_private_keys
+from mkkey.export import generate_key
+
+
+def _square(x: int, offset: int = 0) -> int:
+    return x * x + offset
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_map_batch(workers):
+    assert list(map_batch(_square, iter(range(50)), workers, chunksize=3, offset=1)) == [x * x + 1 for x in range(50)]
+
+
+@pytest.mark.parametrize(
+    "kty, crv, alg",
+    [
+        ("RSA", "", "RS256"),
+        ("EC", "P-256", ""),
+        ("EC", "P-521", ""),
+        ("EC", "secp256k1", ""),
+        ("OKP", "Ed25519", ""),
+        ("OKP", "Ed448", ""),
+    ],
+)
+def test_convert_keys_roundtrip(kty, crv, alg):
+    res = generate_key(kty, crv, alg, kid_type="sha256", emit=["jwk", "pem", "der"])
+    sources = [
+        ("a.pem", res["secret"]["pem"].encode("ascii")),
+        ("a.der", base64.b64decode(res["secret"]["der"])),
+        ("a.json", json.dumps(res["secret"]["jwk"]).encode("utf-8")),
+        ("a.jwks", json.dumps({"keys": [res["secret"]["jwk"]]}).encode("utf-8")),
+    ]
+    for source in sources:
+        records = convert_keys(source, ["jwk", "pem"], alg=alg, kid_type="sha256")
+        assert records == [
+            {
+                "source": source[0],
+                "public": {"jwk": res["public"]["jwk"], "pem": res["public"]["pem"]},
+                "secret": {"jwk": res["secret"]["jwk"], "pem": res["secret"]["pem"]},
+            }
+        ]
+
+
+def test_load_private_keys_with_pem_bundle():
+    pems = [generate_key("EC", "P-256", emit=["pem"])["secret"]["pem"] for _ in range(3)]
+    keys = load_private_keys("".join(pems).encode("ascii"))
+    assert [
+        k.private_bytes(serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()).decode(
+            "ascii"
+        )
+        for k in keys
+    ] == pems
+
+
+def test_load_private_keys_with_der_ending_with_whitespace():
+    # About 2% of DER keys end with a byte which bytes.strip() removes.
+    for _ in range(10000):
+        der = base64.b64decode(generate_key("EC", "P-256", emit=["der"])["secret"]["der"])
+        if der[-1:].isspace():
+            break
+    assert der[-1:].isspace()
+    k = load_private_keys(der)[0]
+    assert k.private_bytes(serialization.Encoding.DER, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()) == der
+
+
+@pytest.mark.parametrize(
+    "data, msg",
+    [
+        (b"xxx", "Unsupported key format."),
+        (b'{"kty": "EC", "crv": "P-256", "x": "", "y": ""}', "The JWK does not contain a private key."),
+        (b'{"kty": "xxx", "d": ""}', "Invalid kty: xxx."),
+        (b'{"kty": "EC", "crv": "xxx", "d": ""}', "Invalid crv for EC: xxx."),
+        (b'{"kty": "OKP", "crv": "xxx", "d": ""}', "Invalid crv for OKP: xxx."),
+        (b'{"kty": "RSA", "n": "", "e": "", "d": ""}', "Missing member for RSA: p."),
+    ],
+)
+def test_convert_keys_with_invalid_data(data, msg):
+    assert convert_keys(("x", data)) == [{"source": "x", "error": msg}]
+
+
+def test_convert_keys_keeps_jwk_members():
+    res = generate_key("RSA", alg="PS256", use="sig", kid="mykid", emit=["jwk", "pem"])
+    jwk = convert_keys(("a.json", json.dumps(res["secret"]["jwk"]).encode("utf-8")), kid_type="sha256")[0]
+    assert jwk["secret"]["jwk"] == res["secret"]["jwk"]
+    assert (jwk["public"]["jwk"]["kid"], jwk["public"]["jwk"]["alg"], jwk["public"]["jwk"]["use"]) == ("mykid", "PS256", "sig")
+    # PEM and DER have no members to keep.
+    pem = convert_keys(("a.pem", res["secret"]["pem"].encode("ascii")))[0]["public"]["jwk"]
+    assert "alg" not in pem and "use" not in pem and "kid" not in pem
+    pem = convert_keys(("a.pem", res["secret"]["pem"].encode("ascii")), alg="RS512", use="enc")[0]["public"]["jwk"]
+    assert (pem["alg"], pem["use"]) == ("RS512", "enc")
+
+
+def test_iter_sources(tmp_path):
+    (tmp_path / "sub").mkdir()
+    for p in ["b.pem", "a.pem", "sub/c.der"]:
+        (tmp_path / p).write_bytes(b"x")
+    assert list(iter_sources([str(tmp_path)], io.BytesIO())) == [
+        (str(tmp_path / "a.pem"), b""),
+        (str(tmp_path / "b.pem"), b""),
+        (str(tmp_path / "sub" / "c.der"), b""),
+    ]
+    assert list(iter_sources([str(tmp_path / "*.pem")], io.BytesIO())) == [
+        (str(tmp_path / "a.pem"), b""),
+        (str(tmp_path / "b.pem"), b""),
+    ]
+    assert list(iter_sources([str(tmp_path / "x.pem")], io.BytesIO())) == [(str(tmp_path / "x.pem"), b"")]
+
+
+def test_convert_from_stdin():
+    pems = [generate_key("OKP", "Ed25519", emit=["pem"])["secret"]["pem"] for _ in range(3)]
+    stdin = io.BytesIO("".join(pems).encode("ascii"))
+    records = list(convert(["-"], stdin, 2, emit=["pem"]))
+    assert [r["source"] for r in records] == ["<stdin>#0", "<stdin>#1", "<stdin>#2"]
+    assert [r["secret"]["pem"] for r in records] == pems
+
+    jwk = generate_key("OKP", "Ed25519")["secret"]["jwk"]
+    records = list(convert(["-"], io.BytesIO(json.dumps({"keys": [jwk, jwk]}).encode("utf-8"))))
+    assert [r["secret"]["jwk"] for r in records] == [jwk, jwk]
@@ -0,0 +1,88 @@
+import pytest
+from cryptography.hazmat.primitives.asymmetric import ec
+from jwt import PyJWK
+
+from mkkey.derive import derive_jwk, derive_jwks, derive_private_key, derive_seed
+from mkkey.jwk import KeySpec
+
+MASTER = "0123456789abcdef0123456789abcdef"
+
+
+@pytest.mark.parametrize(
+    "kty, crv",
+    [
+        ("EC", "P-256"),
+        ("EC", "P-384"),
+        ("EC", "P-521"),
+        ("EC", "secp256k1"),
+        ("OKP", "Ed25519"),
+        ("OKP", "Ed448"),
+    ],
+)
+def test_derive_jwk(kty, crv):
+    res = derive_jwk(MASTER, "tenant/sig/1", kty, crv, kid_type="sha256")
+    assert res == derive_jwk(MASTER, "tenant/sig/1", kty, crv, kid_type="sha256")
+    assert res != derive_jwk(MASTER, "tenant/sig/2", kty, crv, kid_type="sha256")
+    assert res != derive_jwk(MASTER + "x", "tenant/sig/1", kty, crv, kid_type="sha256")
+    if crv not in ["secp256k1", "Ed448"]:
+        PyJWK.from_dict(res["secret"]["jwk"])
+
+
+def test_derive_seed_is_hierarchical():
+    assert derive_seed(derive_seed(MASTER, "tenant"), "sig/1") == derive_seed(MASTER, "tenant/sig/1")
+    assert derive_seed(MASTER, "") == MASTER.encode("utf-8")
+    assert derive_seed(MASTER, "tenant") != derive_seed(MASTER, "tenant2")
+
+
+def test_derive_private_key_with_ec_curves():
+    k = derive_private_key(derive_seed(MASTER, "a"), "P-256")
+    assert isinstance(k, ec.EllipticCurvePrivateKey)
+    assert k.private_numbers() == derive_private_key(derive_seed(MASTER, "a"), "P-256").private_numbers()
+
+
+def test_derive_jwks():
+    spec = KeySpec("OKP", "Ed25519", kid_type="sha256")
+    pairs = list(derive_jwks(spec, MASTER, "tenant/sig", 2, 3))
+    assert len(pairs) == 3
+    for i, pair in enumerate(pairs):
+        res = derive_jwk(MASTER, f"tenant/sig/{i + 2}", "OKP", "Ed25519", kid_type="sha256")
+        assert pair.to_dict() == res
+
+
+@pytest.mark.parametrize(
+    "master, path, msg",
+    [
+        ("short", "a", "master must be at least 16 bytes."),
+        (MASTER, "a//b", "Invalid path: a//b."),
+        (MASTER, "/a", "Invalid path: /a."),
+    ],
+)
+def test_derive_seed_with_invalid_arg(master, path, msg):
+    with pytest.raises(ValueError) as err:
+        derive_seed(master, path)
+        pytest.fail("derive_seed() must fail.")
+    assert msg in str(err.value)
+
+
+@pytest.mark.parametrize(
+    "kwargs, msg",
+    [
+        ({"spec": KeySpec("RSA", alg="RS256")}, "Invalid kty for derivation: RSA."),
+        ({"start": -1}, "start must be 0 or a positive integer."),
+        ({"count": 0}, "count must be a positive integer."),
+    ],
+)
+def test_derive_jwks_with_invalid_arg(kwargs, msg):
+    params: dict = {"spec": KeySpec("EC", "P-256"), "master": MASTER, "path": "a"}
+    params.update(kwargs)
+    with pytest.raises(ValueError) as err:
+        derive_jwks(**params)
+        pytest.fail("derive_jwks() must fail.")
+    assert msg in str(err.value)
+
+
+def test_derive_jwk_with_invalid_kty():
+    with pytest.raises(ValueError) as err:
+        derive_jwk(MASTER, "a", "RSA", "", alg="RS256")
+        pytest.fail("derive_jwk() must fail.")
+    assert "Invalid kty for derivation: RSA." in str(err.value)
@@ -0,0 +1,84 @@
+import os
+
+import pytest
+
+from mkkey.entropy import BufferedEntropy, DeterministicEntropy
+from mkkey.jwk import generate_jwk
+from mkkey.paserk import generate_local_paserk, generate_public_paserk
+
+
+@pytest.mark.parametrize(
+    "n",
+    [0, 1, 32, 57, 64, 4096, 5000],
+)
+def test_buffered_entropy_read(n):
+    src = BufferedEntropy()
+    res = src.read(n)
+    assert isinstance(res, bytes)
+    assert len(res) == n
+
+
+def test_buffered_entropy_read_does_not_repeat():
+    src = BufferedEntropy(block_size=64)
+    chunks = [src.read(32) for _ in range(100)]
+    assert len(set(chunks)) == 100
+
+
+def test_buffered_entropy_wipes_consumed_bytes():
+    src = BufferedEntropy(block_size=64)
+    res = src.read(32)
+    assert src._buf[:32] == bytes(32)
+    assert res != bytes(32)
+
+
+def test_buffered_entropy_reseeds_after_fork():
+    src = BufferedEntropy()
+    src.read(32)
+    buf = bytes(src._buf)
+    # Pretend to be a forked child.
+    src._pid = os.getpid() + 1
+    src.read(32)
+    assert src._pid == os.getpid()
+    assert bytes(src._buf)[32:] != buf[32:]
+
+
+@pytest.mark.parametrize(
+    "block_size, n, msg",
+    [
+        (63, 0, "block_size must be at least 64."),
+        (64, -1, "n must be 0 or a positive integer."),
+    ],
+)
+def test_buffered_entropy_with_invalid_arg(block_size, n, msg):
+    with pytest.raises(ValueError) as err:
+        BufferedEntropy(block_size).read(n)
+        pytest.fail("BufferedEntropy() must fail.")
+    assert msg in str(err.value)
+
+
+def test_deterministic_entropy():
+    a = DeterministicEntropy(b"seed")
+    b = DeterministicEntropy(b"seed")
+    assert a.read(10) + a.read(50) == b.read(60)
+    assert DeterministicEntropy(b"seed2").read(60) != DeterministicEntropy(b"seed").read(60)
+
+
+@pytest.mark.parametrize(
+    "crv",
+    ["Ed25519", "Ed448"],
+)
+def test_generate_jwk_okp_with_entropy(crv):
+    a = generate_jwk("OKP", crv, entropy=DeterministicEntropy(b"seed"))
+    b = generate_jwk("OKP", crv, entropy=DeterministicEntropy(b"seed"))
+    assert a == b
+    assert a != generate_jwk("OKP", crv)
+    assert generate_jwk("OKP", crv, entropy=BufferedEntropy()) != generate_jwk("OKP", crv, entropy=BufferedEntropy())
+
+
+def test_generate_paserk_with_entropy():
+    a = generate_local_paserk(4, "", False, entropy=DeterministicEntropy(b"seed"))
+    b = generate_local_paserk(4, "", False, entropy=DeterministicEntropy(b"seed"))
+    assert a == b
+    a = generate_public_paserk(4, False, "", "", entropy=DeterministicEntropy(b"seed"))
+    b = generate_public_paserk(4, False, "", "", entropy=DeterministicEntropy(b"seed"))
+    assert a == b
@@ -0,0 +1,61 @@
+import base64
+
+import pytest
+from cryptography.hazmat.primitives import serialization
+from pyseto import Key
+
+from mkkey.export import export_key, generate_key
+from mkkey.jwk import KeyFactory, KeySpec
+
+
+@pytest.mark.parametrize(
+    "kty, crv, alg",
+    [
+        ("RSA", "", "RS256"),
+        ("EC", "P-384", ""),
+        ("OKP", "Ed25519", ""),
+    ],
+)
+def test_generate_key(kty, crv, alg):
+    res = generate_key(kty, crv, alg, kid_type="sha256", emit=["jwk", "pem", "der", "paserk"])
+    for k in ["public", "secret"]:
+        assert list(res[k].keys()) == ["jwk", "pem", "der", "paserk"]
+        assert res[k]["pem"].startswith("-----BEGIN ")
+        assert base64.b64decode(res[k]["der"])
+    assert res["public"]["jwk"]["kid"] == res["secret"]["jwk"]["kid"]
+
+    # All the representations are of the same key.
+    sk = serialization.load_pem_private_key(res["secret"]["pem"].encode("ascii"), password=None)
+    pk = serialization.load_der_public_key(base64.b64decode(res["public"]["der"]))
+    spki = sk.public_key().public_bytes(serialization.Encoding.DER, serialization.PublicFormat.SubjectPublicKeyInfo)
+    assert spki == pk.public_bytes(serialization.Encoding.DER, serialization.PublicFormat.SubjectPublicKeyInfo)
+    assert res["public"]["pem"] == sk.public_key().public_bytes(
+        serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo
+    ).decode("ascii")
+    assert KeyFactory(KeySpec(kty, crv, alg, kid_type="sha256")).serialize(sk).secret == res["secret"]["jwk"]
+    assert Key.from_paserk(res["public"]["paserk"]).to_paserk() == res["public"]["paserk"]
+
+
+def test_export_key_with_paserk_version():
+    factory = KeyFactory(KeySpec("OKP", "Ed25519"))
+    res = export_key(factory, factory.new_private_key(), ["paserk"], paserk_version=2)
+    assert res["public"]["paserk"].startswith("k2.public.")
+    assert res["secret"]["paserk"].startswith("k2.secret.")
+
+
+@pytest.mark.parametrize(
+    "kwargs, msg",
+    [
+        ({"emit": []}, "emit must not be empty."),
+        ({"emit": ["xxx"]}, "Invalid emit format: xxx."),
+        ({"emit": ["paserk"], "crv": "P-256"}, "PASERK is not available for P-256 keys."),
+        ({"emit": ["paserk"], "paserk_version": 4}, "PASERK v4 is not available for P-384 keys."),
+    ],
+)
+def test_generate_key_with_invalid_arg(kwargs, msg):
+    params: dict = {"kty": "EC", "crv": "P-384"}
+    params.update(kwargs)
+    with pytest.raises(ValueError) as err:
+        generate_key(**params)
+        pytest.fail("generate_key() must fail.")
+    assert msg in str(err.value)
@@ -0,0 +1,84 @@
+import io
+import json
+
+import pytest
+
+from mkkey.fingerprint import thumbprint_all, thumbprint_input, thumbprints
+from mkkey.jwk import KeyFactory, KeySpec, generate_jwk
+
+# RFC 7638 Section 3.1
+RFC7638_JWK = {
+    "kty": "RSA",
+    "n": "0vx7agoebGcQSuuPiLJXZptN9nndrQmbXEps2aiAFbWhM78LhWx4cbbfAAtVT86zwu1RK7aPFFxuhDR1L6tSoc_BJECPebWKRXjBZCiFV4n3oknjhMstn64tZ_2W-5JsGY4Hc5n9yBXArwl93lqt7_RN5w6Cf0h4QyQ5v-65YGjQR0_FDW2QvzqY368QQMicAtaSqzs8KJZgnYb9c7d0zgdAZHzu6qMQvRL5hajrn1n91CbOpbISD08qNLyrdkt-bFTWhAI4vMQFh6WeZu0fM4lFd2NcRwr3XPksINHaQ-G_xBniIqbw0Ls1jF44-csFCur-kEgU8awapJzKnqDKgw",
+    "e": "AQAB",
+    "alg": "RS256",
+    "kid": "2011-04-29",
+}
+
+
+def test_thumbprints_with_rfc7638_example():
+    assert thumbprint_input(RFC7638_JWK).startswith(b'{"e":"AQAB","kty":"RSA","n":"0vx7')
+    assert thumbprints(RFC7638_JWK) == {"sha256": "NzbLsXh8uDCcd-6MNwXF4W_7noWXFZAfHkxZsRGC9Xs"}
+
+
+@pytest.mark.parametrize(
+    "kty, crv, alg",
+    [
+        ("RSA", "", "RS256"),
+        ("EC", "P-256", ""),
+        ("EC", "secp256k1", ""),
+        ("OKP", "Ed25519", ""),
+        ("OKP", "Ed448", ""),
+    ],
+)
+@pytest.mark.parametrize("digest", ["sha256", "sha384", "sha512"])
+def test_generate_jwk_with_thumbprint_kid(kty, crv, alg, digest):
+    res = generate_jwk(kty, crv, alg, kid_type=f"thumbprint-{digest}")
+    pub = res["public"]["jwk"]
+    assert pub["kid"] == res["secret"]["jwk"]["kid"]
+    assert pub["kid"] == thumbprints(pub, [digest])[digest]
+    assert pub["kid"] == thumbprints(res["secret"]["jwk"], [digest])[digest]
+
+
+def test_generate_jwk_with_thumbprint_kid_and_kid_size():
+    res = generate_jwk("OKP", "Ed25519", kid_type="thumbprint-sha512", kid_size=16)
+    assert len(res["public"]["jwk"]["kid"]) == 22
+
+
+def test_thumbprints_with_multiple_digests():
+    res = thumbprints(RFC7638_JWK, ["sha256", "sha384", "sha512"])
+    assert [len(v) for v in res.values()] == [43, 64, 86]
+
+
+@pytest.mark.parametrize(
+    "jwk, digests, msg",
+    [
+        ({"kty": "xxx"}, ["sha256"], "Invalid kty: xxx."),
+        ({"kty": "EC", "crv": "P-256", "x": ""}, ["sha256"], "Missing member for EC: y."),
+        (RFC7638_JWK, ["md5"], "Invalid digest: md5."),
+        (RFC7638_JWK, [], "digests must not be empty."),
+    ],
+)
+def test_thumbprints_with_invalid_arg(jwk, digests, msg):
+    with pytest.raises(ValueError) as err:
+        thumbprints(jwk, digests)
+        pytest.fail("thumbprints() must fail.")
+    assert msg in str(err.value)
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_thumbprint_all(tmp_path, workers):
+    factory = KeyFactory(KeySpec("OKP", "Ed25519", kid_type="thumbprint-sha256"))
+    keys = [pair.public for pair in factory.generate_many(10)]
+    (tmp_path / "a.json").write_text(json.dumps({"keys": keys + [{"kty": "xxx"}]}))
+    (tmp_path / "b.json").write_text("xxx")
+    records = list(thumbprint_all([str(tmp_path / "*.json")], io.BytesIO(), ["sha256"], workers))
+    assert [r["thumbprints"]["sha256"] for r in records[:10]] == [k["kid"] for k in keys]
+    assert records[10] == {"source": str(tmp_path / "a.json"), "kid": "", "error": "Invalid kty: xxx."}
+    assert records[11]["source"] == str(tmp_path / "b.json")
+    assert "error" in records[11]
+
+    stdin = io.BytesIO(json.dumps(keys[0]).encode("utf-8"))
+    assert list(thumbprint_all(["-"], stdin)) == [
+        {"source": "<stdin>", "kid": keys[0]["kid"], "thumbprints": {"sha256": keys[0]["kid"]}}
+    ]
@@ -0,0 +1,106 @@
+import json
+import os
+
+import pytest
+
+from mkkey.index import JWKSIndex, build_index
+from mkkey.jwk import KeyFactory, KeySpec
+
+
+@pytest.fixture
+def jwks_path(tmp_path):
+    factory = KeyFactory(KeySpec("OKP", "Ed25519", kid_type="sha256"))
+    keys = [pair.public for pair in factory.generate_many(100)]
+    keys.append({"kid": "日本語", "kty": "oct", "k": "AA"})
+    keys.append({"kty": "oct", "k": "AA"})
+    path = tmp_path / "jwks.json"
+    # Other members and whitespace before and after the keys are skipped.
+    path.write_text(json.dumps({"x": {"keys": []}, "keys": keys, "y": [1]}, indent=4, ensure_ascii=False), encoding="utf-8")
+    return str(path)
+
+
+def test_build_index_and_get(jwks_path):
+    assert build_index(jwks_path) == (101, 1)
+    with open(jwks_path, encoding="utf-8") as f:
+        keys = json.load(f)["keys"]
+    with JWKSIndex(jwks_path) as idx:
+        assert len(idx) == 101
+        for jwk in keys[:-1]:
+            assert idx.get(jwk["kid"]) == jwk
+        assert idx.get("xxx") is None
+
+
+@pytest.mark.parametrize("ensure_ascii", [True, False])
+def test_build_index_with_non_ascii_kid(tmp_path, ensure_ascii):
+    keys = [{"kid": "clé", "kty": "oct", "k": "AA"}, {"kid": "日本語", "kty": "oct", "k": "AB"}]
+    path = tmp_path / "jwks.json"
+    path.write_text(json.dumps({"keys": keys}, ensure_ascii=ensure_ascii), encoding="utf-8")
+    assert build_index(str(path)) == (2, 0)
+    with JWKSIndex(str(path)) as idx:
+        for jwk in keys:
+            assert idx.get(jwk["kid"]) == jwk
+
+
+def test_build_index_with_output(jwks_path, tmp_path):
+    build_index(jwks_path, str(tmp_path / "x.idx"))
+    with JWKSIndex(jwks_path, str(tmp_path / "x.idx")) as idx:
+        assert len(idx) == 101
+
+
+def test_jwks_index_with_empty_jwks(tmp_path):
+    path = tmp_path / "jwks.json"
+    path.write_text('{"keys": []}')
+    assert build_index(str(path)) == (0, 0)
+    with JWKSIndex(str(path)) as idx:
+        assert idx.get("xxx") is None
+
+
+def test_jwks_index_with_stale_index(jwks_path):
+    build_index(jwks_path)
+    with open(jwks_path, "a") as f:
+        f.write("\n")
+    with pytest.raises(ValueError) as err:
+        JWKSIndex(jwks_path)
+        pytest.fail("JWKSIndex() must fail.")
+    assert "The JWKS index is stale." in str(err.value)
+
+
+def test_jwks_index_with_same_size_rewrite(tmp_path):
+    factory = KeyFactory(KeySpec("EC", "P-256", kid_type="sha256"))
+    path = tmp_path / "jwks.json"
+    path.write_text(json.dumps({"keys": [pair.public for pair in factory.generate_many(3)]}))
+    build_index(str(path))
+    st = os.stat(path)
+    path.write_text(json.dumps({"keys": [pair.public for pair in factory.generate_many(3)]}))
+    assert os.path.getsize(path) == st.st_size
+    # Rule out a coarse mtime resolution of the file system.
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1))
+    with pytest.raises(ValueError) as err:
+        JWKSIndex(str(path))
+        pytest.fail("JWKSIndex() must fail.")
+    assert "The JWKS index is stale." in str(err.value)
+
+
+def test_jwks_index_with_invalid_index(jwks_path):
+    with open(jwks_path + ".idx", "wb") as f:
+        f.write(b"MKKIDX01" + bytes(16))
+    with pytest.raises(ValueError) as err:
+        JWKSIndex(jwks_path)
+        pytest.fail("JWKSIndex() must fail.")
+    assert "Invalid JWKS index." in str(err.value)
+
+
+@pytest.mark.parametrize(
+    "data, msg",
+    [
+        ("[]", "Invalid JWKS: '{' is expected at 0."),
+        ('{"keys": {}}', "Invalid JWKS: '[' is expected at 9."),
+    ],
+)
+def test_build_index_with_invalid_jwks(tmp_path, data, msg):
+    path = tmp_path / "jwks.json"
+    path.write_text(data)
+    with pytest.raises(ValueError) as err:
+        build_index(str(path))
+        pytest.fail("build_index() must fail.")
+    assert msg in str(err.value)
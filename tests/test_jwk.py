@@ -1,7 +1,12 @@
+import hashlib
+from dataclasses import FrozenInstanceError
+
 import pytest
+from cryptography.hazmat.primitives import serialization
 from jwt import PyJWK
 
-from mkkey.jwk import generate_jwk
+from mkkey.jwk import JWKPair, JWKRecord, KeyFactory, KeySpec, generate_jwk, to_jwks
+from mkkey.utils import base64url_encode
 
 
 @pytest.mark.parametrize(
@@ -121,3 +126,161 @@ def test_generate_jwk_with_invalid_arg(kty, crv, alg, use, kid, kid_type, kid_si
         generate_jwk(kty, crv, alg, use, False, kid, kid_type, kid_size, output_format, rsa_key_size)
         pytest.fail("generate_jwk() must fail.")
     assert msg in str(err.value)
+
+
+@pytest.mark.parametrize(
+    "spec",
+    [
+        KeySpec("RSA", alg="RS256", rsa_key_size=2048),
+        KeySpec("EC", "P-256", kid_type="sha256", kid_size=8),
+        KeySpec("EC", "P-521", "ES512", use="sig", key_ops=True),
+        KeySpec("OKP", "Ed25519", kid="01"),
+        KeySpec("OKP", "Ed448", key_ops=True),
+    ],
+)
+def test_key_factory(spec):
+    factory = KeyFactory(spec)
+    assert factory.spec is spec
+    pairs = list(factory.generate_many(3))
+    assert len(pairs) == 3
+    for pair in pairs:
+        assert isinstance(pair, JWKPair)
+        assert pair.public["kty"] == spec.kty
+        assert pair.secret["kty"] == spec.kty
+        if spec.kid:
+            assert pair.public["kid"] == pair.secret["kid"] == spec.kid
+        if spec.key_ops:
+            assert pair.public["key_ops"] == ["verify"]
+            assert pair.secret["key_ops"] == ["sign"]
+        for k, v in pair.public.items():
+            if k != "key_ops":
+                assert pair.secret[k] == v
+    assert len({p.secret["d"] for p in pairs}) == 3
+
+
+def test_key_factory_does_not_share_members():
+    a, b = KeyFactory(KeySpec("OKP", "Ed25519", key_ops=True)).generate_many(2)
+    a.public["key_ops"].append("xxx")
+    assert b.public["key_ops"] == ["verify"]
+
+
+@pytest.mark.parametrize("output_format", ["json", "jwks"])
+def test_jwk_pair_to_dict(output_format):
+    pair = KeyFactory(KeySpec("OKP", "Ed25519")).generate()
+    res = pair.to_dict(output_format)
+    if output_format == "json":
+        assert res == {"public": {"jwk": pair.public}, "secret": {"jwk": pair.secret}}
+    else:
+        assert res == {"public": {"jwks": {"keys": [pair.public]}}, "secret": {"jwks": {"keys": [pair.secret]}}}
+
+
+def test_jwk_pair_to_dict_with_invalid_arg():
+    pair = KeyFactory(KeySpec("OKP", "Ed25519")).generate()
+    with pytest.raises(ValueError) as err:
+        pair.to_dict("xxx")
+        pytest.fail("to_dict() must fail.")
+    assert "Invalid output_format: xxx." in str(err.value)
+
+
+def test_key_spec_is_immutable():
+    spec = KeySpec("EC", "P-256")
+    with pytest.raises(FrozenInstanceError):
+        spec.crv = "P-384"
+
+
+@pytest.mark.parametrize(
+    "kwargs, msg",
+    [
+        ({"kty": "xxx"}, "Invalid kty: xxx."),
+        ({"kty": "EC", "crv": "P-256", "alg": "ES512"}, "alg must be ES256."),
+        ({"kty": "OKP", "crv": "Ed25519", "kid_type": "xxx"}, "Invalid kid_type: xxx."),
+        ({"kty": "OKP", "crv": "Ed25519", "output_format": "xxx"}, "Invalid output_format: xxx."),
+    ],
+)
+def test_key_spec_with_invalid_arg(kwargs, msg):
+    with pytest.raises(ValueError) as err:
+        KeySpec(**kwargs)
+        pytest.fail("KeySpec() must fail.")
+    assert msg in str(err.value)
+
+
+@pytest.mark.parametrize(
+    "kty, crv, rsa_key_size",
+    [
+        ("RSA", "", 1024),
+        ("RSA", "", 2048),
+        ("EC", "P-256", 2048),
+        ("EC", "P-384", 2048),
+        ("EC", "P-521", 2048),
+        ("EC", "secp256k1", 2048),
+        ("OKP", "Ed25519", 2048),
+        ("OKP", "Ed448", 2048),
+    ],
+)
+def test_key_factory_serialize_kid(kty, crv, rsa_key_size):
+    factory = KeyFactory(KeySpec(kty, crv, kid_type="sha256", rsa_key_size=rsa_key_size))
+    k = factory._new_key()
+    spki = k.public_key().public_bytes(serialization.Encoding.DER, serialization.PublicFormat.SubjectPublicKeyInfo)
+    pair = factory.serialize(k)
+    assert pair.public["kid"] == base64url_encode(hashlib.sha256(spki).digest())
+    assert pair.secret["kid"] == pair.public["kid"]
+
+
+@pytest.mark.parametrize(
+    "spec",
+    [
+        KeySpec("RSA", alg="RS256", rsa_key_size=2048),
+        KeySpec("RSA", alg="PS256", kid_type="thumbprint-sha256", use="sig", key_ops=True),
+        KeySpec("EC", "P-256", kid_type="sha256", kid_size=8),
+        KeySpec("EC", "P-521", "ES512", use="sig", key_ops=True),
+        KeySpec("EC", "secp256k1", kid_type="thumbprint-sha512"),
+        KeySpec("OKP", "Ed25519", kid="01"),
+        KeySpec("OKP", "Ed448", key_ops=True),
+    ],
+)
+def test_key_factory_serialize_record(spec):
+    factory = KeyFactory(spec)
+    k = factory.new_private_key()
+    record = factory.serialize_record(k)
+    pair = factory.serialize(k)
+    assert isinstance(record, JWKRecord)
+    assert record.to_pair() == pair
+    assert list(record.public) == list(pair.public)
+    assert list(record.secret) == list(pair.secret)
+    assert record.kid == pair.public.get("kid", "")
+    assert record.to_dict("jwks") == pair.to_dict("jwks")
+
+
+def test_jwk_record_is_compact():
+    record = KeyFactory(KeySpec("EC", "P-256")).generate_record()
+    assert not hasattr(record, "__dict__")
+    with pytest.raises(AttributeError):
+        record.xxx = 1  # type: ignore[attr-defined]
+    assert repr(record) == "JWKRecord(kty='EC', kid='')"
+
+
+def test_jwk_record_does_not_share_members():
+    record = KeyFactory(KeySpec("OKP", "Ed25519", key_ops=True)).generate_record()
+    record.public["key_ops"].append("xxx")
+    assert record.public["key_ops"] == ["verify"]
+
+
+def test_to_jwks():
+    records = list(KeyFactory(KeySpec("OKP", "Ed25519", kid_type="thumbprint-sha256")).generate_records(3))
+    assert to_jwks(records) == {"keys": [r.public for r in records]}
+    assert to_jwks(records, secret=True) == {"keys": [r.secret for r in records]}
+    assert len({r.kid for r in records}) == 3
+
+
+@pytest.mark.parametrize(
+    "spec, prefix",
+    [
+        (KeySpec("OKP", "Ed25519"), "k4."),
+        (KeySpec("EC", "P-384"), "k3."),
+    ],
+)
+def test_jwk_record_to_paserk(spec, prefix):
+    record = KeyFactory(spec).generate_record()
+    res = record.to_paserk()
+    assert res["public"]["paserk"].startswith(prefix + "public.")
+    assert res["secret"]["paserk"].startswith(prefix + "secret.")
@@ -0,0 +1,178 @@
+import io
+import json
+import os
+
+import pytest
+
+import mkkey.output
+from mkkey.fingerprint import thumbprints
+from mkkey.jwk import generate_jwk
+from mkkey.output import JWKSWriter, KeyDirectoryWriter, NDJSONWriter, dumps, write_jwks
+
+
+@pytest.mark.parametrize("fast", [True, False])
+def test_dumps(monkeypatch, fast):
+    if fast:
+        pytest.importorskip("orjson")
+    else:
+        monkeypatch.setattr(mkkey.output, "orjson", None)
+    obj = {"public": {"jwk": {"kty": "oct", "k": "AA"}}, "keys": [1, True, None]}
+    assert dumps(obj) == '{"public":{"jwk":{"kty":"oct","k":"AA"}},"keys":[1,true,null]}'
+    # Non-ASCII characters are written as is, the same as orjson does.
+    assert dumps({"kid": "鍵-é"}) == '{"kid":"鍵-é"}'
+
+
+def test_ndjson_writer():
+    stream = io.StringIO()
+    writer = NDJSONWriter(stream)
+    for _ in range(3):
+        writer.write(generate_jwk("OKP", "Ed25519"))
+    lines = stream.getvalue().splitlines()
+    assert len(lines) == 3
+    for line in lines:
+        res = json.loads(line)
+        assert "public" in res
+        assert "secret" in res
+
+
+@pytest.mark.parametrize("count", [0, 1, 5])
+def test_jwks_writer(count):
+    stream = io.StringIO()
+    with JWKSWriter(stream) as writer:
+        for _ in range(count):
+            writer.write(generate_jwk("OKP", "Ed25519")["public"]["jwk"])
+    assert writer.count == count
+    assert len(json.loads(stream.getvalue())["keys"]) == count
+
+
+def test_jwks_writer_flushes_each_key():
+    stream = io.StringIO()
+    writer = JWKSWriter(stream)
+    writer.write({"kty": "oct", "k": "AA"})
+    assert stream.getvalue() == '{"keys":[{"kty":"oct","k":"AA"}'
+    writer.close()
+    writer.close()
+    assert stream.getvalue() == '{"keys":[{"kty":"oct","k":"AA"}]}\n'
+
+
+def test_jwks_writer_write_after_close():
+    writer = JWKSWriter(io.StringIO())
+    writer.close()
+    with pytest.raises(ValueError) as err:
+        writer.write({"kty": "oct", "k": "AA"})
+        pytest.fail("write() must fail.")
+    assert "The writer has already been closed." in str(err.value)
+
+
+def test_write_jwks():
+    stream = io.StringIO()
+    n = write_jwks(stream, (generate_jwk("EC", "P-256")["public"]["jwk"] for _ in range(4)))
+    assert n == 4
+    assert len(json.loads(stream.getvalue())["keys"]) == 4
+
+
+def _pairs(n, **kwargs):
+    res = [generate_jwk("OKP", "Ed25519", **kwargs) for _ in range(n)]
+    return [(r["public"]["jwk"], r["secret"]["jwk"]) for r in res]
+
+
+def _mode(path):
+    return os.stat(path).st_mode & 0o777
+
+
+@pytest.mark.parametrize("sync_every", [1, 2, 1024])
+def test_key_directory_writer(tmp_path, sync_every):
+    pairs = _pairs(5, kid_type="sha256")
+    with KeyDirectoryWriter(str(tmp_path), sync_every=sync_every) as writer:
+        for public, secret in pairs:
+            writer.write(public, secret)
+    assert writer.count == 5
+    assert sorted(os.listdir(tmp_path)) == ["public", "secret"]
+    for public, secret in pairs:
+        assert json.loads((tmp_path / "public" / f"{public['kid']}.json").read_text()) == public
+        assert json.loads((tmp_path / "secret" / f"{public['kid']}.json").read_text()) == secret
+    assert len(os.listdir(tmp_path / "secret")) == 5
+    if os.name != "nt":
+        assert _mode(tmp_path / "secret") == 0o700
+        assert _mode(tmp_path / "secret" / f"{pairs[0][0]['kid']}.json") == 0o600
+
+
+def test_key_directory_writer_without_kid(tmp_path):
+    public, secret = _pairs(1)[0]
+    with KeyDirectoryWriter(str(tmp_path)) as writer:
+        writer.write(public, secret)
+    name = thumbprints(public)["sha256"] + ".json"
+    assert json.loads((tmp_path / "secret" / name).read_text()) == secret
+
+
+def test_key_directory_writer_jwks(tmp_path):
+    pairs = _pairs(3)
+    with KeyDirectoryWriter(str(tmp_path), jwks=True) as writer:
+        for public, secret in pairs:
+            writer.write(public, secret)
+        # Nothing is visible until the writer is closed.
+        assert [n for n in os.listdir(tmp_path) if not n.startswith(".")] == []
+    assert sorted(os.listdir(tmp_path)) == ["jwks.json", "secret-jwks.json"]
+    assert json.loads((tmp_path / "jwks.json").read_text()) == {"keys": [p[0] for p in pairs]}
+    assert json.loads((tmp_path / "secret-jwks.json").read_text()) == {"keys": [p[1] for p in pairs]}
+    if os.name != "nt":
+        assert _mode(tmp_path / "secret-jwks.json") == 0o600
+
+
+@pytest.mark.parametrize("jwks", [False, True])
+def test_key_directory_writer_with_existing_files(tmp_path, jwks):
+    first, second = _pairs(2, kid="xxx")
+    with KeyDirectoryWriter(str(tmp_path), jwks=jwks) as writer:
+        writer.write(*first)
+    with pytest.raises(ValueError) as err:
+        with KeyDirectoryWriter(str(tmp_path), jwks=jwks) as writer:
+            writer.write(*second)
+        pytest.fail("KeyDirectoryWriter must fail.")
+    assert ("The JWKS already exists: jwks.json." if jwks else "The key already exists: xxx.json.") in str(err.value)
+    with KeyDirectoryWriter(str(tmp_path), jwks=jwks, overwrite=True) as writer:
+        writer.write(*second)
+    if jwks:
+        assert json.loads((tmp_path / "jwks.json").read_text()) == {"keys": [second[0]]}
+    else:
+        assert json.loads((tmp_path / "public" / "xxx.json").read_text()) == second[0]
+
+
+@pytest.mark.parametrize("jwks", [False, True])
+def test_key_directory_writer_discards_unsynced_keys_on_error(tmp_path, jwks):
+    pairs = _pairs(3, kid_type="sha256")
+    with pytest.raises(RuntimeError):
+        with KeyDirectoryWriter(str(tmp_path), jwks=jwks, sync_every=2) as writer:
+            for public, secret in pairs:
+                writer.write(public, secret)
+            raise RuntimeError("xxx")
+    if jwks:
+        assert os.listdir(tmp_path) == []
+    else:
+        assert sorted(os.listdir(tmp_path / "public")) == sorted(f"{p[0]['kid']}.json" for p in pairs[:2])
+
+
+@pytest.mark.parametrize(
+    "kid, msg",
+    [
+        ("../xxx", "kid cannot be used as a file name: ../xxx."),
+        (".xxx", "kid cannot be used as a file name: .xxx."),
+        ("xxx\n", "kid cannot be used as a file name: xxx\n."),
+        ("xxx", "The key already exists: xxx.json."),
+    ],
+)
+def test_key_directory_writer_with_invalid_kid(tmp_path, kid, msg):
+    public, secret = _pairs(1, kid=kid)[0]
+    with KeyDirectoryWriter(str(tmp_path)) as writer:
+        if kid == "xxx":
+            writer.write(public, secret)
+        with pytest.raises(ValueError) as err:
+            writer.write(public, secret)
+            pytest.fail("write() must fail.")
+    assert msg in str(err.value)
+
+
+def test_key_directory_writer_with_invalid_sync_every(tmp_path):
+    with pytest.raises(ValueError) as err:
+        KeyDirectoryWriter(str(tmp_path), sync_every=0)
+        pytest.fail("KeyDirectoryWriter() must fail.")
+    assert "sync_every must be a positive integer." in str(err.value)
@@ -1,8 +1,16 @@
 from secrets import token_bytes
 
 import pytest
+from pyseto import Key
 
-from mkkey.paserk import generate_local_paserk, generate_public_paserk
+from mkkey.batch import generate_batch
+from mkkey.paserk import (
+    calibrate_kdf,
+    generate_local_paserk,
+    generate_local_paserks,
+    generate_public_paserk,
+    generate_public_paserks,
+)
 
 
 @pytest.mark.parametrize(
@@ -103,3 +111,119 @@ def test_generate_local_paserk_with_invalid_arg(version, key_material, kid, pass
         generate_local_paserk(version, key_material, kid, password, wrapping_key)
         pytest.fail("generate_local_paserk() must fail.")
     assert msg in str(err.value)
+
+
+@pytest.mark.parametrize(
+    "version, kdf",
+    [
+        (1, {"iteration": 1000}),
+        (2, {"memory_cost": 8, "time_cost": 1, "parallelism": 1}),
+        (3, {"iteration": 1000}),
+        (4, {"memory_cost": 64, "time_cost": 3, "parallelism": 2}),
+    ],
+)
+def test_generate_paserk_with_kdf_params(version, kdf):
+    res = generate_local_paserk(version, "", False, "mysecret", **kdf)
+    k = Key.from_paserk(res["secret"]["paserk"], password="mysecret")
+    assert k.version == version
+    res = generate_public_paserk(version, False, "mysecret", "", **kdf)
+    k = Key.from_paserk(res["secret"]["paserk"], password="mysecret")
+    assert k.version == version
+
+
+def test_generate_local_paserk_with_password_in_parallel():
+    res = list(
+        generate_batch(generate_local_paserk, 4, 2, version=4, key_material="", kid=False, password="mysecret", memory_cost=8)
+    )
+    assert len({r["secret"]["paserk"] for r in res}) == 4
+
+
+@pytest.mark.parametrize(
+    "version, workers",
+    [
+        (1, 1),
+        (2, 2),
+        (3, 1),
+        (4, 2),
+    ],
+)
+def test_generate_local_paserks_with_wrapping_key(version, workers):
+    res = list(generate_local_paserks(version, 5, kid=True, wrapping_key="mysecret", workers=workers))
+    assert len(res) == 5
+    assert len({r["secret"]["paserk"] for r in res}) == 5
+    for r in res:
+        assert r["secret"]["kid"].startswith(f"k{version}.lid.")
+        k = Key.from_paserk(r["secret"]["paserk"], wrapping_key="mysecret")
+        assert k.purpose == "local"
+
+
+@pytest.mark.parametrize(
+    "version, rsa_key_size",
+    [
+        (1, 2048),
+        (2, 0),
+        (3, 0),
+        (4, 0),
+    ],
+)
+def test_generate_public_paserks_with_wrapping_key(version, rsa_key_size):
+    res = list(generate_public_paserks(version, 2, wrapping_key=b"mysecret", rsa_key_size=rsa_key_size or 2048))
+    assert len(res) == 2
+    for r in res:
+        assert r["public"]["paserk"].startswith(f"k{version}.public.")
+        k = Key.from_paserk(r["secret"]["paserk"], wrapping_key="mysecret")
+        assert k.purpose == "public"
+
+
+@pytest.mark.parametrize(
+    "func",
+    [generate_local_paserks, generate_public_paserks],
+)
+def test_generate_paserks_with_invalid_arg(func):
+    with pytest.raises(ValueError) as err:
+        func(4, 2, password="a", wrapping_key="b")
+        pytest.fail("generate_*_paserks() must fail.")
+    assert "Only one of password or wrapping_key must be specified." in str(err.value)
+    with pytest.raises(ValueError) as err:
+        list(func(4, 0))
+        pytest.fail("generate_*_paserks() must fail.")
+    assert "count must be a positive integer." in str(err.value)
+
+
+@pytest.mark.parametrize(
+    "version, keys",
+    [
+        (1, ["iteration"]),
+        (2, ["memory_cost", "time_cost", "parallelism"]),
+        (3, ["iteration"]),
+        (4, ["memory_cost", "time_cost", "parallelism"]),
+    ],
+)
+def test_calibrate_kdf(version, keys):
+    res = calibrate_kdf(version, 5, runs=1)
+    assert sorted(res.keys()) == sorted(keys + ["latency_ms"])
+    assert res["latency_ms"] > 0
+    kdf = {k: res[k] for k in keys}
+    generate_local_paserk(version, "", False, "mysecret", **kdf)
+
+
+@pytest.mark.parametrize(
+    "version, target_ms, msg",
+    [
+        (5, 10, "Invalid version: 5."),
+        (4, 0, "target_ms must be a positive number."),
+    ],
+)
+def test_calibrate_kdf_with_invalid_arg(version, target_ms, msg):
+    with pytest.raises(ValueError) as err:
+        calibrate_kdf(version, target_ms)
+        pytest.fail("calibrate_kdf() must fail.")
+    assert msg in str(err.value)
+
+
+@pytest.mark.parametrize("parallelism", [0, 5])
+def test_calibrate_kdf_with_invalid_parallelism(parallelism):
+    with pytest.raises(ValueError) as err:
+        calibrate_kdf(4, 10, parallelism)
+        pytest.fail("calibrate_kdf() must fail.")
+    assert "parallelism must be between 1 and 4." in str(err.value)
@@ -0,0 +1,157 @@
+import os
+import subprocess
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from cryptography.hazmat.primitives.asymmetric import ec, ed25519, rsa
+
+import mkkey.pool as pool_module
+from mkkey.jwk import generate_jwk
+from mkkey.paserk import generate_public_paserk
+from mkkey.pool import KeyPool, acquire_lock, generate_private_key, key_kind
+
+
+@pytest.mark.parametrize(
+    "kty, crv, rsa_key_size, kind",
+    [
+        ("RSA", "", 2048, "rsa-2048"),
+        ("RSA", "", 4096, "rsa-4096"),
+        ("EC", "P-256", 0, "p-256"),
+        ("EC", "secp256k1", 0, "secp256k1"),
+        ("OKP", "Ed25519", 0, "ed25519"),
+        ("OKP", "Ed448", 0, "ed448"),
+    ],
+)
+def test_key_kind(kty, crv, rsa_key_size, kind):
+    assert key_kind(kty, crv, rsa_key_size) == kind
+
+
+@pytest.mark.parametrize(
+    "kind, msg",
+    [
+        ("rsa-", "Invalid kind: rsa-."),
+        ("rsa-xxx", "Invalid kind: rsa-xxx."),
+        ("p-999", "Invalid kind: p-999."),
+        ("../x", "Invalid kind: ../x."),
+    ],
+)
+def test_generate_private_key_with_invalid_arg(kind, msg):
+    with pytest.raises(ValueError) as err:
+        generate_private_key(kind)
+        pytest.fail("generate_private_key() must fail.")
+    assert msg in str(err.value)
+
+
+def test_key_pool_fill_and_take(tmp_path):
+    pool = KeyPool(str(tmp_path), "mysecret")
+    assert pool.count("p-256") == 0
+    assert pool.pop("p-256") is None
+    assert pool.fill("p-256", 3) == 3
+    assert pool.fill("p-256", 3) == 0
+    assert pool.count("p-256") == 3
+    k = pool.take("p-256")
+    assert isinstance(k, ec.EllipticCurvePrivateKey)
+    assert pool.count("p-256") == 2
+
+
+def test_key_pool_take_generates_when_empty(tmp_path):
+    pool = KeyPool(str(tmp_path), "mysecret")
+    k = pool.take("ed25519")
+    assert isinstance(k, ed25519.Ed25519PrivateKey)
+
+
+def test_key_pool_is_encrypted_at_rest(tmp_path):
+    pool = KeyPool(str(tmp_path), "mysecret")
+    pool.fill("p-256", 1)
+    with pytest.raises(ValueError) as err:
+        KeyPool(str(tmp_path), "wrongsecret").pop("p-256")
+        pytest.fail("pop() must fail.")
+    assert "Failed to decrypt the pooled key" in str(err.value)
+    assert pool.count("p-256") == 1
+
+
+def test_key_pool_exactly_once(tmp_path):
+    pool = KeyPool(str(tmp_path), "mysecret")
+    pool.fill("ed25519", 20, workers=2)
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        keys = [k for k in executor.map(lambda _: pool.pop("ed25519"), range(30)) if k is not None]
+    assert len(keys) == 20
+    assert len({k.private_bytes_raw() for k in keys}) == 20
+    assert pool.count("ed25519") == 0
+    assert [n for n in os.listdir(tmp_path / "ed25519") if n.startswith(".taken-")] == []
+
+
+def test_key_pool_spawns_one_refill(tmp_path, monkeypatch):
+    spawned = []
+    monkeypatch.setattr(subprocess, "Popen", lambda args, **kwargs: spawned.append(kwargs["env"]))
+    pool = KeyPool(str(tmp_path), b"\xffsecret")
+    pool.fill("ed25519", 3, low_watermark=3)
+    for _ in range(3):
+        pool.take("ed25519")
+    assert len(spawned) == 1
+    assert KeyPool(str(tmp_path), spawned[0]["MKKEY_POOL_PASSWORD"]).fill("ed25519", 3) == 3
+    # The refill has started, so the next take may request another one.
+    pool.take("ed25519")
+    assert len(spawned) == 2
+
+
+def test_key_pool_fill_keeps_lock_fresh(tmp_path, monkeypatch):
+    lock = str(tmp_path / "ed25519" / ".filling")
+    generate = pool_module._generate_der
+    held = []
+
+    def generate_der(kind):
+        # Each key makes the lock look older than its expiry, as a slow fill would.
+        held.append(not acquire_lock(lock, 600))
+        os.utime(lock, (time.time() - 3600, time.time() - 3600))
+        return generate(kind)
+
+    monkeypatch.setattr(pool_module, "_generate_der", generate_der)
+    pool = KeyPool(str(tmp_path), "mysecret")
+    assert pool.fill("ed25519", 3, low_watermark=1) == 3
+    assert held == [True, True, True]
+    assert not os.path.exists(lock)
+    assert (tmp_path / "ed25519" / "watermark").read_text() == "1 3"
+
+
+@pytest.mark.parametrize("salt", [b"", b"xxx"])
+def test_key_pool_with_broken_salt(tmp_path, salt):
+    (tmp_path / "salt").write_bytes(salt)
+    with pytest.raises(ValueError) as err:
+        KeyPool(str(tmp_path), "mysecret").fill("ed25519", 1)
+        pytest.fail("fill() must fail.")
+    assert "The salt of the key pool is broken" in str(err.value)
+
+
+@pytest.mark.parametrize(
+    "password, msg",
+    [
+        ("", "password must be specified."),
+    ],
+)
+def test_key_pool_with_invalid_arg(tmp_path, password, msg):
+    with pytest.raises(ValueError) as err:
+        KeyPool(str(tmp_path), password)
+        pytest.fail("KeyPool() must fail.")
+    assert msg in str(err.value)
+
+
+def test_generate_jwk_with_pool(tmp_path):
+    pool = KeyPool(str(tmp_path), "mysecret")
+    pool.fill("rsa-2048", 1)
+    res = generate_jwk("RSA", alg="RS256", pool=pool)
+    assert "d" in res["secret"]["jwk"]
+    assert pool.count("rsa-2048") == 0
+
+
+def test_generate_public_paserk_with_pool(tmp_path):
+    pool = KeyPool(str(tmp_path), "mysecret")
+    pool.fill("rsa-2048", 1)
+    res = generate_public_paserk(1, False, "", "", pool=pool)
+    assert res["public"]["paserk"].startswith("k1.public.")
+    assert pool.count("rsa-2048") == 0
+
+
+def test_generate_private_key_rsa():
+    assert isinstance(generate_private_key("rsa-2048"), rsa.RSAPrivateKey)
@@ -0,0 +1,108 @@
+import json
+import os
+import time
+
+import pytest
+
+from mkkey.jwk import KeySpec
+from mkkey.rotate import RotationStore
+
+
+def test_rotation_store_rotate_and_compact(tmp_path):
+    store = RotationStore(str(tmp_path))
+    spec = KeySpec("EC", "P-256", kid_type="sha256")
+    pairs = [store.rotate(spec) for _ in range(3)]
+    assert store.keys() == []
+    assert not os.path.exists(store.published_path)
+
+    assert store.compact() == []
+    keys = store.keys()
+    assert [k["public"]["kid"] for k in keys] == [p.public["kid"] for p in reversed(pairs)]
+    assert [k["secret"] for k in keys] == [p.secret for p in reversed(pairs)]
+    with open(store.published_path) as f:
+        assert json.load(f) == {"keys": [p.public for p in reversed(pairs)]}
+    assert os.listdir(tmp_path / "log") == []
+
+
+def test_rotation_store_compact_with_max_keys(tmp_path):
+    store = RotationStore(str(tmp_path))
+    spec = KeySpec("OKP", "Ed25519", kid_type="sha256")
+    pairs = [store.rotate(spec) for _ in range(3)]
+    assert store.compact(max_keys=2) == [pairs[0].public["kid"]]
+    pair = store.rotate(spec)
+    assert store.compact(max_keys=2) == [pairs[1].public["kid"]]
+    assert [k["public"]["kid"] for k in store.keys()] == [pair.public["kid"], pairs[2].public["kid"]]
+
+
+def test_rotation_store_compact_with_max_age(tmp_path):
+    store = RotationStore(str(tmp_path))
+    spec = KeySpec("OKP", "Ed25519", kid_type="sha256")
+    store.rotate(spec)
+    store.rotate(spec)
+    store.compact()
+    state = tmp_path / "keys.json"
+    keys = json.loads(state.read_text())["keys"]
+    for k in keys:
+        k["created_at"] -= 100
+    state.write_text(json.dumps({"keys": keys}))
+
+    # The newest key is always kept.
+    assert store.compact(max_age=10) == [keys[1]["public"]["kid"]]
+    pair = store.rotate(spec)
+    assert store.compact(max_age=10) == [keys[0]["public"]["kid"]]
+    assert [k["public"]["kid"] for k in store.keys()] == [pair.public["kid"]]
+
+
+def test_rotation_store_compact_skips_folded_entries(tmp_path):
+    store = RotationStore(str(tmp_path))
+    store.rotate(KeySpec("OKP", "Ed25519", kid_type="sha256"))
+    entry = os.listdir(tmp_path / "log")[0]
+    data = (tmp_path / "log" / entry).read_text()
+    store.compact()
+    # Emulates a compaction interrupted before removing the log.
+    (tmp_path / "log" / entry).write_text(data)
+    assert store.compact() == []
+    assert len(store.keys()) == 1
+
+
+def test_rotation_store_compact_while_locked(tmp_path):
+    store = RotationStore(str(tmp_path))
+    store.rotate(KeySpec("OKP", "Ed25519", kid_type="sha256"))
+    (tmp_path / ".compacting").write_text("")
+    assert store.compact() is None
+    assert store.keys() == []
+
+    past = time.time() - 3600
+    os.utime(tmp_path / ".compacting", (past, past))
+    assert store.compact() == []
+    assert len(store.keys()) == 1
+    assert not os.path.exists(tmp_path / ".compacting")
+
+
+@pytest.mark.parametrize(
+    "kwargs, msg",
+    [
+        ({"max_keys": -1}, "max_keys must be 0 or a positive integer."),
+        ({"max_age": -1}, "max_age must be 0 or a positive integer."),
+    ],
+)
+def test_rotation_store_compact_with_invalid_arg(tmp_path, kwargs, msg):
+    with pytest.raises(ValueError) as err:
+        RotationStore(str(tmp_path)).compact(**kwargs)
+        pytest.fail("compact() must fail.")
+    assert msg in str(err.value)
+
+
+@pytest.mark.parametrize(
+    "spec, msg",
+    [
+        (KeySpec("EC", "P-256"), "kid_type must be specified for rotation."),
+        (KeySpec("EC", "P-256", kid="xxx"), "kid cannot be specified for rotation, use kid_type instead."),
+        (KeySpec("EC", "P-256", kid="xxx", kid_type="sha256"), "kid cannot be specified for rotation, use kid_type instead."),
+    ],
+)
+def test_rotation_store_rotate_with_invalid_kid(tmp_path, spec, msg):
+    with pytest.raises(ValueError) as err:
+        RotationStore(str(tmp_path)).rotate(spec)
+        pytest.fail("rotate() must fail.")
+    assert msg in str(err.value)
@@ -0,0 +1,183 @@
+import http.client
+import json
+import socket
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from mkkey.serve import create_server, execute
+
+
+class _UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, path: str):
+        super().__init__("localhost")
+        self._path = path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.connect(self._path)
+
+
+@pytest.fixture(scope="module")
+def server():
+    s = create_server(port=0, workers=1, quiet=True)
+    t = threading.Thread(target=s.serve_forever, daemon=True)
+    t.start()
+    yield s
+    s.shutdown()
+    s.server_close()
+
+
+def _request(server, method, path, body=None):
+    conn = http.client.HTTPConnection("127.0.0.1", server.server_address[1])
+    try:
+        conn.request(method, path, body=json.dumps(body) if body is not None else None)
+        res = conn.getresponse()
+        return res.status, res.getheader("Server-Timing"), json.loads(res.read())
+    finally:
+        conn.close()
+
+
+def test_serve_health(server):
+    status, _, res = _request(server, "GET", "/health")
+    assert status == 200
+    assert res == {"status": "ok"}
+
+
+@pytest.mark.parametrize(
+    "path, params",
+    [
+        ("/jwk", {"kty": "EC", "crv": "P-256"}),
+        ("/jwk", {"kty": "OKP", "crv": "Ed25519", "kid_type": "sha256", "output_format": "jwks"}),
+        ("/jwk", {"kty": "RSA", "alg": "RS256"}),
+        ("/paserk/public", {"version": 4, "kid": True}),
+        ("/paserk/local", {"version": 4, "wrapping_key": "mysecret"}),
+        ("/paserk/local", {}),
+    ],
+)
+def test_serve(server, path, params):
+    status, timing, res = _request(server, "POST", path, params)
+    assert status == 200
+    assert timing.startswith("gen;dur=")
+    assert "secret" in res
+
+
+@pytest.mark.parametrize(
+    "method, path, body, status, msg",
+    [
+        ("POST", "/xxx", {}, 404, "Unknown operation: /xxx."),
+        ("GET", "/jwk", None, 404, "Unknown operation: /jwk."),
+        ("POST", "/jwk", {"kty": "EC", "crv": "P-256", "alg": "ES384"}, 400, "alg must be ES256."),
+        ("POST", "/jwk", {"kty": "EC", "pool": "/tmp"}, 400, "Unknown parameters: pool."),
+        ("POST", "/jwk", [], 400, "Request body must be a JSON object."),
+        ("POST", "/paserk/public", {"version": 5}, 400, "Invalid version: 5."),
+    ],
+)
+def test_serve_with_invalid_request(server, method, path, body, status, msg):
+    s, _, res = _request(server, method, path, body)
+    assert s == status
+    assert msg in res["error"]
+
+
+def test_serve_with_negative_content_length(server):
+    conn = http.client.HTTPConnection("127.0.0.1", server.server_address[1], timeout=5)
+    try:
+        conn.putrequest("POST", "/jwk")
+        conn.putheader("Content-Length", "-1")
+        conn.endheaders()
+        res = conn.getresponse()
+        assert res.status == 400
+        assert json.loads(res.read()) == {"error": "Invalid Content-Length."}
+    finally:
+        conn.close()
+
+
+@pytest.mark.parametrize("length", ["-1", "xxx", str(1024 * 1024)])
+def test_serve_closes_connection_with_unread_body(server, length):
+    with socket.create_connection(("127.0.0.1", server.server_address[1]), timeout=5) as sock:
+        # The body looks like another request, which must not be served.
+        body = b"GET /health HTTP/1.1\r\nHost: x\r\n\r\n"
+        sock.sendall(b"POST /jwk HTTP/1.1\r\nHost: x\r\nContent-Length: " + length.encode() + b"\r\n\r\n" + body)
+        data = b""
+        while True:
+            chunk = sock.recv(65536)
+            if not chunk:
+                break
+            data += chunk
+    assert data.startswith(b"HTTP/1.1 400 ")
+    assert b"Connection: close" in data
+    assert data.count(b"HTTP/1.1 ") == 1
+
+
+def test_serve_keeps_connection_alive(server):
+    conn = http.client.HTTPConnection("127.0.0.1", server.server_address[1], timeout=5)
+    try:
+        for _ in range(2):
+            conn.request("POST", "/jwk", body=json.dumps({"kty": "OKP", "crv": "Ed25519"}))
+            res = conn.getresponse()
+            assert res.status == 200
+            assert res.getheader("Connection") is None
+            res.read()
+    finally:
+        conn.close()
+
+
+def test_serve_concurrently(server):
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        res = list(executor.map(lambda _: _request(server, "POST", "/jwk", {"kty": "OKP", "crv": "Ed25519"}), range(16)))
+    assert all(r[0] == 200 for r in res)
+    assert len({r[2]["secret"]["jwk"]["d"] for r in res}) == 16
+
+
+@pytest.mark.skipif(not hasattr(socket, "AF_UNIX"), reason="Unix domain sockets are not supported.")
+def test_serve_unix_socket(tmp_path):
+    path = str(tmp_path / "mkkey.sock")
+    s = create_server(unix_socket=path, executor=ThreadPoolExecutor(max_workers=2), quiet=True)
+    t = threading.Thread(target=s.serve_forever, daemon=True)
+    t.start()
+    try:
+        conn = _UnixHTTPConnection(path)
+        conn.request("POST", "/jwk", body=json.dumps({"kty": "EC", "crv": "P-384"}))
+        res = conn.getresponse()
+        assert res.status == 200
+        assert json.loads(res.read())["public"]["jwk"]["crv"] == "P-384"
+        conn.close()
+    finally:
+        s.shutdown()
+        s.server_close()
+
+
+@pytest.mark.skipif(not hasattr(socket, "AF_UNIX"), reason="Unix domain sockets are not supported.")
+def test_serve_unix_socket_does_not_replace_file(tmp_path):
+    path = tmp_path / "notes.txt"
+    path.write_text("xxx")
+    with pytest.raises(ValueError) as err:
+        create_server(unix_socket=str(path), executor=ThreadPoolExecutor(max_workers=1), quiet=True)
+        pytest.fail("create_server() must fail.")
+    assert f"{path} exists and is not a socket." in str(err.value)
+    assert path.read_text() == "xxx"
+
+
+@pytest.mark.skipif(not hasattr(socket, "AF_UNIX"), reason="Unix domain sockets are not supported.")
+def test_serve_unix_socket_replaces_stale_socket(tmp_path):
+    path = str(tmp_path / "mkkey.sock")
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.bind(path)
+    sock.close()
+    s = create_server(unix_socket=path, executor=ThreadPoolExecutor(max_workers=1), quiet=True)
+    s.server_close()
+
+
+def test_execute_with_invalid_arg():
+    with pytest.raises(LookupError) as err:
+        execute("/xxx", {})
+        pytest.fail("execute() must fail.")
+    assert "Unknown operation: /xxx." in str(err.value)
+
+
+def test_create_server_with_invalid_arg():
+    with pytest.raises(ValueError) as err:
+        create_server(port=0, workers=-1)
+        pytest.fail("create_server() must fail.")
+    assert "workers must be 0 or a positive integer." in str(err.value)
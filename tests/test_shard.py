@@ -0,0 +1,135 @@
+import functools
+import json
+import os
+import threading
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from mkkey.jwk import generate_jwk
+from mkkey.shard import ShardedJWKS, shard_jwks
+
+
+@pytest.fixture(scope="module")
+def keys():
+    return [generate_jwk("EC", "P-256", kid_type="sha256")["public"]["jwk"] for _ in range(100)]
+
+
+class _QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+def _write_jwks(path, keys):
+    path.write_text(json.dumps({"keys": keys}))
+    return str(path)
+
+
+@pytest.mark.parametrize("shards", [1, 3, 16, 256])
+def test_shard_jwks(tmp_path, keys, shards):
+    no_kid = {k: v for k, v in keys[0].items() if k != "kid"}
+    manifest, skipped = shard_jwks(_write_jwks(tmp_path / "jwks.json", keys + [no_kid]), str(tmp_path / "out"), shards)
+    assert skipped == 1
+    assert manifest["keys"] == 100
+    assert len(manifest["shards"]) == shards
+    assert manifest["shards"][0]["prefix"] == "00000000"
+    assert json.loads((tmp_path / "out" / "manifest.json").read_text()) == manifest
+    jwks = ShardedJWKS.open(str(tmp_path / "out"))
+    assert len(jwks) == 100
+    for jwk in keys:
+        assert jwks.get(jwk["kid"]) == jwk
+        assert jwk in json.loads((tmp_path / "out" / jwks.shard_of(jwk["kid"])).read_text())["keys"]
+    assert jwks.get("xxx") is None
+
+
+def test_shard_jwks_fetches_only_the_shard(tmp_path, keys):
+    shard_jwks(_write_jwks(tmp_path / "jwks.json", keys), str(tmp_path / "out"), 16)
+    fetched = []
+
+    def fetch(name):
+        fetched.append(name)
+        return (tmp_path / "out" / name).read_bytes()
+
+    jwks = ShardedJWKS(fetch)
+    jwks.get(keys[0]["kid"])
+    jwks.get(keys[0]["kid"])
+    assert fetched == ["manifest.json", jwks.shard_of(keys[0]["kid"])]
+
+
+def test_shard_jwks_keeps_unchanged_shards(tmp_path, keys):
+    out = str(tmp_path / "out")
+    first, _ = shard_jwks(_write_jwks(tmp_path / "a.json", keys), out, 16)
+    second, _ = shard_jwks(
+        _write_jwks(tmp_path / "b.json", keys + [generate_jwk("OKP", "Ed25519", kid="xxx")["public"]["jwk"]]), out, 16
+    )
+    changed = [i for i, (a, b) in enumerate(zip(first["shards"], second["shards"])) if a["path"] != b["path"]]
+    assert len(changed) == 1
+    # The previous shards are left for the readers holding the previous manifest.
+    assert os.path.exists(os.path.join(out, first["shards"][changed[0]]["path"]))
+    assert ShardedJWKS.open(out).get("xxx")["kty"] == "OKP"
+
+
+def test_sharded_jwks_with_tampered_shard(tmp_path, keys):
+    out = tmp_path / "out"
+    shard_jwks(_write_jwks(tmp_path / "jwks.json", keys), str(out), 4)
+    jwks = ShardedJWKS.open(str(out))
+    path = out / jwks.shard_of(keys[0]["kid"])
+    path.write_text(path.read_text().replace(keys[0]["x"], keys[1]["x"]))
+    with pytest.raises(ValueError) as err:
+        jwks.get(keys[0]["kid"])
+        pytest.fail("get() must fail.")
+    assert f"The shard does not match the manifest: {path.name}." in str(err.value)
+
+
+def test_sharded_jwks_over_http(tmp_path, keys):
+    shard_jwks(_write_jwks(tmp_path / "jwks.json", keys), str(tmp_path / "out"), 8)
+    s = ThreadingHTTPServer(("127.0.0.1", 0), functools.partial(_QuietHandler, directory=str(tmp_path / "out")))
+    threading.Thread(target=s.serve_forever, daemon=True).start()
+    try:
+        jwks = ShardedJWKS.open(f"http://127.0.0.1:{s.server_address[1]}")
+        assert jwks.get(keys[5]["kid"]) == keys[5]
+    finally:
+        s.shutdown()
+        s.server_close()
+
+
+@pytest.mark.parametrize(
+    "data, msg",
+    [
+        ('{"keys": {}}', "Invalid JWKS."),
+        ("[]", "Invalid JWKS."),
+    ],
+)
+def test_shard_jwks_with_invalid_jwks(tmp_path, data, msg):
+    (tmp_path / "jwks.json").write_text(data)
+    with pytest.raises(ValueError) as err:
+        shard_jwks(str(tmp_path / "jwks.json"), str(tmp_path / "out"), 2)
+        pytest.fail("shard_jwks() must fail.")
+    assert msg in str(err.value)
+
+
+@pytest.mark.parametrize("shards", [0, 65537])
+def test_shard_jwks_with_invalid_shards(tmp_path, shards):
+    with pytest.raises(ValueError) as err:
+        shard_jwks(str(tmp_path / "jwks.json"), str(tmp_path / "out"), shards)
+        pytest.fail("shard_jwks() must fail.")
+    assert "shards must be between 1 and 65536." in str(err.value)
+
+
+@pytest.mark.parametrize(
+    "manifest",
+    [
+        "xxx",
+        "{}",
+        '{"hash": "sha256", "shards": []}',
+        '{"hash": "md5", "shards": [{"prefix": "00000000"}]}',
+        '{"hash": "sha256", "shards": [{"prefix": "00000001"}]}',
+        '{"hash": "sha256", "shards": [{"prefix": "00000000"}, {"prefix": "xxx"}]}',
+    ],
+)
+def test_sharded_jwks_with_invalid_manifest(tmp_path, manifest):
+    (tmp_path / "manifest.json").write_text(manifest)
+    with pytest.raises(ValueError) as err:
+        ShardedJWKS.open(str(tmp_path))
+        pytest.fail("ShardedJWKS() must fail.")
+    assert "Invalid JWKS manifest." in str(err.value)
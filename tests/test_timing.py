@@ -0,0 +1,115 @@
+import pytest
+
+from mkkey.convert import cached_factory
+from mkkey.jwk import KeyFactory, KeySpec, generate_jwk
+from mkkey.paserk import generate_local_paserk, generate_public_paserk
+from mkkey.timing import profiling, timed
+
+
+def _f(x):
+    return x * 2
+
+
+def test_timed_without_profiling():
+    assert timed("test", _f) is _f
+
+
+def test_profiling():
+    reports = []
+    with profiling(reports.append) as stats:
+        f = timed("test", _f)
+        assert f is not _f
+        assert f(1) == 2
+        assert f(2) == 4
+        assert stats["test"][0] == 2
+    assert timed("test", _f) is _f
+    assert len(reports) == 1
+    assert reports[0]["wall_ns"] > 0
+    assert reports[0]["phases"]["test"]["count"] == 2
+    assert reports[0]["phases"]["test"]["mean_ns"] == reports[0]["phases"]["test"]["total_ns"] // 2
+
+
+def test_profiling_records_failures():
+    def g():
+        raise ValueError("xxx")
+
+    reports = []
+    with profiling(reports.append):
+        with pytest.raises(ValueError):
+            timed("test", g)()
+    assert reports[0]["phases"]["test"]["count"] == 1
+
+
+def test_profiling_nested():
+    outer = []
+    inner = []
+    with profiling(outer.append):
+        with profiling(inner.append):
+            timed("inner", _f)(1)
+        timed("outer", _f)(1)
+    assert list(inner[0]["phases"]) == ["inner"]
+    assert list(outer[0]["phases"]) == ["outer"]
+
+
+@pytest.mark.parametrize(
+    "kty, crv, kid_type, phases",
+    [
+        ("RSA", "", "none", ["jwk.keygen", "jwk.members"]),
+        ("EC", "P-256", "sha256", ["jwk.keygen", "jwk.members", "jwk.kid"]),
+        ("OKP", "Ed25519", "thumbprint-sha256", ["jwk.keygen", "jwk.members", "jwk.kid"]),
+    ],
+)
+def test_profiling_jwk(kty, crv, kid_type, phases):
+    reports = []
+    with profiling(reports.append):
+        generate_jwk(kty, crv, kid_type=kid_type)
+    assert sorted(reports[0]["phases"]) == sorted(phases)
+
+
+def test_profiling_jwk_factory_created_before_profiling():
+    factory = KeyFactory(KeySpec("EC", "P-256"))
+    reports = []
+    with profiling(reports.append):
+        factory.generate()
+    assert reports[0]["phases"] == {}
+
+
+def test_profiling_cached_factory():
+    spec = KeySpec("EC", "P-256")
+    cached_factory(spec).generate()
+    reports = []
+    with profiling(reports.append) as stats:
+        factory = cached_factory(spec)
+        factory.generate()
+        assert cached_factory(spec) is factory
+    assert reports[0]["phases"]["jwk.keygen"]["count"] == 1
+    # The factory of the finished block is not used outside it.
+    assert cached_factory(spec) is not factory
+    cached_factory(spec).generate()
+    assert stats["jwk.keygen"][0] == 1
+    with profiling(reports.append):
+        cached_factory(spec).generate()
+    assert reports[1]["phases"]["jwk.keygen"]["count"] == 1
+
+
+@pytest.mark.parametrize(
+    "version",
+    [1, 2, 3, 4],
+)
+def test_profiling_paserk(version):
+    reports = []
+    with profiling(reports.append):
+        generate_public_paserk(version, True, "", "")
+        generate_local_paserk(version, "", True, wrapping_key="xxx")
+    phases = reports[0]["phases"]
+    assert sorted(phases) == [
+        "paserk.key",
+        "paserk.keygen",
+        "paserk.pem",
+        "paserk.to_paserk",
+        "paserk.to_paserk_id",
+        "paserk.wrap",
+    ]
+    assert phases["paserk.key"]["count"] == 3
+    assert phases["paserk.to_paserk_id"]["count"] == 3
+    assert phases["paserk.wrap"]["count"] == 2
@@ -1,6 +1,31 @@
+import os
+
 import pytest
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+
+from mkkey.utils import (
+    _bytes_from_int,
+    from_base64url_uint,
+    rsa_spki,
+    to_base64url_uint,
+    write_atomic,
+)
+
 
-from mkkey.utils import to_base64url_uint
+@pytest.mark.parametrize(
+    "val, expected",
+    [
+        (0, "AA"),
+        (1, "AQ"),
+        (255, "_w"),
+        (256, "AQA"),
+        (65537, "AQAB"),
+    ],
+)
+def test_to_base64url_uint(val, expected):
+    assert to_base64url_uint(val) == expected
+    assert from_base64url_uint(expected) == val
 
 
 @pytest.mark.parametrize(
@@ -9,8 +34,31 @@ from mkkey.utils import to_base64url_uint
         (-1, "Must be a positive integer."),
     ],
 )
-def test_to_base64url_uint(val, msg):
+def test_to_base64url_uint_with_invalid_arg(val, msg):
     with pytest.raises(ValueError) as err:
         to_base64url_uint(val)
         pytest.fail("to_base64url_uint() must fail.")
     assert msg in str(err.value)
+
+
+@pytest.mark.parametrize("val", [0, 1, 0x80, 0xFFFF, 2**4095 + 1])
+def test_bytes_from_int(val):
+    assert int.from_bytes(_bytes_from_int(val), "big") == val
+    assert _bytes_from_int(val)[:1] != b"\x00"
+
+
+@pytest.mark.parametrize("key_size", [1024, 2048, 3072, 4096])
+def test_rsa_spki(key_size):
+    pub = rsa.generate_private_key(65537, key_size=key_size).public_key()
+    pn = pub.public_numbers()
+    spki = rsa_spki(_bytes_from_int(pn.n), _bytes_from_int(pn.e))
+    assert spki == pub.public_bytes(serialization.Encoding.DER, serialization.PublicFormat.SubjectPublicKeyInfo)
+
+
+def test_write_atomic(tmp_path):
+    path = str(tmp_path / "a.json")
+    write_atomic(path, b"xxx")
+    write_atomic(path, b"yyy", 0o600)
+    with open(path, "rb") as f:
+        assert f.read() == b"yyy"
+    assert os.listdir(tmp_path) == ["a.json"]
@@ -0,0 +1,166 @@
+import io
+import json
+
+import pytest
+
+from mkkey.jwk import generate_jwk
+from mkkey.utils import base64url_decode, base64url_encode
+from mkkey.verify import verify_all, verify_jwk
+
+_RSA = generate_jwk("RSA", kid_type="sha256")
+
+
+def _tamper(value: str) -> str:
+    b = bytearray(base64url_decode(value))
+    b[-1] ^= 1
+    return base64url_encode(bytes(b))
+
+
+@pytest.mark.parametrize(
+    "kty, crv",
+    [
+        ("RSA", ""),
+        ("EC", "P-256"),
+        ("EC", "P-384"),
+        ("EC", "P-521"),
+        ("EC", "secp256k1"),
+        ("OKP", "Ed25519"),
+        ("OKP", "Ed448"),
+    ],
+)
+def test_verify_jwk(kty, crv):
+    res = _RSA if kty == "RSA" else generate_jwk(kty, crv, kid_type="sha256")
+    secret, public = res["secret"]["jwk"], res["public"]["jwk"]
+    assert verify_jwk(secret, public) == []
+    assert verify_jwk(secret, kid_type="sha256") == []
+    assert verify_jwk(public, kid_type="sha256") == []
+
+
+@pytest.mark.parametrize(
+    "kid_type, kid_size",
+    [
+        ("sha256", 0),
+        ("sha256", 8),
+        ("thumbprint-sha256", 0),
+        ("thumbprint-sha384", 0),
+        ("thumbprint-sha512", 16),
+    ],
+)
+def test_verify_jwk_kid(kid_type, kid_size):
+    jwk = generate_jwk("EC", "P-256", kid_type=kid_type, kid_size=kid_size)["secret"]["jwk"]
+    assert verify_jwk(jwk, kid_type=kid_type) == []
+    other = "thumbprint-sha256" if kid_type == "sha256" else "sha256"
+    assert verify_jwk(jwk, kid_type=other) == [f"kid does not match kid_type {other}."]
+    jwk["kid"] = "xxx"
+    assert verify_jwk(jwk, kid_type=kid_type) == [f"kid does not match kid_type {kid_type}."]
+    del jwk["kid"]
+    assert verify_jwk(jwk, kid_type=kid_type) == ["kid is missing."]
+
+
+@pytest.mark.parametrize(
+    "member, msg",
+    [
+        ("dp", "dp does not match the private key."),
+        ("dq", "dq does not match the private key."),
+        ("qi", "qi does not match the private key."),
+        ("n", "n does not match p and q."),
+        ("p", "n does not match p and q."),
+    ],
+)
+def test_verify_jwk_rsa_with_inconsistent_member(member, msg):
+    jwk = dict(_RSA["secret"]["jwk"])
+    jwk[member] = _tamper(jwk[member])
+    assert verify_jwk(jwk) == [msg]
+
+
+@pytest.mark.parametrize(
+    "kty, crv",
+    [
+        ("EC", "P-256"),
+        ("OKP", "Ed25519"),
+    ],
+)
+def test_verify_jwk_with_inconsistent_public_key(kty, crv):
+    res = generate_jwk(kty, crv)
+    jwk = res["secret"]["jwk"]
+    jwk["x"] = generate_jwk(kty, crv)["secret"]["jwk"]["x"]
+    assert "x does not match the private key." in verify_jwk(jwk)
+
+
+def test_verify_jwk_with_point_not_on_curve():
+    jwk = generate_jwk("EC", "P-256")["public"]["jwk"]
+    jwk["x"] = _tamper(jwk["x"])
+    assert verify_jwk(jwk)[0].startswith("Invalid key: ")
+
+
+def test_verify_jwk_with_public():
+    res = generate_jwk("EC", "P-256")
+    secret, public = res["secret"]["jwk"], res["public"]["jwk"]
+    assert verify_jwk(secret, dict(public, crv="P-384")) == ["crv of the public JWK does not match."]
+    assert verify_jwk(secret, dict(public, d=secret["d"])) == ["The public JWK contains a private member: d."]
+
+
+def test_verify_jwk_rsa_key_size():
+    jwk = generate_jwk("RSA", rsa_key_size=1024)["secret"]["jwk"]
+    assert verify_jwk(jwk) == ["RSA key size 1024 is less than 2048."]
+    assert verify_jwk(jwk, min_rsa_key_size=1024) == []
+    assert verify_jwk(_RSA["public"]["jwk"], min_rsa_key_size=3072) == ["RSA key size 2048 is less than 3072."]
+
+
+@pytest.mark.parametrize(
+    "jwk, msg",
+    [
+        ([], "A JWK must be a JSON object."),
+        ({"kty": "EC", "crv": "P-256", "x": "AA"}, "Missing member for EC: y."),
+        ({"kty": "EC", "crv": "xxx", "x": "AA", "y": "AA"}, "Invalid key: Invalid crv for EC: xxx."),
+        ({"kty": "xxx"}, "Invalid key: Invalid kty: xxx."),
+    ],
+)
+def test_verify_jwk_with_invalid_jwk(jwk, msg):
+    assert verify_jwk(jwk) == [msg]
+
+
+def test_verify_jwk_with_invalid_kid_type():
+    with pytest.raises(ValueError) as err:
+        verify_jwk(_RSA["public"]["jwk"], kid_type="xxx")
+        pytest.fail("verify_jwk() must fail.")
+    assert "Invalid kid_type: xxx." in str(err.value)
+
+
+@pytest.mark.parametrize(
+    "workers, chunksize",
+    [
+        (1, 256),
+        (1, 2),
+        (2, 2),
+    ],
+)
+def test_verify_all(tmp_path, workers, chunksize):
+    pairs = [generate_jwk("EC", "P-256", kid_type="sha256") for _ in range(3)]
+    weak = generate_jwk("RSA", rsa_key_size=1024)["secret"]["jwk"]
+    (tmp_path / "a.ndjson").write_text("".join(json.dumps(p) + "\n" for p in pairs))
+    (tmp_path / "b.json").write_text(json.dumps({"keys": [weak]}, indent=4))
+    (tmp_path / "c.json").write_text("xxx")
+    stdin = io.BytesIO(json.dumps(pairs[0]["secret"]["jwk"]).encode())
+    res = list(verify_all([str(tmp_path), "-"], stdin, "sha256", workers=workers, chunksize=chunksize))
+    assert res == [
+        {"source": str(tmp_path / "a.ndjson"), "index": 0, "kid": pairs[0]["secret"]["jwk"]["kid"], "errors": []},
+        {"source": str(tmp_path / "a.ndjson"), "index": 1, "kid": pairs[1]["secret"]["jwk"]["kid"], "errors": []},
+        {"source": str(tmp_path / "a.ndjson"), "index": 2, "kid": pairs[2]["secret"]["jwk"]["kid"], "errors": []},
+        {
+            "source": str(tmp_path / "b.json"),
+            "index": 0,
+            "kid": "",
+            "errors": ["RSA key size 1024 is less than 2048.", "kid is missing."],
+        },
+        {"source": str(tmp_path / "c.json"), "error": "Expecting value: line 1 column 1 (char 0)"},
+        {"source": "<stdin>", "index": 0, "kid": pairs[0]["secret"]["jwk"]["kid"], "errors": []},
+    ]
+
+
+def test_verify_all_with_jwks_pair(tmp_path):
+    res = generate_jwk("OKP", "Ed25519", output_format="jwks")
+    res["public"]["jwks"]["keys"][0]["x"] = _tamper(res["public"]["jwks"]["keys"][0]["x"])
+    (tmp_path / "pair.json").write_text(json.dumps(res))
+    res = list(verify_all([str(tmp_path / "pair.json")], io.BytesIO()))
+    assert res[0]["errors"] == ["x of the public JWK does not match."]